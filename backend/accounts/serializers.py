@@ -29,6 +29,32 @@ class UserProfileSerializer(serializers.ModelSerializer):
         ]
 
 
+class LeaderboardEntrySerializer(UserProfileSerializer):
+    """Profile with lifetime workout counters for leaderboard extras"""
+    total_duration = serializers.SerializerMethodField()
+    active_days = serializers.SerializerMethodField()
+    intense_workouts = serializers.SerializerMethodField()
+
+    class Meta(UserProfileSerializer.Meta):
+        fields = UserProfileSerializer.Meta.fields + ['total_duration', 'active_days', 'intense_workouts']
+
+    def _counters(self, obj):
+        # Joined by the leaderboard query; users without workouts have no row
+        return getattr(obj.user, 'stats_counters', None)
+
+    def get_total_duration(self, obj):
+        counters = self._counters(obj)
+        return counters.total_duration if counters else 0
+
+    def get_active_days(self, obj):
+        counters = self._counters(obj)
+        return counters.active_days if counters else 0
+
+    def get_intense_workouts(self, obj):
+        counters = self._counters(obj)
+        return counters.intense_count if counters else 0
+
+
 class UserRegistrationSerializer(serializers.ModelSerializer):
     """Serializer for user registration"""
     password = serializers.CharField(write_only=True, min_length=8)
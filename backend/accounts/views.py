@@ -6,6 +6,7 @@ from .models import UserProfile
 from .serializers import (
     UserSerializer,
     UserProfileSerializer,
+    LeaderboardEntrySerializer,
     UserRegistrationSerializer
 )
 
@@ -72,8 +73,9 @@ class UserProfileViewSet(viewsets.ModelViewSet):
 
 class LeaderboardViewSet(viewsets.ReadOnlyModelViewSet):
     """ViewSet for Leaderboard"""
-    queryset = UserProfile.objects.all().order_by('-total_points')
-    serializer_class = UserProfileSerializer
+    # Counters are joined so leaderboard extras cost no query per entry
+    queryset = UserProfile.objects.select_related('user', 'user__stats_counters').order_by('-total_points')
+    serializer_class = LeaderboardEntrySerializer
     permission_classes = [permissions.IsAuthenticated]
     pagination_class = None  # Return all or top N
 
@@ -0,0 +1,107 @@
+"""
+Indexed achievement rule engine.
+
+Achievements are indexed per process by requirement_type, each group
+sorted by requirement_value. An evaluation reads each metric once, from
+the post-workout profile stats or the user's UserStatsCounters row (one
+query, only when a counter-based achievement exists), finds all crossed
+thresholds of a group with one bisection, and unlocks the ones the user
+does not hold yet with a single bulk_create.
+
+Achievement save/delete signals drop the index and bump its version stamp
+in SHARED_CACHE_ALIAS, which reaches other processes only when that cache is
+shared between them (see workouts.shared_cache). Bulk writes that bypass
+signals must call invalidate_achievement_index() themselves.
+"""
+from bisect import bisect_right
+from workouts.counters import get_counters
+from workouts.shared_cache import SharedSnapshot
+from .models import Achievement, UserAchievement
+
+
+INDEX_VERSION_KEY = 'achievement_index:version'
+
+
+# requirement_type -> (source, field): 'stats' values are the post-workout
+# profile values passed in, 'counters' values come from UserStatsCounters
+METRICS = {
+    'total_workouts': ('stats', 'total_workouts'),
+    'current_streak': ('stats', 'current_streak'),
+    'total_duration': ('counters', 'total_duration'),
+    'intense_workouts': ('counters', 'intense_count'),
+}
+
+
+class AchievementIndex:
+    """Achievements grouped by requirement_type, sorted by requirement_value"""
+
+    def __init__(self, achievements, version):
+        self.version = version
+        groups = {}
+        for achievement in sorted(achievements, key=lambda a: (a.requirement_value, a.id)):
+            groups.setdefault(achievement.requirement_type, []).append(achievement)
+        self.groups = {
+            requirement_type: ([a.requirement_value for a in group], tuple(group))
+            for requirement_type, group in groups.items()
+        }
+
+    def crossed(self, requirement_type, value):
+        """Achievements of a type whose threshold value reaches"""
+        thresholds, achievements = self.groups[requirement_type]
+        return achievements[:bisect_right(thresholds, value)]
+
+
+_index = SharedSnapshot(
+    INDEX_VERSION_KEY, lambda version: AchievementIndex(Achievement.objects.all(), version)
+)
+
+
+def get_achievement_index():
+    """Get the current index, loading it with one query if needed"""
+    return _index.get()
+
+
+def invalidate_achievement_index():
+    """Drop the index in this process and mark it stale for all others"""
+    _index.invalidate()
+
+
+def evaluate_achievements(user, stats):
+    """
+    Unlock every achievement the user's stats now reach.
+
+    Args:
+        user: User who logged the workout
+        stats: Post-workout profile values (total_workouts, current_streak)
+
+    Returns:
+        list: Newly unlocked achievements
+    """
+    index = get_achievement_index()
+
+    counters = None
+    crossed = []
+    for requirement_type in index.groups:
+        metric = METRICS.get(requirement_type)
+        if metric is None:
+            continue
+        source, field = metric
+        if source == 'counters':
+            if counters is None:
+                counters = get_counters(user)
+            value = getattr(counters, field)
+        else:
+            value = stats[field]
+        crossed.extend(index.crossed(requirement_type, value))
+    if not crossed:
+        return []
+
+    held = set(UserAchievement.objects.filter(
+        user=user, achievement_id__in=[achievement.id for achievement in crossed]
+    ).order_by().values_list('achievement_id', flat=True))
+    newly_unlocked = [achievement for achievement in crossed if achievement.id not in held]
+
+    UserAchievement.objects.bulk_create([
+        UserAchievement(user=user, achievement=achievement) for achievement in newly_unlocked
+    ])
+    return newly_unlocked
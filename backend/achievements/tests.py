@@ -0,0 +1,69 @@
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from workouts.counters import rebuild_counters
+from workouts.models import WorkoutHistory
+from .engine import evaluate_achievements, get_achievement_index, invalidate_achievement_index
+from .models import Achievement, UserAchievement
+
+
+def create_achievement(name, requirement_type, requirement_value, points=10):
+    return Achievement.objects.create(
+        name=name, description=name, category='consistency', tier='bronze', icon='*',
+        color='blue', requirement_type=requirement_type, requirement_value=requirement_value,
+        points=points
+    )
+
+
+class AchievementEngineTests(TestCase):
+    """Tests for the indexed achievement rule engine"""
+
+    def setUp(self):
+        cache.clear()
+        # The rule index is process-wide: do not let it outlive the rolled-back test data
+        self.addCleanup(invalidate_achievement_index)
+        self.user = User.objects.create_user(username='achiever', password='pass')
+        self.first = create_achievement('First', 'total_workouts', 1)
+        self.fifth = create_achievement('Fifth', 'total_workouts', 5)
+        self.hour = create_achievement('Hour', 'total_duration', 60)
+        self.intense = create_achievement('Intense', 'intense_workouts', 2)
+
+    def _log(self):
+        return WorkoutHistory.objects.create(
+            user=self.user, muscles_targeted=['chest'], duration=40, intensity='intense',
+            goal='strength', equipment='gym', exercises_completed=[]
+        )
+
+    def test_crossed_thresholds_unlock_once_in_bulk(self):
+        self._log()
+        self.assertEqual(
+            set(UserAchievement.objects.filter(user=self.user).values_list('achievement__name', flat=True)),
+            {'First'}
+        )
+
+        # Bypass signals so the engine sees the second workout first
+        WorkoutHistory.objects.bulk_create([WorkoutHistory(
+            user=self.user, muscles_targeted=['back'], duration=40, intensity='intense',
+            goal='strength', equipment='gym', exercises_completed=[]
+        )])
+        rebuild_counters(self.user)
+        # One counters read for both counter metrics, one for held achievements, one insert
+        with self.assertNumQueries(3):
+            unlocked = evaluate_achievements(self.user, {'total_workouts': 2, 'current_streak': 1})
+        self.assertEqual({a.name for a in unlocked}, {'Hour', 'Intense'})
+        self.assertEqual(evaluate_achievements(self.user, {'total_workouts': 2, 'current_streak': 1}), [])
+
+    def test_index_follows_achievement_changes(self):
+        self.assertEqual(get_achievement_index().crossed('total_workouts', 4), (self.first,))
+        self.fifth.requirement_value = 3
+        self.fifth.save()
+        self.assertEqual(get_achievement_index().crossed('total_workouts', 4), (self.first, self.fifth))
+        self.first.delete()
+        self.assertEqual(get_achievement_index().crossed('total_workouts', 4), (self.fifth,))
+
+    @override_settings(SHARED_CACHE_LOCAL_TIMEOUT=0)
+    def test_per_process_cache_expires_index(self):
+        # Another worker's edit: no signal and no version bump reach this process
+        self.assertEqual(get_achievement_index().crossed('total_workouts', 4), (self.first,))
+        Achievement.objects.filter(pk=self.fifth.pk).update(requirement_value=3)
+        self.assertEqual(get_achievement_index().crossed('total_workouts', 4), (self.first, self.fifth))
@@ -1,6 +1,7 @@
 from rest_framework import serializers
 from .models import ChatMessage
 from workouts.models import WorkoutHistory
+from workouts.counters import get_counters
 from achievements.models import Achievement, UserAchievement
 from accounts.models import UserProfile
 
@@ -24,6 +25,7 @@ class UserContextSerializer(serializers.Serializer):
     
     # Recent workout stats
     total_workouts = serializers.IntegerField()
+    workout_stats = serializers.DictField()
     recent_workouts = serializers.ListField(child=serializers.DictField())
     favorite_muscle_groups = serializers.ListField(child=serializers.CharField())
     
@@ -58,11 +60,32 @@ class UserContextSerializer(serializers.Serializer):
                 'duration': workout.duration,
                 'status': workout.status,
             } for workout in recent_workouts]
-            total_workouts = recent_workouts.count()
         except Exception as e:
             print(f"Error getting workouts: {e}")
             recent_workout_data = []
+
+        # Lifetime totals from the user's counters row (not the 10 recent workouts)
+        try:
+            counters = get_counters(user)
+            total_workouts = counters.workout_count
+            workout_stats = {
+                'total_duration': counters.total_duration,
+                'active_days': counters.active_days,
+                'intensity': {
+                    'light': counters.light_count,
+                    'moderate': counters.moderate_count,
+                    'intense': counters.intense_count,
+                },
+                'goal': {
+                    'strength': counters.strength_count,
+                    'hypertrophy': counters.hypertrophy_count,
+                    'endurance': counters.endurance_count,
+                },
+            }
+        except Exception as e:
+            print(f"Error getting workout stats: {e}")
             total_workouts = 0
+            workout_stats = {}
         
         # Get favorite muscle groups
         try:
@@ -120,6 +143,7 @@ class UserContextSerializer(serializers.Serializer):
             'total_points': profile.total_points if profile else 0,
             'current_streak': profile.current_streak if profile else 0,
             'total_workouts': total_workouts,
+            'workout_stats': workout_stats,
             'recent_workouts': recent_workout_data,
             'favorite_muscle_groups': favorite_muscle_list,
             'recent_achievements': achievement_data,
@@ -128,6 +128,52 @@ MEDIA_ROOT = BASE_DIR / 'media'
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': config('CACHE_BACKEND', default='django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': config('CACHE_LOCATION', default=''),
+    }
+}
+
+# Version stamps that invalidate per-process state (exercise catalog, achievement index) must
+# live in a cache every worker shares (Redis, Memcached, database). LocMemCache is per process:
+# fine for development, but other workers then only catch up after SHARED_CACHE_LOCAL_TIMEOUT
+SHARED_CACHE_ALIAS = 'default'
+SHARED_CACHE_LOCAL_TIMEOUT = config('SHARED_CACHE_LOCAL_TIMEOUT', default=30, cast=int)
+
+# Analytics results are cached per user and invalidated on workout writes; with a per-process
+# cache they expire after SHARED_CACHE_LOCAL_TIMEOUT instead
+ANALYTICS_CACHE_ALIAS = SHARED_CACHE_ALIAS
+ANALYTICS_CACHE_TIMEOUT = config('ANALYTICS_CACHE_TIMEOUT', default=60 * 60, cast=int)
+
+# Analytics engine: 'orm' (derived tables) or the experimental 'columnar' (NumPy over raw
+# history, slower; falls back to 'orm' without NumPy)
+WORKOUT_ANALYTICS_ENGINE = config('WORKOUT_ANALYTICS_ENGINE', default='orm')
+
+# Common analytics views are recomputed in the background after workout writes
+ANALYTICS_PREWARM_ENABLED = config('ANALYTICS_PREWARM_ENABLED', default=True, cast=bool)
+ANALYTICS_PREWARM_WORKERS = config('ANALYTICS_PREWARM_WORKERS', default=2, cast=int)
+ANALYTICS_PREWARM_MAX_PENDING = 1000
+
+# Seeded workout plans are memoized per process (0 disables the cache)
+WORKOUT_PLAN_CACHE_SIZE = config('WORKOUT_PLAN_CACHE_SIZE', default=256, cast=int)
+
+# Recently logged exercises are down-weighted in generated plans for this many days
+EXERCISE_RECENCY_WINDOW_DAYS = config('EXERCISE_RECENCY_WINDOW_DAYS', default=14, cast=int)
+EXERCISE_RECENCY_SIZE = 64
+
+# Generated plan retention (purge_generated_workouts); 0 keeps plans forever. User plans are
+# kept by default: enable the unsaved policy only once users save plans (save_plan action)
+GENERATED_WORKOUT_ANONYMOUS_RETENTION_HOURS = config('GENERATED_WORKOUT_ANONYMOUS_RETENTION_HOURS', default=24, cast=int)
+GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS = config('GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS', default=0, cast=int)
+# Anonymous plans are returned inline without being stored when False
+GENERATED_WORKOUT_PERSIST_ANONYMOUS = config('GENERATED_WORKOUT_PERSIST_ANONYMOUS', default=True, cast=bool)
+
+# Generated program days are pre-generated in the background on enrollment
+PROGRAM_PLAN_MATERIALIZE_ENABLED = config('PROGRAM_PLAN_MATERIALIZE_ENABLED', default=True, cast=bool)
+
+
 # REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
@@ -2,7 +2,8 @@ from django.contrib import admin
 from .models import (
     WorkoutHistory, GeneratedWorkout,
     WorkoutProgram, ProgramDay,
-    UserProgramEnrollment, ProgramDayCompletion
+    UserProgramEnrollment, ProgramDayCompletion, EnrollmentDayPlan,
+    WorkoutDailyRollup, WorkoutStreak, UserStatsCounters
 )
 
 
@@ -16,8 +17,8 @@ class WorkoutHistoryAdmin(admin.ModelAdmin):
 
 @admin.register(GeneratedWorkout)
 class GeneratedWorkoutAdmin(admin.ModelAdmin):
-    list_display = ['user', 'intensity', 'goal', 'duration', 'created_at']
-    list_filter = ['intensity', 'goal', 'equipment', 'created_at']
+    list_display = ['user', 'intensity', 'goal', 'duration', 'is_saved', 'created_at']
+    list_filter = ['intensity', 'goal', 'equipment', 'is_saved', 'created_at']
     search_fields = ['user__username']
     date_hierarchy = 'created_at'
 
@@ -60,3 +61,29 @@ class ProgramDayCompletionAdmin(admin.ModelAdmin):
     list_filter = ['completed_at', 'enrollment__program']
     search_fields = ['enrollment__user__username']
     date_hierarchy = 'completed_at'
+
+
+@admin.register(WorkoutDailyRollup)
+class WorkoutDailyRollupAdmin(admin.ModelAdmin):
+    list_display = ['user', 'date', 'workout_count', 'total_duration', 'total_points']
+    search_fields = ['user__username']
+    date_hierarchy = 'date'
+
+
+@admin.register(WorkoutStreak)
+class WorkoutStreakAdmin(admin.ModelAdmin):
+    list_display = ['user', 'start_date', 'end_date', 'length']
+    search_fields = ['user__username']
+    date_hierarchy = 'end_date'
+
+
+@admin.register(UserStatsCounters)
+class UserStatsCountersAdmin(admin.ModelAdmin):
+    list_display = ['user', 'workout_count', 'total_duration', 'active_days', 'updated_at']
+    search_fields = ['user__username']
+
+
+@admin.register(EnrollmentDayPlan)
+class EnrollmentDayPlanAdmin(admin.ModelAdmin):
+    list_display = ['enrollment', 'program_day', 'created_at']
+    search_fields = ['enrollment__user__username', 'program_day__name']
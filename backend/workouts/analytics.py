@@ -2,19 +2,48 @@
 Analytics service for workout data aggregation and analysis.
 Optimized with database-level aggregations for better performance.
 """
-from django.db.models import Count, Sum, Avg, Max, Q, Case, When, Value, FloatField
-from django.db.models.functions import ExtractWeekDay
+from django.db.models import Count, Sum, F, Q, Value, Window
+from django.db.models.expressions import RowRange
+from django.db.models.functions import ExtractWeekDay, TruncWeek, TruncMonth, RowNumber
+from django.conf import settings
 from django.utils import timezone
 from datetime import datetime, timedelta
 from collections import defaultdict
-from .models import WorkoutHistory
+from .models import WorkoutHistory, WorkoutDailyRollup, WorkoutMuscle
+from .calendar_bitmap import compact_calendar
+from .records import get_user_records
+from .streaks import get_streaks
+from .muscle_index import get_pair_counts, top_muscle_pairs
+from .rollups import (
+    INTENSITY_SCORES, INTENSITY_FIELDS, GOAL_FIELDS, EQUIPMENT_FIELDS, COUNTER_FIELDS
+)
+
+
+# Sections served by the combined dashboard endpoint
+DASHBOARD_SECTIONS = ('summary', 'trends', 'muscles', 'consistency', 'records')
+
+# Encodings of the consistency calendar
+CALENDAR_FORMATS = ('full', 'compact')
 
 
 class WorkoutAnalyticsService:
     """Service class for workout analytics calculations"""
 
     # Class-level constants for intensity scoring
-    INTENSITY_SCORES = {'light': 1.0, 'moderate': 1.5, 'intense': 2.0}
+    INTENSITY_SCORES = INTENSITY_SCORES
+
+    # Database truncation used to bucket trends by granularity
+    TREND_TRUNCATORS = {'weekly': TruncWeek, 'monthly': TruncMonth}
+
+    # Milestone ladders: type -> (field summed cumulatively, or None to count
+    # workouts, thresholds). Add a ladder here to date a new kind of milestone.
+    MILESTONE_LADDERS = {
+        'total_workouts': (None, [10, 25, 50, 100, 250, 500]),
+        'total_points': ('points_earned', [1000, 2500, 5000, 10000]),
+    }
+
+    # Indexed by date.weekday()
+    WEEKDAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
 
     @staticmethod
     def parse_period(period_str, start_date=None, end_date=None):
@@ -59,44 +88,28 @@ class WorkoutAnalyticsService:
         return workouts
 
     @classmethod
-    def get_summary(cls, user, start_date=None, end_date=None):
+    def _get_rollup_queryset(cls, user, start_date=None, end_date=None):
+        """Helper to get filtered daily rollup queryset (one row per active day)"""
+        rollups = WorkoutDailyRollup.objects.filter(user=user)
+        if start_date:
+            rollups = rollups.filter(date__gte=start_date)
+        if end_date:
+            rollups = rollups.filter(date__lte=end_date)
+        return rollups
+
+    @classmethod
+    def _build_summary(cls, totals):
         """
-        Get summary analytics for user's workouts.
-        Optimized to use database aggregations instead of Python loops.
+        Build the summary section from summed counters.
 
         Args:
-            user: User instance
-            start_date: Start date for analysis (date object)
-            end_date: End date for analysis (date object)
+            totals: dict with workout_count, total_duration, total_points,
+                intensity_score_sum and the rollup breakdown counter fields
 
         Returns:
             dict: Summary statistics
         """
-        workouts = cls._get_base_queryset(user, start_date, end_date)
-
-        # Single query with all aggregations including intensity scoring
-        aggregates = workouts.aggregate(
-            total_workouts=Count('id'),
-            total_duration=Sum('duration'),
-            total_points=Sum('points_earned'),
-            avg_duration=Avg('duration'),
-            # Calculate intensity counts in single query
-            light_count=Count('id', filter=Q(intensity='light')),
-            moderate_count=Count('id', filter=Q(intensity='moderate')),
-            intense_count=Count('id', filter=Q(intensity='intense')),
-            # Calculate weighted intensity score using Case/When at DB level
-            intensity_score_sum=Sum(
-                Case(
-                    When(intensity='light', then=Value(1.0)),
-                    When(intensity='moderate', then=Value(1.5)),
-                    When(intensity='intense', then=Value(2.0)),
-                    default=Value(1.0),
-                    output_field=FloatField()
-                )
-            )
-        )
-
-        total_workouts = aggregates['total_workouts'] or 0
+        total_workouts = totals.get('workout_count') or 0
 
         if total_workouts == 0:
             return {
@@ -113,30 +126,29 @@ class WorkoutAnalyticsService:
                 'equipment_breakdown': {}
             }
 
-        # Calculate average intensity from pre-computed sum
-        avg_intensity = (aggregates['intensity_score_sum'] or 0) / total_workouts
+        # Calculate averages from pre-computed sums
+        total_duration = totals.get('total_duration') or 0
+        avg_duration = total_duration / total_workouts
+        avg_intensity = (totals.get('intensity_score_sum') or 0) / total_workouts
 
-        # Breakdown by intensity from aggregates (no additional query)
+        # Breakdowns from the same counters (no additional query)
         intensity_breakdown = {
-            'light': aggregates['light_count'] or 0,
-            'moderate': aggregates['moderate_count'] or 0,
-            'intense': aggregates['intense_count'] or 0
+            intensity: totals.get(field) or 0 for intensity, field in INTENSITY_FIELDS.items()
+        }
+        goal_breakdown = {
+            goal: totals[field] for goal, field in GOAL_FIELDS.items() if totals.get(field)
+        }
+        equipment_breakdown = {
+            equipment: totals[field]
+            for equipment, field in EQUIPMENT_FIELDS.items() if totals.get(field)
         }
-
-        # Breakdown by goal (single query)
-        goal_counts = workouts.values('goal').annotate(count=Count('id'))
-        goal_breakdown = {item['goal']: item['count'] for item in goal_counts if item['goal']}
-
-        # Breakdown by equipment (single query)
-        equipment_counts = workouts.values('equipment').annotate(count=Count('id'))
-        equipment_breakdown = {item['equipment']: item['count'] for item in equipment_counts}
 
         return {
             'metrics': {
                 'total_workouts': total_workouts,
-                'total_duration': aggregates['total_duration'] or 0,
-                'total_points': aggregates['total_points'] or 0,
-                'avg_duration': round(aggregates['avg_duration'] or 0, 1),
+                'total_duration': total_duration,
+                'total_points': totals.get('total_points') or 0,
+                'avg_duration': round(avg_duration, 1),
                 'avg_intensity_score': round(avg_intensity, 2),
                 'completion_rate': 100.0  # Assuming all logged workouts are completed
             },
@@ -146,106 +158,138 @@ class WorkoutAnalyticsService:
         }
 
     @classmethod
-    def get_trends(cls, user, start_date=None, end_date=None, granularity='daily'):
+    def get_summary(cls, user, start_date=None, end_date=None):
         """
-        Get time-series trends for workouts.
-        Optimized with database-level intensity calculation.
+        Get summary analytics for user's workouts.
+        Reads the per-day rollup table instead of raw workout rows.
 
         Args:
             user: User instance
-            start_date: Start date (date object)
+            start_date: Start date for analysis (date object)
+            end_date: End date for analysis (date object)
+
+        Returns:
+            dict: Summary statistics
+        """
+        rollups = cls._get_rollup_queryset(user, start_date, end_date)
+
+        # Single query over the daily rollups, including every breakdown
+        totals = rollups.aggregate(**{field: Sum(field) for field in COUNTER_FIELDS})
+        return cls._build_summary(totals)
+
+    @staticmethod
+    def bucket_start(day, granularity):
+        """Return the first day of the weekly (ISO, Monday) or monthly bucket containing day"""
+        if granularity == 'weekly':
+            return day - timedelta(days=day.weekday())
+        if granularity == 'monthly':
+            return day.replace(day=1)
+        return day
+
+    @classmethod
+    def iter_buckets(cls, start_date, end_date, granularity):
+        """Yield every bucket start date between start_date and end_date (inclusive)"""
+        current = cls.bucket_start(start_date, granularity)
+        while current <= end_date:
+            yield current
+            if granularity == 'weekly':
+                current += timedelta(days=7)
+            elif granularity == 'monthly':
+                current = (current.replace(day=28) + timedelta(days=4)).replace(day=1)
+            else:
+                current += timedelta(days=1)
+
+    @classmethod
+    def _build_trends(cls, buckets, start_date, end_date, granularity):
+        """
+        Build the trends section from per-bucket sums.
+
+        Args:
+            buckets: dict of bucket start date -> (workouts, duration, points, intensity_score_sum)
+            start_date: Start date (date object or None for all time)
             end_date: End date (date object)
             granularity: 'daily', 'weekly', or 'monthly'
 
         Returns:
             dict: Trends data with granularity and data points
         """
-        workouts = cls._get_base_queryset(user, start_date, end_date)
-
-        # Group by date with all aggregations in a single query
-        if granularity == 'daily':
-            grouped = workouts.values('workout_date').annotate(
-                workouts=Count('id'),
-                duration=Sum('duration'),
-                points=Sum('points_earned'),
-                # Calculate intensity score sum at database level
-                intensity_score_sum=Sum(
-                    Case(
-                        When(intensity='light', then=Value(1.0)),
-                        When(intensity='moderate', then=Value(1.5)),
-                        When(intensity='intense', then=Value(2.0)),
-                        default=Value(1.0),
-                        output_field=FloatField()
-                    )
-                )
-            ).order_by('workout_date')
-
-            # Build data points without additional queries
-            data_points = [
-                {
-                    'date': group['workout_date'].strftime('%Y-%m-%d'),
-                    'workouts': group['workouts'],
-                    'duration': group['duration'] or 0,
-                    'points': group['points'] or 0,
-                    'avg_intensity': round(
-                        (group['intensity_score_sum'] or 0) / group['workouts'], 2
-                    ) if group['workouts'] > 0 else 0
-                }
-                for group in grouped
-            ]
-
+        def point(day, workouts, duration, points, intensity_score_sum):
             return {
-                'granularity': 'daily',
-                'data': data_points
+                'date': day.strftime('%Y-%m-%d'),
+                'workouts': workouts,
+                'duration': duration,
+                'points': points,
+                'avg_intensity': round(intensity_score_sum / workouts, 2) if workouts > 0 else 0
             }
 
-        # For weekly/monthly, we'd implement similar logic with date truncation
-        # For MVP, focusing on daily granularity
+        if granularity == 'daily':
+            # Daily trends only list active days
+            data_points = [point(day, *buckets[day]) for day in sorted(buckets)]
+        elif granularity in cls.TREND_TRUNCATORS:
+            # "All time" ranges start at the first active bucket
+            first_bucket = start_date or (min(buckets) if buckets else None)
+            data_points = []
+            if first_bucket and end_date:
+                data_points = [
+                    point(bucket, *buckets.get(bucket, (0, 0, 0, 0)))
+                    for bucket in cls.iter_buckets(first_bucket, end_date, granularity)
+                ]
+        else:
+            data_points = []
+
         return {
             'granularity': granularity,
-            'data': []
+            'data': data_points
         }
 
     @classmethod
-    def get_muscle_analytics(cls, user, start_date=None, end_date=None, top_n=10):
+    def get_trends(cls, user, start_date=None, end_date=None, granularity='daily'):
         """
-        Get muscle group frequency analysis.
-        Note: JSON field parsing still requires Python-level processing,
-        but we minimize queries by fetching only needed fields.
+        Get time-series trends for workouts.
+        Reads the per-day rollup table instead of raw workout rows.
+
+        Daily trends only contain active days. Weekly and monthly trends are
+        bucketed in the database with date truncation and zero-filled, so the
+        payload has one point per week/month in the range.
 
         Args:
             user: User instance
             start_date: Start date (date object)
             end_date: End date (date object)
-            top_n: Number of top muscles to return
+            granularity: 'daily', 'weekly', or 'monthly'
 
         Returns:
-            dict: Muscle frequency data
+            dict: Trends data with granularity and data points
         """
-        workouts = cls._get_base_queryset(user, start_date, end_date)
-        
-        # Only fetch the fields we need
-        workouts_data = workouts.values('muscles_targeted', 'duration')
-
-        # Parse muscles_targeted JSON field
-        muscle_counts = defaultdict(int)
-        muscle_durations = defaultdict(int)
-        total_workouts = 0
-
-        for workout in workouts_data:
-            total_workouts += 1
-            muscles_targeted = workout['muscles_targeted']
-            if muscles_targeted:
-                muscles = muscles_targeted if isinstance(muscles_targeted, list) else []
-                for muscle in muscles:
-                    # Normalize muscle name (capitalize first letter)
-                    muscle_name = muscle.strip().capitalize()
-                    muscle_counts[muscle_name] += 1
-                    muscle_durations[muscle_name] += workout['duration']
-
-        # Convert to list and sort by count
+        rollups = cls._get_rollup_queryset(user, start_date, end_date)
+
+        if granularity == 'daily':
+            # Rollups already hold one row per active day
+            grouped = rollups.values_list(
+                'date', 'workout_count', 'total_duration', 'total_points', 'intensity_score_sum'
+            )
+        elif granularity in cls.TREND_TRUNCATORS:
+            # Single grouped query bucketed by the truncated date
+            grouped = rollups.annotate(
+                bucket=cls.TREND_TRUNCATORS[granularity]('date')
+            ).values('bucket').annotate(
+                workouts=Sum('workout_count'),
+                duration=Sum('total_duration'),
+                points=Sum('total_points'),
+                score=Sum('intensity_score_sum')
+            ).order_by('bucket').values_list('bucket', 'workouts', 'duration', 'points', 'score')
+        else:
+            grouped = []
+
+        buckets = {row[0]: row[1:] for row in grouped}
+        return cls._build_trends(buckets, start_date, end_date, granularity)
+
+    @staticmethod
+    def _build_muscle_frequency(muscle_counts, muscle_durations, total_workouts, top_n):
+        """Build the top-N muscle frequency list from per-muscle counts and durations"""
         muscle_frequency = []
-        for muscle, count in sorted(muscle_counts.items(), key=lambda x: x[1], reverse=True)[:top_n]:
+        ranked = sorted(muscle_counts.items(), key=lambda x: (-x[1], x[0]))
+        for muscle, count in ranked[:top_n]:
             percentage = (count / total_workouts * 100) if total_workouts > 0 else 0
             muscle_frequency.append({
                 'muscle': muscle,
@@ -253,85 +297,110 @@ class WorkoutAnalyticsService:
                 'total_duration': muscle_durations[muscle],
                 'percentage': round(percentage, 1)
             })
-
-        return {
-            'muscle_frequency': muscle_frequency,
-            'muscle_pairs': []  # Can implement common muscle combinations later
-        }
+        return muscle_frequency
 
     @classmethod
-    def get_consistency(cls, user, start_date=None, end_date=None):
+    def get_muscle_analytics(cls, user, start_date=None, end_date=None, top_n=10):
         """
-        Get consistency metrics including calendar data and day-of-week breakdown.
-        Optimized with bulk calendar data fetching.
+        Get muscle group frequency and most common muscle pairs.
+        Frequency uses a single indexed GROUP BY over the normalized
+        WorkoutMuscle table; pairs are read from the co-occurrence matrix.
 
         Args:
             user: User instance
             start_date: Start date (date object)
             end_date: End date (date object)
+            top_n: Number of top muscles to return
 
         Returns:
-            dict: Consistency data
+            dict: Muscle frequency data
         """
-        # Get user profile for streak info
-        profile = user.userprofile if hasattr(user, 'userprofile') else None
+        # Percentages are relative to all workouts in the period
+        total_workouts = cls._get_rollup_queryset(user, start_date, end_date).aggregate(
+            total=Sum('workout_count')
+        )['total'] or 0
+        return cls._muscle_section(user, start_date, end_date, total_workouts, top_n)
 
-        workouts = cls._get_base_queryset(user, start_date, end_date)
+    @classmethod
+    def _muscle_section(cls, user, start_date, end_date, total_workouts, top_n):
+        """Build the muscles section from the WorkoutMuscle index and co-occurrence matrix"""
+        muscles = WorkoutMuscle.objects.filter(user=user)
+        if start_date:
+            muscles = muscles.filter(workout_date__gte=start_date)
+        if end_date:
+            muscles = muscles.filter(workout_date__lte=end_date)
 
-        # Pre-aggregate calendar data in a single query
-        calendar_data = {}
-        if start_date and end_date:
-            daily_stats = workouts.values('workout_date').annotate(
-                workout_count=Count('id'),
-                total_points=Sum('points_earned')
-            )
-            # Build lookup dict for O(1) access
-            for stat in daily_stats:
-                calendar_data[stat['workout_date']] = {
-                    'workout_count': stat['workout_count'],
-                    'total_points': stat['total_points'] or 0
-                }
+        grouped = muscles.values('muscle').annotate(
+            count=Count('id'),
+            total_duration=Sum('duration')
+        ).order_by('-count', 'muscle')[:top_n]
 
+        muscle_counts = {}
+        muscle_durations = {}
+        for group in grouped:
+            muscle_name = group['muscle'].capitalize()
+            muscle_counts[muscle_name] = group['count']
+            muscle_durations[muscle_name] = group['total_duration'] or 0
+
+        # Pairs come from the maintained co-occurrence matrix (range-restricted fallback)
+        pair_counts = get_pair_counts(user, start_date, end_date)
+
+        return {
+            'muscle_frequency': cls._build_muscle_frequency(
+                muscle_counts, muscle_durations, total_workouts, top_n
+            ),
+            'muscle_pairs': top_muscle_pairs(pair_counts, total_workouts, top_n)
+        }
+
+    @classmethod
+    def _build_consistency(cls, streaks, calendar_data, weekday_counts, start_date, end_date,
+                           calendar_format='full', compact=None):
+        """
+        Build the consistency section.
+
+        Args:
+            streaks: dict from get_streaks() with current_streak and longest_streak
+            calendar_data: dict of date -> (workout_count, total_points) for active days
+            weekday_counts: dict of day name ('Monday'...) -> workout count
+            start_date: Start date (date object)
+            end_date: End date (date object)
+            calendar_format: 'compact' replaces workout_calendar with compact_calendar
+            compact: Compact calendar from compact_calendar(), or None without a range
+
+        Returns:
+            dict: Consistency data
+        """
         # Generate calendar with pre-fetched data
         workout_calendar = []
-        if start_date and end_date:
+        if calendar_format != 'compact' and start_date and end_date:
             current_date = start_date
             while current_date <= end_date:
-                day_data = calendar_data.get(current_date, {'workout_count': 0, 'total_points': 0})
+                workout_count, total_points = calendar_data.get(current_date, (0, 0))
                 workout_calendar.append({
                     'date': current_date.strftime('%Y-%m-%d'),
-                    'has_workout': day_data['workout_count'] > 0,
-                    'workout_count': day_data['workout_count'],
-                    'total_points': day_data['total_points']
+                    'has_workout': workout_count > 0,
+                    'workout_count': workout_count,
+                    'total_points': total_points
                 })
                 current_date += timedelta(days=1)
 
-        # Day of week breakdown using database aggregation
-        day_mapping = {1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday', 
-                       5: 'Thursday', 6: 'Friday', 7: 'Saturday'}
-        
-        day_counts = workouts.annotate(
-            weekday=ExtractWeekDay('workout_date')
-        ).values('weekday').annotate(count=Count('id'))
-        
         day_of_week_breakdown = {
             'Monday': 0, 'Tuesday': 0, 'Wednesday': 0, 'Thursday': 0,
             'Friday': 0, 'Saturday': 0, 'Sunday': 0
         }
-        for item in day_counts:
-            day_name = day_mapping.get(item['weekday'], 'Unknown')
+        for day_name, count in weekday_counts.items():
             if day_name in day_of_week_breakdown:
-                day_of_week_breakdown[day_name] = item['count']
+                day_of_week_breakdown[day_name] = count
 
-        # Calculate weekly consistency
-        total_workouts = workouts.count()
+        # Calculate weekly consistency (weekday counts cover every workout)
+        total_workouts = sum(day_of_week_breakdown.values())
         weeks_in_period = ((end_date - start_date).days // 7) if start_date and end_date else 1
         weeks_in_period = max(weeks_in_period, 1)  # Avoid division by zero
         avg_per_week = total_workouts / weeks_in_period
 
-        return {
-            'current_streak': profile.current_streak if profile else 0,
-            'longest_streak': profile.longest_streak if profile else 0,
+        consistency = {
+            'current_streak': streaks['current_streak'],
+            'longest_streak': streaks['longest_streak'],
             'workout_calendar': workout_calendar,
             'weekly_consistency': {
                 'target_workouts_per_week': 4,  # Default target
@@ -342,12 +411,141 @@ class WorkoutAnalyticsService:
             },
             'day_of_week_breakdown': day_of_week_breakdown
         }
+        if calendar_format == 'compact':
+            del consistency['workout_calendar']
+            consistency['compact_calendar'] = compact
+        return consistency
+
+    @classmethod
+    def get_consistency(cls, user, start_date=None, end_date=None, calendar_format='full'):
+        """
+        Get consistency metrics including calendar data and day-of-week breakdown.
+        Calendar and weekday breakdown are read from the per-day rollup table.
+
+        Args:
+            user: User instance
+            start_date: Start date (date object)
+            end_date: End date (date object)
+            calendar_format: 'full' for one object per day, or 'compact' for a
+                base64 bitmap with sparse counts and points
+
+        Returns:
+            dict: Consistency data
+        """
+        # Streaks are derived from the maintained islands at read time
+        streaks = get_streaks(user.pk)
+
+        rollups = cls._get_rollup_queryset(user, start_date, end_date)
+
+        # Compact calendars come from the yearly bitmaps
+        compact = None
+        if calendar_format == 'compact' and start_date and end_date:
+            compact = compact_calendar(user.pk, start_date, end_date)
+
+        # Calendar data comes straight from the daily rollups
+        calendar_data = {}
+        if calendar_format != 'compact' and start_date and end_date:
+            calendar_data = {
+                day: (workout_count, total_points)
+                for day, workout_count, total_points in rollups.values_list(
+                    'date', 'workout_count', 'total_points'
+                )
+            }
+
+        # Day of week breakdown using database aggregation
+        day_mapping = {1: 'Sunday', 2: 'Monday', 3: 'Tuesday', 4: 'Wednesday',
+                       5: 'Thursday', 6: 'Friday', 7: 'Saturday'}
+
+        day_counts = rollups.annotate(
+            weekday=ExtractWeekDay('date')
+        ).values('weekday').annotate(count=Sum('workout_count')).order_by()
+        weekday_counts = {
+            day_mapping.get(item['weekday'], 'Unknown'): item['count'] for item in day_counts
+        }
+
+        return cls._build_consistency(
+            streaks, calendar_data, weekday_counts, start_date, end_date, calendar_format, compact
+        )
+
+    @classmethod
+    def get_dashboard(cls, user, start_date=None, end_date=None, granularity='daily',
+                      top_n=10, sections=DASHBOARD_SECTIONS):
+        """
+        Get several analytics sections in one call.
+
+        Summary, trends and consistency share a single read of the user's
+        daily rollups for the period; muscles reuse that read for the workout
+        total and add the muscle-index GROUP BY and the co-occurrence lookup;
+        records reuse get_records. The number of queries does not depend on
+        history size.
+
+        Args:
+            user: User instance
+            start_date: Start date (date object)
+            end_date: End date (date object)
+            granularity: Trends granularity ('daily', 'weekly', or 'monthly')
+            top_n: Number of top muscles to return
+            sections: Iterable of section names from DASHBOARD_SECTIONS
+
+        Returns:
+            dict: One entry per requested section
+        """
+        sections = set(sections)
+        dashboard = {}
+
+        if sections & {'summary', 'trends', 'muscles', 'consistency'}:
+            rows = cls._get_rollup_queryset(user, start_date, end_date).order_by().values_list(
+                'date', *COUNTER_FIELDS
+            )
+
+            totals = dict.fromkeys(COUNTER_FIELDS, 0)
+            # date -> (workouts, duration, points, intensity_score_sum)
+            days = {}
+            for day, *counters in rows:
+                values = dict(zip(COUNTER_FIELDS, counters))
+                for field in COUNTER_FIELDS:
+                    totals[field] += values[field]
+                days[day] = (
+                    values['workout_count'], values['total_duration'],
+                    values['total_points'], values['intensity_score_sum']
+                )
+
+            if 'summary' in sections:
+                dashboard['summary'] = cls._build_summary(totals)
+
+            if 'trends' in sections:
+                buckets = {}
+                for day, values in days.items():
+                    bucket = buckets.setdefault(cls.bucket_start(day, granularity), [0, 0, 0, 0])
+                    for i, value in enumerate(values):
+                        bucket[i] += value
+                dashboard['trends'] = cls._build_trends(buckets, start_date, end_date, granularity)
+
+            if 'muscles' in sections:
+                dashboard['muscles'] = cls._muscle_section(
+                    user, start_date, end_date, totals['workout_count'], top_n
+                )
+
+            if 'consistency' in sections:
+                streaks = get_streaks(user.pk)
+                calendar_data = {day: (values[0], values[2]) for day, values in days.items()}
+                weekday_counts = defaultdict(int)
+                for day, values in days.items():
+                    weekday_counts[cls.WEEKDAY_NAMES[day.weekday()]] += values[0]
+                dashboard['consistency'] = cls._build_consistency(
+                    streaks, calendar_data, weekday_counts, start_date, end_date
+                )
+
+        if 'records' in sections:
+            dashboard['records'] = cls.get_records(user)
+
+        return dashboard
 
     @classmethod
     def get_records(cls, user):
         """
         Get personal records and milestones.
-        Optimized to minimize database queries.
+        Records are read from the incrementally maintained PersonalRecord table.
 
         Args:
             user: User instance
@@ -355,101 +553,88 @@ class WorkoutAnalyticsService:
         Returns:
             dict: Personal records data
         """
-        workouts = WorkoutHistory.objects.filter(user=user)
-        total_count = workouts.count()
+        # Records are maintained incrementally: one indexed lookup
+        records = get_user_records(user)
 
-        if total_count == 0:
+        if not records:
             return {
                 'records': {},
                 'recent_milestones': []
             }
 
-        # Get records in optimized queries
-        longest_workout = workouts.order_by('-duration').values(
-            'id', 'duration', 'workout_date'
-        ).first()
-        
-        highest_points = workouts.order_by('-points_earned').values(
-            'id', 'points_earned', 'workout_date'
-        ).first()
-
-        # For most exercises, we need to check JSON field length
-        # Fetch only necessary fields to minimize data transfer
-        workouts_with_exercises = workouts.exclude(
-            exercises_completed__isnull=True
-        ).values('id', 'exercises_completed', 'workout_date')
-        
-        most_exercises_workout = None
-        max_exercise_count = 0
-        for workout in workouts_with_exercises:
-            exercises = workout['exercises_completed']
-            if exercises:
-                exercise_count = len(exercises) if isinstance(exercises, list) else 0
-                if exercise_count > max_exercise_count:
-                    max_exercise_count = exercise_count
-                    most_exercises_workout = workout
-
-        records = {}
-
-        if longest_workout:
-            records['longest_workout'] = {
-                'duration': longest_workout['duration'],
-                'date': longest_workout['workout_date'].strftime('%Y-%m-%d'),
-                'workout_id': longest_workout['id']
-            }
+        # Return most recent 5 milestones
+        milestones = cls.get_milestones(user)[:5]
 
-        if highest_points:
-            records['highest_points'] = {
-                'points': highest_points['points_earned'],
-                'date': highest_points['workout_date'].strftime('%Y-%m-%d'),
-                'workout_id': highest_points['id']
-            }
+        return {
+            'records': records,
+            'recent_milestones': milestones
+        }
 
-        if most_exercises_workout:
-            records['most_exercises'] = {
-                'count': max_exercise_count,
-                'date': most_exercises_workout['workout_date'].strftime('%Y-%m-%d'),
-                'workout_id': most_exercises_workout['id']
-            }
+    @classmethod
+    def get_milestones(cls, user):
+        """
+        Get every milestone the user has reached with its exact achieved date.
 
-        # Calculate milestones
-        profile = user.userprofile if hasattr(user, 'userprofile') else None
-        milestones = []
+        A single query numbers the user's workouts with ROW_NUMBER() and keeps
+        a cumulative SUM() per ladder; only the rows where a running total
+        crosses a threshold are returned, regardless of history size.
 
-        if profile:
-            # Pre-fetch milestone workout dates in bulk
-            workout_milestones = [10, 25, 50, 100, 250, 500]
-            applicable_milestones = [m for m in workout_milestones if profile.total_workouts >= m]
-            
-            if applicable_milestones:
-                max_milestone = max(applicable_milestones)
-                # Single query to get workout dates up to max milestone
-                milestone_workouts = list(workouts.order_by('workout_date').values_list(
-                    'workout_date', flat=True
-                )[:max_milestone])
-                
-                for milestone in applicable_milestones:
-                    if len(milestone_workouts) >= milestone:
+        Args:
+            user: User instance
+
+        Returns:
+            list: Milestones sorted by achieved date, most recent first
+        """
+        order = [F('workout_date').asc(), F('created_at').asc(), F('id').asc()]
+        running, previous = {}, {}
+        crossed = Q()
+
+        for name, (field, thresholds) in cls.MILESTONE_LADDERS.items():
+            if field is None:
+                running[f'{name}_running'] = Window(RowNumber(), order_by=order)
+                increment = Value(1)
+            else:
+                running[f'{name}_running'] = Window(
+                    Sum(field), order_by=order, frame=RowRange(start=None, end=0)
+                )
+                increment = F(field)
+            previous[f'{name}_before'] = F(f'{name}_running') - increment
+            for threshold in thresholds:
+                crossed |= Q(**{f'{name}_running__gte': threshold, f'{name}_before__lt': threshold})
+
+        if not crossed:
+            return []
+
+        rows = WorkoutHistory.objects.filter(user=user).annotate(**running).annotate(
+            **previous
+        ).filter(crossed).order_by(*order).values('workout_date', *running, *previous)
+
+        milestones = []
+        for row in rows:
+            for name, (_, thresholds) in cls.MILESTONE_LADDERS.items():
+                for threshold in thresholds:
+                    if row[f'{name}_before'] < threshold <= row[f'{name}_running']:
                         milestones.append({
-                            'type': 'total_workouts',
-                            'value': milestone,
-                            'achieved_date': milestone_workouts[milestone - 1].strftime('%Y-%m-%d')
+                            'type': name,
+                            'value': threshold,
+                            'achieved_date': row['workout_date'].strftime('%Y-%m-%d')
                         })
 
-            # Check for points milestones
-            points_milestones = [1000, 2500, 5000, 10000]
-            for milestone in points_milestones:
-                if profile.total_points >= milestone:
-                    milestones.append({
-                        'type': 'total_points',
-                        'value': milestone,
-                        'achieved_date': timezone.now().date().strftime('%Y-%m-%d')  # Approximate
-                    })
+        # Rows come back in crossing order, so the latest milestone is last
+        return milestones[::-1]
 
-        # Return most recent 5 milestones
-        milestones = sorted(milestones, key=lambda x: x['achieved_date'], reverse=True)[:5]
 
-        return {
-            'records': records,
-            'recent_milestones': milestones
-        }
+def get_analytics_service():
+    """
+    Get the analytics service class selected by WORKOUT_ANALYTICS_ENGINE.
+
+    Both engines expose the same classmethod interface and return identical
+    results. 'orm' (the default) reads the maintained derived tables;
+    'columnar' is an experimental opt-in that needs NumPy and silently falls
+    back to the ORM engine when it is not installed.
+    """
+    if getattr(settings, 'WORKOUT_ANALYTICS_ENGINE', 'orm') == 'columnar':
+        from .columnar import ColumnarAnalyticsService, np
+        if np is not None:
+            return ColumnarAnalyticsService
+    return WorkoutAnalyticsService
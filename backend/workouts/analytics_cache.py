@@ -0,0 +1,149 @@
+"""
+Versioned per-user cache for analytics results.
+
+Cache keys embed a per-user data version that is bumped whenever the user's
+workout history changes, so invalidation is a single cache write: old
+entries simply stop being addressed and expire on their own.
+
+That write only reaches every worker when ANALYTICS_CACHE_ALIAS is shared
+between processes (Redis, Memcached, database). With a per-process backend
+such as LocMemCache, other workers keep their own version and would serve
+stale results, so entries expire after SHARED_CACHE_LOCAL_TIMEOUT seconds
+instead of ANALYTICS_CACHE_TIMEOUT (0 disables caching). Only plain
+get/set/add are used, so any Django cache backend works.
+"""
+import hashlib
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from .shared_cache import is_shared_cache, local_timeout, shared_cache_alias
+
+
+class AnalyticsCache:
+    """Read-through cache around WorkoutAnalyticsService methods"""
+
+    KEY_PREFIX = 'analytics'
+
+    _stats_lock = threading.Lock()
+    _stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def _alias():
+        return getattr(settings, 'ANALYTICS_CACHE_ALIAS', shared_cache_alias())
+
+    @classmethod
+    def _cache(cls):
+        return caches[cls._alias()]
+
+    @classmethod
+    def is_shared(cls):
+        """True when version bumps reach every worker process"""
+        return is_shared_cache(cls._alias())
+
+    @classmethod
+    def _timeout(cls):
+        timeout = getattr(settings, 'ANALYTICS_CACHE_TIMEOUT', 60 * 60)
+        if not cls.is_shared():
+            # Other workers never see this process's bumps: bound their staleness
+            timeout = min(timeout, local_timeout())
+        return timeout
+
+    @classmethod
+    def _version_key(cls, user_id):
+        return f'{cls.KEY_PREFIX}:version:{user_id}'
+
+    @staticmethod
+    def _now_version():
+        # Microsecond timestamps: a version re-created after eviction is always
+        # newer than any version that was used before it
+        return time.time_ns() // 1000
+
+    @classmethod
+    def get_version(cls, user_id):
+        """Get the current data version for a user, initializing it if missing"""
+        cache = cls._cache()
+        key = cls._version_key(user_id)
+        version = cache.get(key)
+        if version is None:
+            version = cls._now_version()
+            if not cache.add(key, version, timeout=None):
+                version = cache.get(key, version)
+        return version
+
+    @classmethod
+    def bump_version(cls, user_id):
+        """Invalidate every cached analytics result for a user in O(1)"""
+        cache = cls._cache()
+        key = cls._version_key(user_id)
+        version = max(cls._now_version(), (cache.get(key) or 0) + 1)
+        cache.set(key, version, timeout=None)
+        return version
+
+    @classmethod
+    def make_key(cls, user_id, method, params, version=None):
+        """Build the cache key for (user, method, params, data version)"""
+        if version is None:
+            version = cls.get_version(user_id)
+        digest = hashlib.md5(repr(params).encode()).hexdigest()
+        return f'{cls.KEY_PREFIX}:{user_id}:{version}:{method}:{digest}'
+
+    @classmethod
+    def get_or_compute(cls, user, method, params, compute):
+        """
+        Return the cached result for (user, method, params) or compute and store it.
+
+        Args:
+            user: User instance
+            method: Name of the analytics method
+            params: Hashable/representable tuple of the method arguments
+            compute: Zero-argument callable producing the result on a miss
+
+        Returns:
+            The cached or freshly computed result
+        """
+        cache = cls._cache()
+        key = cls.make_key(user.pk, method, params)
+        result = cache.get(key)
+        if result is not None:
+            cls._record('hits')
+            return result
+
+        cls._record('misses')
+        result = compute()
+        cache.set(key, result, timeout=cls._timeout())
+        return result
+
+    @classmethod
+    def call(cls, func, user, *args):
+        """
+        Call an analytics service method through the cache.
+
+        Example:
+            AnalyticsCache.call(WorkoutAnalyticsService.get_summary, user, start, end)
+        """
+        params = tuple(arg.isoformat() if hasattr(arg, 'isoformat') else arg for arg in args)
+        return cls.get_or_compute(user, func.__name__, params, lambda: func(user, *args))
+
+    @classmethod
+    def _record(cls, outcome):
+        with cls._stats_lock:
+            cls._stats[outcome] += 1
+
+    @classmethod
+    def stats(cls):
+        """Get process-wide hit/miss counters"""
+        with cls._stats_lock:
+            hits, misses = cls._stats['hits'], cls._stats['misses']
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+        }
+
+    @classmethod
+    def reset_stats(cls):
+        """Reset the hit/miss counters"""
+        with cls._stats_lock:
+            cls._stats = {'hits': 0, 'misses': 0}
@@ -0,0 +1,144 @@
+"""
+Compact bitmap encoding of the workout calendar.
+
+Each user has one WorkoutCalendarYear row per year holding a 366-bit set of
+active days, flipped on workout writes when a day gains its first workout
+or loses its last one. A calendar for any range is assembled from those
+rows with big-integer shifts and returned as a base64 bitset plus sparse
+per-active-day counts and points from the daily rollups, instead of one
+object per day.
+"""
+import base64
+from datetime import date
+from django.db import transaction
+from .models import WorkoutHistory, WorkoutCalendarYear, WorkoutDailyRollup
+
+
+# 366 days fit in 46 bytes
+BITMAP_BYTES = 46
+
+
+def _day_bit(day):
+    return day.timetuple().tm_yday - 1
+
+
+def update_calendar_bitmaps(user_id, activated=(), deactivated=()):
+    """
+    Flip the bits of days that became active or inactive.
+
+    Args:
+        user_id: User primary key
+        activated: Days that gained their first workout
+        deactivated: Days that lost their last workout
+    """
+    changes = {}
+    for day in deactivated:
+        changes.setdefault(day.year, []).append((_day_bit(day), False))
+    for day in activated:
+        changes.setdefault(day.year, []).append((_day_bit(day), True))
+    if not changes:
+        return
+
+    with transaction.atomic():
+        for year, bits in changes.items():
+            if any(active for _, active in bits):
+                WorkoutCalendarYear.objects.get_or_create(
+                    user_id=user_id, year=year, defaults={'bitmap': bytes(BITMAP_BYTES)}
+                )
+            # Removals never create rows (e.g. while a user is being cascade-deleted)
+            calendar = WorkoutCalendarYear.objects.select_for_update().filter(
+                user_id=user_id, year=year
+            ).first()
+            if calendar is None:
+                continue
+
+            value = int.from_bytes(bytes(calendar.bitmap), 'little')
+            for bit, active in bits:
+                if active:
+                    value |= 1 << bit
+                else:
+                    value &= ~(1 << bit)
+            calendar.bitmap = value.to_bytes(BITMAP_BYTES, 'little')
+            calendar.save(update_fields=['bitmap', 'updated_at'])
+
+
+def rebuild_calendar_bitmaps(user=None):
+    """
+    Rebuild yearly calendar bitmaps from WorkoutHistory.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+
+    Returns:
+        int: Number of yearly bitmaps written
+    """
+    history = WorkoutHistory.objects.all()
+    calendars = WorkoutCalendarYear.objects.all()
+    if user is not None:
+        history = history.filter(user=user)
+        calendars = calendars.filter(user=user)
+
+    values = {}
+    days = history.order_by().values_list('user_id', 'workout_date').distinct()
+    for user_id, day in days.iterator():
+        key = (user_id, day.year)
+        values[key] = values.get(key, 0) | 1 << _day_bit(day)
+
+    with transaction.atomic():
+        calendars.delete()
+        WorkoutCalendarYear.objects.bulk_create(
+            [WorkoutCalendarYear(user_id=user_id, year=year, bitmap=value.to_bytes(BITMAP_BYTES, 'little'))
+             for (user_id, year), value in values.items()],
+            batch_size=1000
+        )
+    return len(values)
+
+
+def range_bitmap(user_id, start_date, end_date):
+    """
+    Get the active-day bitset for a date range as an integer.
+
+    Bit n is set when start_date + n days had a workout. A reversed range
+    is empty.
+    """
+    value = 0
+    if end_date < start_date:
+        return value
+    rows = WorkoutCalendarYear.objects.filter(
+        user_id=user_id, year__gte=start_date.year, year__lte=end_date.year
+    ).values_list('year', 'bitmap')
+    for year, bitmap in rows:
+        first = max(start_date, date(year, 1, 1))
+        last = min(end_date, date(year, 12, 31))
+        width = (last - first).days + 1
+        chunk = (int.from_bytes(bytes(bitmap), 'little') >> _day_bit(first)) & ((1 << width) - 1)
+        value |= chunk << (first - start_date).days
+    return value
+
+
+def compact_calendar(user_id, start_date, end_date):
+    """
+    Build the compact calendar for a date range.
+
+    Returns:
+        dict: start, days, base64 little-endian bitmap of active days, and
+        workout_counts / total_points with one entry per set bit, in date order
+    """
+    days = max(0, (end_date - start_date).days + 1)
+    value = range_bitmap(user_id, start_date, end_date)
+
+    rollups = WorkoutDailyRollup.objects.filter(
+        user_id=user_id, date__gte=start_date, date__lte=end_date
+    ).order_by('date').values_list('workout_count', 'total_points')
+    workout_counts, total_points = [], []
+    for workout_count, points in rollups:
+        workout_counts.append(workout_count)
+        total_points.append(points)
+
+    return {
+        'start': start_date.strftime('%Y-%m-%d'),
+        'days': days,
+        'bitmap': base64.b64encode(value.to_bytes((days + 7) // 8, 'little')).decode('ascii'),
+        'workout_counts': workout_counts,
+        'total_points': total_points,
+    }
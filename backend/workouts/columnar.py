@@ -0,0 +1,278 @@
+"""
+Experimental NumPy columnar analytics engine.
+
+Loads a user's workout history for a period into compact typed arrays (date
+ordinals, duration, points, intensity/goal/equipment codes and a muscle
+bitmask) and computes every analytics section with vectorized operations.
+Results are identical to WorkoutAnalyticsService.
+
+This is an opt-in experiment, not a faster path: the arrays are rebuilt from
+raw WorkoutHistory rows on every call, so it is slower than the default
+engine, which reads the maintained rollup, muscle-index and co-occurrence
+tables. Select it with WORKOUT_ANALYTICS_ENGINE = 'columnar' and compare the
+two engines with the benchmark_analytics command.
+
+NumPy is an optional dependency: when it is not installed
+get_analytics_service() keeps using the ORM engine.
+"""
+from datetime import date
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .analytics import WorkoutAnalyticsService, DASHBOARD_SECTIONS
+from .muscle_index import MUSCLE_VOCABULARY, MUSCLE_PAIRS, canonical_muscles, top_muscle_pairs
+from .rollups import INTENSITY_SCORES, INTENSITY_FIELDS, GOAL_FIELDS, EQUIPMENT_FIELDS
+from .streaks import get_streaks
+
+
+# Choice value -> small integer code; unknown values get the last code
+INTENSITY_CODES = {value: code for code, value in enumerate(INTENSITY_FIELDS)}
+GOAL_CODES = {value: code for code, value in enumerate(GOAL_FIELDS)}
+EQUIPMENT_CODES = {value: code for code, value in enumerate(EQUIPMENT_FIELDS)}
+
+# Bits available in the uint64 muscle bitmask
+MASK_BITS = 64
+
+# Ordinal of 1970-01-01, to convert ordinals to numpy datetime64[D]
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+class WorkoutColumns:
+    """A user's workouts for a period as parallel typed arrays"""
+
+    def __init__(self, rows, with_muscles=False):
+        """
+        Args:
+            rows: values_list rows of (workout_date, duration, points_earned,
+                intensity, goal, equipment[, muscles_targeted])
+            with_muscles: True when rows carry muscles_targeted
+        """
+        rows = list(rows)
+        self.size = len(rows)
+        columns = list(zip(*rows)) if rows else [()] * (7 if with_muscles else 6)
+
+        self.ordinals = np.fromiter((day.toordinal() for day in columns[0]), dtype=np.int32, count=self.size)
+        self.duration = np.fromiter((value or 0 for value in columns[1]), dtype=np.int64, count=self.size)
+        self.points = np.fromiter((value or 0 for value in columns[2]), dtype=np.int64, count=self.size)
+        self.intensity = self._codes(columns[3], INTENSITY_CODES)
+        self.goal = self._codes(columns[4], GOAL_CODES)
+        self.equipment = self._codes(columns[5], EQUIPMENT_CODES)
+
+        # Muscle names by bit: the fixed vocabulary first, then any other names seen
+        self.muscles = list(MUSCLE_VOCABULARY)
+        self.masks = self._muscle_masks(columns[6]) if with_muscles else None
+
+    def _codes(self, values, codes):
+        unknown = len(codes)
+        return np.fromiter((codes.get(value, unknown) for value in values), dtype=np.int8, count=self.size)
+
+    def _muscle_masks(self, muscle_lists):
+        positions = {muscle: bit for bit, muscle in enumerate(self.muscles)}
+        masks_by_list = {}
+        masks = np.zeros(self.size, dtype='<u8')
+
+        for i, muscles in enumerate(muscle_lists):
+            key = tuple(muscles) if isinstance(muscles, list) and all(
+                isinstance(muscle, str) for muscle in muscles
+            ) else None
+            mask = masks_by_list.get(key) if key is not None else None
+            if mask is None:
+                mask = 0
+                for muscle in canonical_muscles(muscles):
+                    if muscle not in positions:
+                        positions[muscle] = len(self.muscles)
+                        self.muscles.append(muscle)
+                    mask |= 1 << positions[muscle]
+                if mask >> MASK_BITS:
+                    return None
+                if key is not None:
+                    masks_by_list[key] = mask
+            masks[i] = mask
+        return masks
+
+    def muscle_matrix(self):
+        """Unpack the bitmasks into a (workouts x muscles) 0/1 matrix"""
+        bits = np.unpackbits(self.masks.view(np.uint8).reshape(-1, 8), axis=1, bitorder='little')
+        return bits[:, :len(self.muscles)]
+
+    def buckets(self, granularity):
+        """Bucket start ordinal of every workout for a trends granularity"""
+        if granularity == 'weekly':
+            # date.fromordinal(1) is a Monday
+            return self.ordinals - (self.ordinals - 1) % 7
+        if granularity == 'monthly':
+            days = (self.ordinals - EPOCH_ORDINAL).astype('datetime64[D]')
+            months = days.astype('datetime64[M]').astype('datetime64[D]')
+            return months.astype(np.int64).astype(np.int32) + EPOCH_ORDINAL
+        return self.ordinals
+
+    def group_by(self, keys):
+        """
+        Sum workouts, duration, points and intensity score per distinct key.
+
+        Returns:
+            dict: key -> (workouts, duration, points, intensity_score_sum)
+        """
+        if not self.size:
+            return {}
+        unique, inverse = np.unique(keys, return_inverse=True)
+        counts = np.bincount(inverse)
+        durations = np.bincount(inverse, weights=self.duration)
+        points = np.bincount(inverse, weights=self.points)
+        scores = np.bincount(inverse, weights=self.scores())
+        return {
+            int(key): (int(count), int(duration), int(point), float(score))
+            for key, count, duration, point, score in zip(
+                unique.tolist(), counts.tolist(), durations.tolist(), points.tolist(), scores.tolist()
+            )
+        }
+
+    def scores(self):
+        """Intensity score of every workout (unknown intensities score 1.0)"""
+        table = np.array([INTENSITY_SCORES.get(value, 1.0) for value in INTENSITY_CODES] + [1.0])
+        return table[self.intensity]
+
+
+class ColumnarAnalyticsService(WorkoutAnalyticsService):
+    """WorkoutAnalyticsService computed from columnar arrays instead of SQL aggregates"""
+
+    @classmethod
+    def load_columns(cls, user, start_date=None, end_date=None, with_muscles=False):
+        """Load the user's workouts for the period with a single query"""
+        fields = ['workout_date', 'duration', 'points_earned', 'intensity', 'goal', 'equipment']
+        if with_muscles:
+            fields.append('muscles_targeted')
+        rows = cls._get_base_queryset(user, start_date, end_date).order_by().values_list(*fields)
+        return WorkoutColumns(rows, with_muscles=with_muscles)
+
+    @staticmethod
+    def _counter_totals(codes, fields):
+        counts = np.bincount(codes, minlength=len(fields) + 1)
+        return {field: int(count) for field, count in zip(fields.values(), counts.tolist())}
+
+    @classmethod
+    def _summary_from(cls, columns):
+        totals = {
+            'workout_count': columns.size,
+            'total_duration': int(columns.duration.sum()),
+            'total_points': int(columns.points.sum()),
+            'intensity_score_sum': float(columns.scores().sum()),
+            **cls._counter_totals(columns.intensity, INTENSITY_FIELDS),
+            **cls._counter_totals(columns.goal, GOAL_FIELDS),
+            **cls._counter_totals(columns.equipment, EQUIPMENT_FIELDS),
+        }
+        return cls._build_summary(totals)
+
+    @classmethod
+    def _trends_from(cls, columns, start_date, end_date, granularity):
+        buckets = {}
+        if granularity == 'daily' or granularity in cls.TREND_TRUNCATORS:
+            buckets = {
+                date.fromordinal(ordinal): values
+                for ordinal, values in columns.group_by(columns.buckets(granularity)).items()
+            }
+        return cls._build_trends(buckets, start_date, end_date, granularity)
+
+    @classmethod
+    def _muscles_from(cls, columns, top_n):
+        muscle_counts, muscle_durations = {}, {}
+        pair_counts = [0] * len(MUSCLE_PAIRS)
+
+        if columns.size:
+            matrix = columns.muscle_matrix()
+            counts = matrix.sum(axis=0, dtype=np.int64)
+            durations = matrix.T.astype(np.int64) @ columns.duration
+            for muscle, count, duration in zip(columns.muscles, counts.tolist(), durations.tolist()):
+                if count:
+                    muscle_counts[muscle.capitalize()] = count
+                    muscle_durations[muscle.capitalize()] = duration
+
+            # Co-occurrence of vocabulary muscles; the upper triangle in
+            # row-major order matches the MUSCLE_PAIRS slot layout
+            vocabulary = matrix[:, :len(MUSCLE_VOCABULARY)].astype(np.int64)
+            cooccurrence = vocabulary.T @ vocabulary
+            pair_counts = cooccurrence[np.triu_indices(len(MUSCLE_VOCABULARY), 1)].tolist()
+
+        return {
+            'muscle_frequency': cls._build_muscle_frequency(
+                muscle_counts, muscle_durations, columns.size, top_n
+            ),
+            'muscle_pairs': top_muscle_pairs(pair_counts, columns.size, top_n)
+        }
+
+    @classmethod
+    def _consistency_from(cls, user, columns, start_date, end_date):
+        streaks = get_streaks(user.pk)
+
+        calendar_data = {}
+        if start_date and end_date:
+            calendar_data = {
+                date.fromordinal(ordinal): (workouts, points)
+                for ordinal, (workouts, _, points, _) in columns.group_by(columns.ordinals).items()
+            }
+
+        weekdays = np.bincount((columns.ordinals - 1) % 7, minlength=7)
+        weekday_counts = {
+            cls.WEEKDAY_NAMES[weekday]: count
+            for weekday, count in enumerate(weekdays.tolist()) if count
+        }
+        return cls._build_consistency(streaks, calendar_data, weekday_counts, start_date, end_date)
+
+    @classmethod
+    def get_summary(cls, user, start_date=None, end_date=None):
+        """Get summary analytics (see WorkoutAnalyticsService.get_summary)"""
+        return cls._summary_from(cls.load_columns(user, start_date, end_date))
+
+    @classmethod
+    def get_trends(cls, user, start_date=None, end_date=None, granularity='daily'):
+        """Get time-series trends (see WorkoutAnalyticsService.get_trends)"""
+        columns = cls.load_columns(user, start_date, end_date)
+        return cls._trends_from(columns, start_date, end_date, granularity)
+
+    @classmethod
+    def get_muscle_analytics(cls, user, start_date=None, end_date=None, top_n=10):
+        """Get muscle frequency and pairs (see WorkoutAnalyticsService.get_muscle_analytics)"""
+        columns = cls.load_columns(user, start_date, end_date, with_muscles=True)
+        if columns.masks is None:
+            # More distinct muscle names than bitmask bits
+            return super().get_muscle_analytics(user, start_date, end_date, top_n)
+        return cls._muscles_from(columns, top_n)
+
+    @classmethod
+    def get_consistency(cls, user, start_date=None, end_date=None, calendar_format='full'):
+        """Get consistency metrics (see WorkoutAnalyticsService.get_consistency)"""
+        if calendar_format == 'compact':
+            # Compact calendars are read from the maintained yearly bitmaps
+            return super().get_consistency(user, start_date, end_date, calendar_format)
+        columns = cls.load_columns(user, start_date, end_date)
+        return cls._consistency_from(user, columns, start_date, end_date)
+
+    @classmethod
+    def get_dashboard(cls, user, start_date=None, end_date=None, granularity='daily',
+                      top_n=10, sections=DASHBOARD_SECTIONS):
+        """Get several analytics sections from one columnar load"""
+        sections = set(sections)
+        dashboard = {}
+
+        if sections & {'summary', 'trends', 'muscles', 'consistency'}:
+            columns = cls.load_columns(user, start_date, end_date, with_muscles='muscles' in sections)
+
+            if 'summary' in sections:
+                dashboard['summary'] = cls._summary_from(columns)
+            if 'trends' in sections:
+                dashboard['trends'] = cls._trends_from(columns, start_date, end_date, granularity)
+            if 'muscles' in sections:
+                if columns.masks is None:
+                    dashboard['muscles'] = super().get_muscle_analytics(user, start_date, end_date, top_n)
+                else:
+                    dashboard['muscles'] = cls._muscles_from(columns, top_n)
+            if 'consistency' in sections:
+                dashboard['consistency'] = cls._consistency_from(user, columns, start_date, end_date)
+
+        if 'records' in sections:
+            dashboard['records'] = cls.get_records(user)
+
+        return dashboard
@@ -0,0 +1,78 @@
+"""
+Conditional GET support for the analytics actions.
+
+The ETag is derived from the user's analytics data version (bumped on every
+workout write, see AnalyticsCache) plus the request parameters and today's
+date, so a matching If-None-Match is answered with 304 Not Modified before
+any aggregation runs.
+
+The version is only the same in every worker when the analytics cache is
+shared between processes. With a per-process cache another worker could
+answer 304 for data that changed elsewhere, so no validators are sent and
+every request is answered in full.
+
+No Last-Modified is sent: a write timestamp cannot tell apart different
+parameters or relative periods that moved at midnight, so If-Modified-Since
+alone would revalidate stale results.
+"""
+import functools
+import hashlib
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import quote_etag
+from .analytics_cache import AnalyticsCache
+
+
+def analytics_etag(request, action_name):
+    """
+    Build the ETag for an analytics request.
+
+    Relative periods such as '30d' move with the calendar, so today's date is
+    part of the ETag.
+
+    Returns:
+        str: Quoted strong ETag
+    """
+    version = AnalyticsCache.get_version(request.user.pk)
+    params = sorted(
+        (key, value) for key in request.query_params for value in request.query_params.getlist(key)
+    )
+    fingerprint = repr((
+        request.user.pk,
+        version,
+        action_name,
+        params,
+        timezone.localdate().isoformat(),
+        request.META.get('HTTP_ACCEPT', ''),
+    ))
+    return quote_etag(hashlib.md5(fingerprint.encode()).hexdigest())
+
+
+def conditional_analytics(view):
+    """
+    Decorate an analytics action with ETag handling.
+
+    Example:
+        @action(detail=False, methods=['get'])
+        @conditional_analytics
+        def analytics_summary(self, request):
+            ...
+    """
+    @functools.wraps(view)
+    def wrapper(self, request, *args, **kwargs):
+        etag = analytics_etag(request, view.__name__) if AnalyticsCache.is_shared() else None
+
+        response = get_conditional_response(request, etag=etag) if etag else None
+        if response is None:
+            response = view(self, request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+        if etag:
+            response['ETag'] = etag
+        # Per-user data: clients may store it but must revalidate on every poll
+        patch_cache_control(response, private=True, no_cache=True)
+        patch_vary_headers(response, ('Authorization',))
+        return response
+
+    return wrapper
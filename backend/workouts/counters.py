@@ -0,0 +1,100 @@
+"""
+Per-user lifetime workout counters.
+
+UserStatsCounters holds one row per user with the totals achievements,
+leaderboards and the AI coach read: workout count, duration, points,
+per-intensity/goal/equipment counts and distinct active days. Every
+WorkoutHistory write applies the same deltas as the daily rollups with F()
+expressions, so concurrent writes never lose an update and readers fetch a
+single row instead of aggregating the raw history.
+
+active_days moves with the rollup days that gained their first workout or
+lost their last one.
+"""
+from django.db import transaction
+from django.db.models import Count, F
+from .models import WorkoutHistory, UserStatsCounters
+from .rollups import COUNTER_FIELDS as ROLLUP_COUNTER_FIELDS, counter_aggregates, state_deltas
+
+
+COUNTER_FIELDS = [*ROLLUP_COUNTER_FIELDS, 'active_days']
+
+
+def update_counters(previous=None, current=None, activated=(), deactivated=()):
+    """
+    Fold a workout change into its user's counters.
+
+    Args:
+        previous: workout_state() of the stored row before the write, or None on create
+        current: workout_state() after the write, or None on delete
+        activated: Days that gained their first workout (from update_rollups)
+        deactivated: Days that lost their last workout
+    """
+    deltas = {'active_days': len(activated) - len(deactivated)}
+    for state, sign in ((current, 1), (previous, -1)):
+        if state:
+            for field, delta in state_deltas(state, sign).items():
+                deltas[field] = deltas.get(field, 0) + delta
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return
+
+    user_id = (current or previous)['user_id']
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    rows = UserStatsCounters.objects.filter(user_id=user_id)
+
+    if current is None:
+        # Removals never create rows (e.g. while a user is being cascade-deleted)
+        rows.update(**updates)
+        return
+
+    with transaction.atomic():
+        if not rows.update(**updates):
+            UserStatsCounters.objects.get_or_create(user_id=user_id)
+            rows.update(**updates)
+
+
+def get_counters(user):
+    """
+    Get a user's counters with one query.
+
+    Returns:
+        UserStatsCounters: The stored row, or an unsaved all-zero one for
+        users who never logged a workout
+    """
+    return UserStatsCounters.objects.filter(user=user).first() or UserStatsCounters(user=user)
+
+
+def rebuild_counters(user=None, batch_size=1000):
+    """
+    Rebuild counters from scratch with a single grouped aggregate.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+        batch_size: Rows per bulk_create batch
+
+    Returns:
+        int: Number of counter rows written
+    """
+    history = WorkoutHistory.objects.all()
+    counters = UserStatsCounters.objects.all()
+    if user is not None:
+        history = history.filter(user=user)
+        counters = counters.filter(user=user)
+
+    aggregates = counter_aggregates()
+    aggregates['active_days'] = Count('workout_date', distinct=True)
+
+    grouped = history.order_by().values('user_id').annotate(**aggregates)
+
+    with transaction.atomic():
+        counters.delete()
+        objs = [
+            UserStatsCounters(
+                user_id=row['user_id'],
+                **{field: row[field] or 0 for field in COUNTER_FIELDS}
+            )
+            for row in grouped
+        ]
+        UserStatsCounters.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
@@ -0,0 +1,91 @@
+"""
+Process-wide in-memory snapshot of the exercise catalog.
+
+The catalog is loaded with a single query the first time a workout is
+generated, then indexed by (equipment tier, primary muscle) together with
+per-tier compound exercise lists, so workout generation runs no queries on
+the hot path. Exercise save/delete signals drop the snapshot and bump a
+version stamp in SHARED_CACHE_ALIAS, which reaches every other process only
+when that cache is shared between them; with a per-process cache, snapshots
+are reloaded after SHARED_CACHE_LOCAL_TIMEOUT seconds (see shared_cache).
+
+Bulk writes that bypass signals (QuerySet.update, bulk_create) must call
+invalidate_exercise_catalog() themselves.
+"""
+from types import MappingProxyType
+from exercises.models import Exercise
+from .shared_cache import SharedSnapshot
+
+
+# Equipment the user has -> exercise equipment available to them (None = everything)
+EQUIPMENT_TIERS = {
+    'bodyweight': ('bodyweight',),
+    'home': ('bodyweight', 'dumbbells', 'resistance_band', 'kettlebell'),
+    'gym': None,
+}
+DEFAULT_TIER = 'gym'
+
+CATALOG_VERSION_KEY = 'exercise_catalog:version'
+
+
+def equipment_tier(equipment):
+    """Map a workout equipment choice to its EQUIPMENT_TIERS key"""
+    return equipment if equipment in EQUIPMENT_TIERS else DEFAULT_TIER
+
+
+def is_compound(exercise):
+    """Compound exercises work secondary muscles as well"""
+    return isinstance(exercise.secondary_muscles, list) and len(exercise.secondary_muscles) > 0
+
+
+class ExerciseCatalog:
+    """Immutable, indexed snapshot of every Exercise"""
+
+    def __init__(self, exercises, version):
+        self.version = version
+        self.exercises = tuple(exercises)
+        self.by_id = MappingProxyType({exercise.id: exercise for exercise in self.exercises})
+
+        by_tier_muscle = {}
+        compound = {}
+        for tier, allowed in EQUIPMENT_TIERS.items():
+            available = [
+                exercise for exercise in self.exercises
+                if allowed is None or exercise.equipment in allowed
+            ]
+            for exercise in available:
+                by_tier_muscle.setdefault((tier, exercise.primary_muscle), []).append(exercise)
+            compound[tier] = tuple(exercise for exercise in available if is_compound(exercise))
+
+        self._by_tier_muscle = MappingProxyType(
+            {key: tuple(exercises) for key, exercises in by_tier_muscle.items()}
+        )
+        self._compound = MappingProxyType(compound)
+
+    def for_muscle(self, equipment, muscle):
+        """Exercises for a normalized primary muscle available with the given equipment"""
+        return self._by_tier_muscle.get((equipment_tier(equipment), muscle), ())
+
+    def compound(self, equipment):
+        """Compound exercises available with the given equipment"""
+        return self._compound[equipment_tier(equipment)]
+
+
+_catalog = SharedSnapshot(
+    CATALOG_VERSION_KEY, lambda version: ExerciseCatalog(Exercise.objects.all(), version)
+)
+
+
+def get_exercise_catalog():
+    """
+    Get the current catalog snapshot, loading it with one query if needed.
+
+    Returns:
+        ExerciseCatalog: Snapshot shared by every thread of the process
+    """
+    return _catalog.get()
+
+
+def invalidate_exercise_catalog():
+    """Drop the snapshot in this process and mark it stale for all others"""
+    _catalog.invalidate()
@@ -0,0 +1,209 @@
+"""
+Duration-fitting exercise selection.
+
+Each exercise's time cost follows the prescription WorkoutGenerator gives
+it: sets x (reps x SECONDS_PER_REP + rest). Selection is a greedy scored
+knapsack over the requested duration: every candidate gets a randomly
+jittered score (lower for compound fillers) and candidates are taken by
+score per second of cost while they fit the budget, after one pass that
+gives each targeted muscle its best exercise. Time left over is spent on
+extra sets, up to each exercise's sets_max.
+
+Per-pool cost inputs are precomputed once per catalog snapshot. With NumPy
+the scoring and top-k preselection are vectorized, so a selection touches
+only a handful of candidates in Python even on catalogs of 10k exercises.
+Without NumPy the same algorithm runs on lists (seeded plans are then
+reproducible but differ from the NumPy ones).
+"""
+import heapq
+import threading
+import weakref
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+from .exercise_catalog import equipment_tier
+
+
+# Average time under tension per rep
+SECONDS_PER_REP = 3
+
+# Most exercises per targeted muscle, and compound exercises added as fillers
+MAX_PER_MUSCLE = 3
+MAX_FILLERS = 3
+
+# Score weight of compound fillers relative to targeted-muscle exercises
+FILLER_WEIGHT = 0.5
+
+# Scores are jittered uniformly in [JITTER_MIN, 1) so plans vary between calls
+JITTER_MIN = 0.5
+
+
+class CandidatePool:
+    """Exercises of one (tier, muscle) or compound pool with their cost inputs"""
+
+    def __init__(self, exercises):
+        self.exercises = tuple(exercises)
+        self.size = len(self.exercises)
+        self.positions = {exercise.id: i for i, exercise in enumerate(self.exercises)}
+        sets = [exercise.sets_min for exercise in self.exercises]
+        rest = [exercise.rest_seconds for exercise in self.exercises]
+        if np is not None:
+            self.sets = np.array(sets, dtype=np.float64)
+            self.rest = np.array(rest, dtype=np.float64)
+        else:
+            self.sets, self.rest = sets, rest
+
+    def top(self, k, weight, prescription, random_state, recent=None):
+        """
+        Score every exercise and keep the k best by score per second.
+
+        recent maps exercise ids to extra score multipliers (recently used
+        exercises); only those few entries are touched.
+
+        Returns:
+            list: (ratio, cost_seconds, exercise) best first
+        """
+        if not self.size or k <= 0:
+            return []
+        sets_multiplier, rest_multiplier, reps = prescription
+
+        if np is not None:
+            sets = np.maximum(1, np.floor(self.sets * sets_multiplier))
+            costs = sets * (reps * SECONDS_PER_REP + np.floor(self.rest * rest_multiplier))
+            ratios = weight * random_state.uniform(JITTER_MIN, 1.0, self.size) / costs
+            for exercise_id, multiplier in (recent or {}).items():
+                position = self.positions.get(exercise_id)
+                if position is not None:
+                    ratios[position] *= multiplier
+            if self.size > k:
+                best = np.argpartition(-ratios, k - 1)[:k]
+                best = best[np.argsort(-ratios[best], kind='stable')]
+            else:
+                best = np.argsort(-ratios, kind='stable')
+            return [(ratios[i], costs[i], self.exercises[i]) for i in best.tolist()]
+
+        costs = [
+            max(1, int(sets * sets_multiplier)) * (reps * SECONDS_PER_REP + int(rest * rest_multiplier))
+            for sets, rest in zip(self.sets, self.rest)
+        ]
+        ratios = [weight * random_state.uniform(JITTER_MIN, 1.0) / cost for cost in costs]
+        for exercise_id, multiplier in (recent or {}).items():
+            position = self.positions.get(exercise_id)
+            if position is not None:
+                ratios[position] *= multiplier
+        best = heapq.nlargest(k, range(self.size), key=ratios.__getitem__)
+        return [(ratios[i], costs[i], self.exercises[i]) for i in best]
+
+
+_pools = weakref.WeakKeyDictionary()
+_pools_lock = threading.Lock()
+
+
+def _catalog_pools(catalog):
+    with _pools_lock:
+        pools = _pools.get(catalog)
+        if pools is None:
+            pools = _pools[catalog] = {}
+        return pools
+
+
+def candidate_pool(catalog, equipment, muscle=None):
+    """Cached CandidatePool of a muscle (or of compound exercises when muscle is None)"""
+    key = (equipment_tier(equipment), muscle)
+    pools = _catalog_pools(catalog)
+    pool = pools.get(key)
+    if pool is None:
+        exercises = catalog.compound(equipment) if muscle is None else catalog.for_muscle(equipment, muscle)
+        pool = pools.setdefault(key, CandidatePool(exercises))
+    return pool
+
+
+def select_exercises(catalog, muscles, equipment, budget_seconds, prescription, rng, recent=None):
+    """
+    Pick exercises for normalized muscles that fit a time budget.
+
+    Args:
+        catalog: ExerciseCatalog snapshot
+        muscles: Normalized primary muscles, in plan order
+        equipment: Workout equipment choice
+        budget_seconds: Working time available
+        prescription: (sets multiplier, rest multiplier, reps per set)
+        rng: random.Random driving the score jitter
+        recent: Optional exercise id -> score multiplier for recently used exercises
+
+    Returns:
+        list: (exercise, sets, cost_seconds) in plan order; never empty when
+            any candidate exists (the best one is kept even if it overruns)
+    """
+    random_state = np.random.default_rng(rng.getrandbits(64)) if np is not None else rng
+    muscles = list(dict.fromkeys(muscles))
+
+    # Preselect the few best candidates of every group: (group, ratio, cost, exercise)
+    groups = [
+        [(group, *candidate) for candidate in candidate_pool(catalog, equipment, muscle).top(
+            MAX_PER_MUSCLE, 1.0, prescription, random_state, recent
+        )]
+        for group, muscle in enumerate(muscles)
+    ]
+    fillers = [
+        (len(muscles), *candidate) for candidate in candidate_pool(catalog, equipment).top(
+            MAX_FILLERS + MAX_PER_MUSCLE * len(muscles), FILLER_WEIGHT, prescription, random_state, recent
+        )
+    ]
+
+    selected = {}
+    remaining = budget_seconds
+
+    def take(candidate):
+        nonlocal remaining
+        group, _, cost, exercise = candidate
+        selected[exercise.id] = (group, len(selected), exercise, float(cost))
+        remaining -= cost
+
+    # Coverage: the best fitting exercise of each targeted muscle
+    for candidates in groups:
+        fitting = next((candidate for candidate in candidates if candidate[2] <= remaining), None)
+        if fitting is not None:
+            take(fitting)
+
+    # Greedy fill by score per second, targeted muscles before fillers
+    filler_count = 0
+    for candidate in sorted((c for group in groups for c in group), key=lambda c: -c[1]) + fillers:
+        group, _, cost, exercise = candidate
+        if exercise.id in selected or cost > remaining:
+            continue
+        if group == len(muscles):
+            if filler_count >= MAX_FILLERS:
+                break
+            filler_count += 1
+        take(candidate)
+
+    if not selected:
+        best = next((candidates[0] for candidates in groups if candidates), None) or (fillers[0] if fillers else None)
+        if best is None:
+            return []
+        take(best)
+
+    # Spend leftover time on extra sets, one per exercise per round, up to sets_max
+    sets_multiplier, rest_multiplier, reps = prescription
+    plan = []
+    for _, _, exercise, _ in sorted(selected.values(), key=lambda item: item[:2]):
+        sets = max(1, int(exercise.sets_min * sets_multiplier))
+        plan.append([
+            exercise, sets,
+            max(sets, int(exercise.sets_max * sets_multiplier)),
+            reps * SECONDS_PER_REP + int(exercise.rest_seconds * rest_multiplier),
+        ])
+    added = True
+    while added:
+        added = False
+        for item in plan:
+            if item[1] < item[2] and item[3] <= remaining:
+                item[1] += 1
+                remaining -= item[3]
+                added = True
+
+    return [(exercise, sets, sets * set_cost) for exercise, sets, _, set_cost in plan]
@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from workouts.muscle_index import rebuild_muscle_index
+
+
+class Command(BaseCommand):
+    help = 'Populate the normalized WorkoutMuscle index from existing WorkoutHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only backfill the index for this username'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Rows per bulk insert (default: 1000)'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Backfilling workout muscle index...')
+        count = rebuild_muscle_index(user=user, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {count} workout muscle rows')
+        )
@@ -0,0 +1,133 @@
+import random
+import time
+from datetime import timedelta
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from workouts.analytics import WorkoutAnalyticsService
+from workouts.columnar import ColumnarAnalyticsService, np
+from workouts.models import WorkoutHistory
+from workouts.muscle_index import MUSCLE_VOCABULARY, rebuild_muscle_index
+from workouts.records import rebuild_records
+from workouts.rollups import rebuild_rollups, INTENSITY_FIELDS, GOAL_FIELDS, EQUIPMENT_FIELDS
+
+
+# (label, service method, extra arguments after user, start, end; None for user only)
+BENCHMARKS = [
+    ('summary', 'get_summary', ()),
+    ('trends daily', 'get_trends', ('daily',)),
+    ('trends weekly', 'get_trends', ('weekly',)),
+    ('trends monthly', 'get_trends', ('monthly',)),
+    ('muscles', 'get_muscle_analytics', (10,)),
+    ('consistency', 'get_consistency', ()),
+    ('records', 'get_records', None),
+    ('dashboard', 'get_dashboard', ('weekly', 10)),
+]
+
+
+class Command(BaseCommand):
+    help = 'Compare the ORM and NumPy columnar analytics engines on synthetic histories'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[1000, 10000, 100000],
+            help='Workout history sizes to benchmark (default: 1000 10000 100000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=3,
+            help='Runs per measurement; the fastest is reported (default: 3)'
+        )
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=3 * 365,
+            help='Spread synthetic workouts over this many days (default: 1095)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic history (default: 42)'
+        )
+
+    def handle(self, *args, **options):
+        if np is None:
+            raise CommandError('NumPy is not installed; the columnar engine is unavailable')
+
+        for size in options['sizes']:
+            # Synthetic data never outlives the benchmark
+            with transaction.atomic():
+                user = self._create_history(size, options['days'], options['seed'])
+                self._report(user, size, options['days'], options['repeat'])
+                transaction.set_rollback(True)
+
+    def _create_history(self, size, days, seed):
+        rng = random.Random(seed)
+        user = User.objects.create_user(username=f'benchmark-{size}-{seed}')
+        today = timezone.now().date()
+
+        workouts = [
+            WorkoutHistory(
+                user=user,
+                muscles_targeted=rng.sample(MUSCLE_VOCABULARY, rng.randint(1, 3)),
+                duration=rng.randint(15, 90),
+                intensity=rng.choice(list(INTENSITY_FIELDS)),
+                goal=rng.choice(list(GOAL_FIELDS)),
+                equipment=rng.choice(list(EQUIPMENT_FIELDS)),
+                exercises_completed=[],
+                points_earned=rng.randint(50, 300),
+            )
+            for _ in range(size)
+        ]
+        WorkoutHistory.objects.bulk_create(workouts, batch_size=2000)
+
+        # workout_date is auto_now_add: spread the history with one UPDATE per day
+        ids = list(WorkoutHistory.objects.filter(user=user).values_list('id', flat=True))
+        by_day = {}
+        for workout_id in ids:
+            by_day.setdefault(rng.randrange(days), []).append(workout_id)
+        for offset, day_ids in by_day.items():
+            WorkoutHistory.objects.filter(id__in=day_ids).update(workout_date=today - timedelta(days=offset))
+
+        # bulk_create bypasses signals, so build the derived tables directly
+        rebuild_rollups(user=user)
+        rebuild_muscle_index(user=user)
+        rebuild_records(user=user)
+        return user
+
+    def _measure(self, func, args, repeat):
+        best, queries = None, 0
+        for _ in range(repeat):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                func(*args)
+                elapsed = time.perf_counter() - started
+            queries = len(captured)
+            best = elapsed if best is None else min(best, elapsed)
+        return best * 1000, queries
+
+    def _report(self, user, size, days, repeat):
+        end_date = timezone.now().date()
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} workouts over {days} days'))
+        self.stdout.write(f"{'section':<16}{'range':<8}{'orm ms':>10}{'q':>4}{'columnar ms':>14}{'q':>4}{'speedup':>9}")
+
+        for period, start_date in (('all', None), ('90d', end_date - timedelta(days=90))):
+            for label, method, extra in BENCHMARKS:
+                # Records ignore the period
+                args = (user,) if extra is None else (user, start_date, end_date, *extra)
+                orm_ms, orm_queries = self._measure(getattr(WorkoutAnalyticsService, method), args, repeat)
+                columnar_ms, columnar_queries = self._measure(
+                    getattr(ColumnarAnalyticsService, method), args, repeat
+                )
+                speedup = orm_ms / columnar_ms if columnar_ms else 0
+                self.stdout.write(
+                    f'{label:<16}{period:<8}{orm_ms:>10.1f}{orm_queries:>4}'
+                    f'{columnar_ms:>14.1f}{columnar_queries:>4}{speedup:>8.1f}x'
+                )
@@ -0,0 +1,188 @@
+import json
+import random
+import time
+from itertools import product
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from exercises.models import Exercise
+from workouts.exercise_catalog import EQUIPMENT_TIERS, get_exercise_catalog, invalidate_exercise_catalog
+from workouts.workout_generator import WorkoutGenerator
+
+
+INTENSITIES = ('light', 'moderate', 'intense')
+GOALS = ('strength', 'hypertrophy', 'endurance')
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    rank = max(1, -(-len(ordered) * q // 100))
+    return ordered[int(rank) - 1]
+
+
+class Command(BaseCommand):
+    help = 'Benchmark workout generation on synthetic exercise catalogs'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--sizes',
+            type=int,
+            nargs='+',
+            default=[36, 1000, 10000],
+            help='Exercise catalog sizes to benchmark (default: 36 1000 10000)'
+        )
+        parser.add_argument(
+            '--repeat',
+            type=int,
+            default=20,
+            help='Generations per tier/intensity/goal combination (default: 20)'
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            default=42,
+            help='Random seed for the synthetic catalogs and requests (default: 42)'
+        )
+        parser.add_argument(
+            '--max-p95-ms',
+            type=float,
+            help='Fail when any combination has a p95 latency above this'
+        )
+        parser.add_argument(
+            '--max-queries',
+            type=int,
+            default=0,
+            help='Fail when a warm generation runs more queries than this (default: 0)'
+        )
+        parser.add_argument(
+            '--baseline',
+            help='JSON results of an earlier run to compare p95 latencies against'
+        )
+        parser.add_argument(
+            '--tolerance',
+            type=float,
+            default=25.0,
+            help='Allowed p95 slowdown against --baseline, in percent (default: 25)'
+        )
+        parser.add_argument(
+            '--save',
+            help='Write the results as JSON to this path (usable as a later --baseline)'
+        )
+
+    def handle(self, *args, **options):
+        if options['repeat'] < 1:
+            raise CommandError('--repeat must be at least 1')
+
+        baseline = {}
+        if options['baseline']:
+            try:
+                with open(options['baseline']) as baseline_file:
+                    baseline = json.load(baseline_file)
+            except (OSError, ValueError) as error:
+                raise CommandError(f"Cannot read baseline '{options['baseline']}': {error}")
+
+        results = {}
+        for size in options['sizes']:
+            # Synthetic catalogs never outlive the benchmark
+            with transaction.atomic():
+                self._create_catalog(size, options['seed'])
+                results.update(self._run(size, options['repeat'], options['seed']))
+                transaction.set_rollback(True)
+            invalidate_exercise_catalog()
+
+        if options['save']:
+            with open(options['save'], 'w') as results_file:
+                json.dump(results, results_file, indent=2, sort_keys=True)
+
+        failures = self._check(results, baseline, options)
+        if failures:
+            for failure in failures:
+                self.stderr.write(failure)
+            raise CommandError(f'{len(failures)} benchmark threshold(s) exceeded')
+        self.stdout.write(self.style.SUCCESS('All generation benchmarks within thresholds'))
+
+    def _create_catalog(self, size, seed):
+        rng = random.Random(seed)
+        muscles = [value for value, _ in Exercise.MUSCLE_GROUP_CHOICES]
+        equipment = [value for value, _ in Exercise.EQUIPMENT_CHOICES]
+        difficulties = [value for value, _ in Exercise.DIFFICULTY_CHOICES]
+
+        Exercise.objects.all().delete()
+        exercises = []
+        for i in range(size):
+            primary = rng.choice(muscles)
+            secondary = rng.sample([m for m in muscles if m != primary], rng.choice((0, 0, 1, 2)))
+            sets_min = rng.randint(2, 4)
+            exercises.append(Exercise(
+                name=f'Benchmark exercise {i}',
+                primary_muscle=primary,
+                secondary_muscles=secondary,
+                equipment=rng.choice(equipment),
+                difficulty=rng.choice(difficulties),
+                sets_min=sets_min,
+                sets_max=sets_min + rng.randint(0, 2),
+                rest_seconds=rng.choice((30, 45, 60, 90, 120)),
+                description='Synthetic benchmark exercise',
+                instructions=['Step one', 'Step two'],
+                tips=['Keep form strict'],
+            ))
+        Exercise.objects.bulk_create(exercises, batch_size=2000)
+        # bulk_create bypasses the catalog invalidation signal
+        invalidate_exercise_catalog()
+
+    def _run(self, size, repeat, seed):
+        rng = random.Random(seed)
+        muscles = [value for value, _ in Exercise.MUSCLE_GROUP_CHOICES]
+        generator = WorkoutGenerator()
+
+        # Load the snapshot (one query) and its selection pools outside the measurements
+        catalog = get_exercise_catalog()
+        for tier in EQUIPMENT_TIERS:
+            generator.generate_workout(muscles, 60, 'moderate', 'strength', tier, catalog=catalog)
+        sample = catalog.exercises[:min(len(catalog.exercises), 200)]
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{size} exercises'))
+        self.stdout.write(f"{'tier':<12}{'intensity':<10}{'goal':<13}{'p50 ms':>9}{'p95 ms':>9}{'queries':>9}{'build us':>10}")
+
+        results = {}
+        for tier, intensity, goal in product(EQUIPMENT_TIERS, INTENSITIES, GOALS):
+            timings, queries = [], 0
+            for _ in range(repeat):
+                request = rng.sample(muscles, rng.randint(1, 3)), rng.choice((20, 30, 45, 60, 90))
+                with CaptureQueriesContext(connection) as captured:
+                    started = time.perf_counter()
+                    generator.generate_workout(request[0], request[1], intensity, goal, tier)
+                    timings.append((time.perf_counter() - started) * 1000)
+                queries = max(queries, len(captured))
+
+            # _build_exercise_data on its own, per exercise
+            started = time.perf_counter()
+            for exercise in sample:
+                generator._build_exercise_data(exercise, intensity, goal, 0)
+            build_us = (time.perf_counter() - started) * 1e6 / max(1, len(sample))
+
+            p50, p95 = percentile(timings, 50), percentile(timings, 95)
+            results[f'{size}/{tier}/{intensity}/{goal}'] = {
+                'p50_ms': round(p50, 4), 'p95_ms': round(p95, 4),
+                'queries': queries, 'build_us': round(build_us, 2),
+            }
+            self.stdout.write(
+                f'{tier:<12}{intensity:<10}{goal:<13}{p50:>9.3f}{p95:>9.3f}{queries:>9}{build_us:>10.1f}'
+            )
+        return results
+
+    def _check(self, results, baseline, options):
+        failures = []
+        tolerance = 1 + options['tolerance'] / 100
+        for key, result in results.items():
+            if options['max_p95_ms'] is not None and result['p95_ms'] > options['max_p95_ms']:
+                failures.append(f"{key}: p95 {result['p95_ms']:.3f} ms > {options['max_p95_ms']} ms")
+            if result['queries'] > options['max_queries']:
+                failures.append(f"{key}: {result['queries']} queries > {options['max_queries']}")
+            previous = baseline.get(key)
+            if previous and result['p95_ms'] > previous['p95_ms'] * tolerance:
+                failures.append(
+                    f"{key}: p95 {result['p95_ms']:.3f} ms regressed from {previous['p95_ms']:.3f} ms"
+                )
+        return failures
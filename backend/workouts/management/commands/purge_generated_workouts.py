@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand, CommandError
+from workouts.retention import DEFAULT_BATCH_SIZE, purge_generated_workouts
+
+
+class Command(BaseCommand):
+    help = 'Delete generated workout plans past their retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            help='Rows deleted per statement'
+        )
+        parser.add_argument(
+            '--sleep',
+            type=float,
+            default=0,
+            help='Seconds to pause between batches'
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Only report how many plans would be deleted'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be at least 1')
+
+        dry_run = options['dry_run']
+        self.stdout.write('Counting expired generated workouts...' if dry_run else 'Purging generated workouts...')
+        counts = purge_generated_workouts(
+            batch_size=options['batch_size'],
+            dry_run=dry_run,
+            pause=options['sleep']
+        )
+
+        if not counts:
+            self.stdout.write('No retention policies are enabled')
+            return
+        verb = 'Would delete' if dry_run else 'Deleted'
+        for policy, count in counts.items():
+            self.stdout.write(self.style.SUCCESS(f'{verb} {count} {policy} plans'))
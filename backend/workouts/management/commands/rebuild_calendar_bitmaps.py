@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from workouts.calendar_bitmap import rebuild_calendar_bitmaps
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the yearly workout calendar bitmaps from WorkoutHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild calendars for this username'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Rebuilding workout calendar bitmaps...')
+        count = rebuild_calendar_bitmaps(user=user)
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {count} yearly calendar bitmaps')
+        )
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from workouts.records import rebuild_records
+
+
+class Command(BaseCommand):
+    help = 'Recompute the personal records index from WorkoutHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild records for this username'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Rebuilding personal records...')
+        count = rebuild_records(user=user)
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt personal records for {count} users')
+        )
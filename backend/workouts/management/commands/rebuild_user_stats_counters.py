@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from workouts.counters import rebuild_counters
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per-user lifetime workout counters from WorkoutHistory'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild counters for this username'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Rebuilding user stats counters...')
+        count = rebuild_counters(user=user)
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {count} user stats counter rows')
+        )
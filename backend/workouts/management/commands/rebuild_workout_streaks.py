@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.contrib.auth.models import User
+from workouts.streaks import rebuild_streaks
+
+
+class Command(BaseCommand):
+    help = 'Rebuild streak islands from WorkoutHistory and sync profile streaks'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--user',
+            help='Only rebuild streaks for this username'
+        )
+
+    def handle(self, *args, **options):
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User '{options['user']}' does not exist")
+
+        self.stdout.write('Rebuilding workout streaks...')
+        count = rebuild_streaks(user=user)
+        self.stdout.write(
+            self.style.SUCCESS(f'Wrote {count} streak islands')
+        )
@@ -0,0 +1,77 @@
+# Generated by Django 5.0.1 on 2026-10-17 05:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_rollups(apps, schema_editor):
+    """Aggregate existing workout history into daily rollups"""
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    WorkoutDailyRollup = apps.get_model('workouts', 'WorkoutDailyRollup')
+    scores = {'light': 1.0, 'moderate': 1.5, 'intense': 2.0}
+    counters = {
+        'light', 'moderate', 'intense',
+        'strength', 'hypertrophy', 'endurance',
+        'bodyweight', 'home', 'gym',
+    }
+
+    rollups = {}
+    rows = WorkoutHistory.objects.values_list(
+        'user_id', 'workout_date', 'duration', 'points_earned', 'intensity', 'goal', 'equipment'
+    )
+    for user_id, day, duration, points, intensity, goal, equipment in rows.iterator():
+        rollup = rollups.get((user_id, day))
+        if rollup is None:
+            rollup = rollups[(user_id, day)] = WorkoutDailyRollup(user_id=user_id, date=day)
+        rollup.workout_count += 1
+        rollup.total_duration += duration or 0
+        rollup.total_points += points or 0
+        rollup.intensity_score_sum += scores.get(intensity, 1.0)
+        for value in (intensity, goal, equipment):
+            if value in counters:
+                field = f'{value}_count'
+                setattr(rollup, field, getattr(rollup, field) + 1)
+
+    WorkoutDailyRollup.objects.bulk_create(rollups.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0003_workoutprogram_userprogramenrollment_programday_and_more'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('workout_count', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0)),
+                ('total_points', models.IntegerField(default=0)),
+                ('intensity_score_sum', models.FloatField(default=0)),
+                ('light_count', models.IntegerField(default=0)),
+                ('moderate_count', models.IntegerField(default=0)),
+                ('intense_count', models.IntegerField(default=0)),
+                ('strength_count', models.IntegerField(default=0)),
+                ('hypertrophy_count', models.IntegerField(default=0)),
+                ('endurance_count', models.IntegerField(default=0)),
+                ('bodyweight_count', models.IntegerField(default=0)),
+                ('home_count', models.IntegerField(default=0)),
+                ('gym_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_rollups', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'date'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workoutdailyrollup',
+            constraint=models.UniqueConstraint(fields=('user', 'date'), name='unique_user_daily_rollup'),
+        ),
+        migrations.RunPython(populate_rollups, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:03
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of the muscle normalization at the time of this migration
+MUSCLE_NAME_MAP = {
+    'quadriceps': 'quads',
+    'core': 'abs',
+    'abdominals': 'abs',
+    'traps': 'back',
+    'trapezius': 'back',
+    'forearms': 'biceps',
+    'lats': 'back',
+    'lower back': 'back',
+    'lower_back': 'back',
+}
+MUSCLE_NAME_MAX_LENGTH = 30
+
+
+def canonical_muscles(muscles):
+    if not isinstance(muscles, list):
+        return []
+    seen = []
+    for muscle in muscles:
+        if not isinstance(muscle, str):
+            continue
+        name = muscle.lower().strip()
+        name = MUSCLE_NAME_MAP.get(name, name)[:MUSCLE_NAME_MAX_LENGTH].rstrip()
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def populate_muscle_index(apps, schema_editor):
+    """Index the muscles of existing workouts"""
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    WorkoutMuscle = apps.get_model('workouts', 'WorkoutMuscle')
+
+    batch = []
+    rows = WorkoutHistory.objects.order_by().values_list(
+        'id', 'user_id', 'workout_date', 'duration', 'muscles_targeted'
+    )
+    for workout_id, user_id, workout_date, duration, muscles in rows.iterator(chunk_size=1000):
+        batch.extend(
+            WorkoutMuscle(
+                workout_id=workout_id, user_id=user_id, workout_date=workout_date,
+                muscle=muscle, duration=duration or 0,
+            )
+            for muscle in canonical_muscles(muscles)
+        )
+        if len(batch) >= 1000:
+            WorkoutMuscle.objects.bulk_create(batch)
+            batch = []
+    WorkoutMuscle.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0004_workoutdailyrollup'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutMuscle',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workout_date', models.DateField()),
+                ('muscle', models.CharField(help_text='Canonical muscle name', max_length=30)),
+                ('duration', models.IntegerField(help_text='Duration of the workout in minutes')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_muscles', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='muscle_index', to='workouts.workouthistory')),
+            ],
+            options={
+                'ordering': ['-workout_date', 'muscle'],
+                'indexes': [models.Index(fields=['user', 'workout_date', 'muscle'], name='workout_muscle_user_date_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workoutmuscle',
+            constraint=models.UniqueConstraint(fields=('workout', 'muscle'), name='unique_workout_muscle'),
+        ),
+        migrations.RunPython(populate_muscle_index, migrations.RunPython.noop),
+    ]
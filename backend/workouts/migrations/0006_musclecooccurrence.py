@@ -0,0 +1,68 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:04
+
+import django.db.models.deletion
+from collections import defaultdict
+from itertools import combinations
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copy of Exercise.MUSCLE_GROUP_CHOICES at the time of this migration
+MUSCLE_VOCABULARY = [
+    'chest', 'back', 'shoulders', 'quads', 'hamstrings', 'glutes',
+    'calves', 'biceps', 'triceps', 'abs', 'obliques',
+]
+MUSCLE_POSITIONS = {muscle: i for i, muscle in enumerate(MUSCLE_VOCABULARY)}
+PAIR_SLOTS = len(MUSCLE_VOCABULARY) * (len(MUSCLE_VOCABULARY) - 1) // 2
+
+
+def pair_slot(i, j):
+    n = len(MUSCLE_VOCABULARY)
+    return i * (2 * n - i - 1) // 2 + (j - i - 1)
+
+
+def populate_cooccurrence(apps, schema_editor):
+    """Count the muscle pairs of existing workouts from the muscle index"""
+    WorkoutMuscle = apps.get_model('workouts', 'WorkoutMuscle')
+    MuscleCoOccurrence = apps.get_model('workouts', 'MuscleCoOccurrence')
+
+    workouts = defaultdict(set)
+    rows = WorkoutMuscle.objects.order_by().values_list('user_id', 'workout_id', 'muscle')
+    for user_id, workout_id, muscle in rows.iterator(chunk_size=1000):
+        if muscle in MUSCLE_POSITIONS:
+            workouts[user_id, workout_id].add(MUSCLE_POSITIONS[muscle])
+
+    pair_counts = defaultdict(lambda: [0] * PAIR_SLOTS)
+    for (user_id, _), positions in workouts.items():
+        counts = pair_counts[user_id]
+        for i, j in combinations(sorted(positions), 2):
+            counts[pair_slot(i, j)] += 1
+
+    MuscleCoOccurrence.objects.bulk_create(
+        [MuscleCoOccurrence(user_id=user_id, pair_counts=counts) for user_id, counts in pair_counts.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0005_workoutmuscle'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MuscleCoOccurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('pair_counts', models.JSONField(default=list, help_text='Flattened upper-triangular pair counts')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='muscle_cooccurrence', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Muscle co-occurrences',
+            },
+        ),
+        migrations.RunPython(populate_cooccurrence, migrations.RunPython.noop),
+    ]
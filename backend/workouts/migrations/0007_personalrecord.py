@@ -0,0 +1,64 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_records(apps, schema_editor):
+    """Find the current holder of each record type for existing users"""
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    PersonalRecord = apps.get_model('workouts', 'PersonalRecord')
+
+    best = {}
+    rows = WorkoutHistory.objects.order_by('workout_date', 'id').values_list(
+        'id', 'user_id', 'workout_date', 'duration', 'points_earned', 'exercises_completed'
+    )
+    for workout_id, user_id, day, duration, points, exercises in rows.iterator():
+        values = {
+            'longest_workout': duration,
+            'highest_points': points,
+            'most_exercises': len(exercises) if isinstance(exercises, list) else 0,
+        }
+        for record_type, value in values.items():
+            current = best.get((user_id, record_type))
+            if record_type == 'most_exercises' and value < 1:
+                continue
+            if current is None or value > current.value:
+                best[(user_id, record_type)] = PersonalRecord(
+                    user_id=user_id, record_type=record_type, value=value,
+                    workout_id=workout_id, workout_date=day
+                )
+
+    PersonalRecord.objects.bulk_create(best.values(), batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0006_musclecooccurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PersonalRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('record_type', models.CharField(choices=[('longest_workout', 'Longest Workout'), ('highest_points', 'Highest Points'), ('most_exercises', 'Most Exercises')], max_length=30)),
+                ('value', models.IntegerField()),
+                ('workout_date', models.DateField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to=settings.AUTH_USER_MODEL)),
+                ('workout', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='personal_records', to='workouts.workouthistory')),
+            ],
+            options={
+                'ordering': ['user', 'record_type'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='personalrecord',
+            constraint=models.UniqueConstraint(fields=('user', 'record_type'), name='unique_user_record_type'),
+        ),
+        migrations.RunPython(populate_records, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,82 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:13
+
+import django.core.validators
+import django.db.models.deletion
+from datetime import timedelta
+from django.conf import settings
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def populate_streaks(apps, schema_editor):
+    """
+    Build streak islands from the distinct workout dates of existing users
+    and sync the profiles' streak fields from them.
+
+    Walks the dates in Python (a frozen copy of the rebuild, without the
+    vendor-specific SQL of workouts.streaks).
+    """
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    WorkoutStreak = apps.get_model('workouts', 'WorkoutStreak')
+    UserProfile = apps.get_model('accounts', 'UserProfile')
+
+    islands = []
+    days = WorkoutHistory.objects.order_by('user_id', 'workout_date').values_list(
+        'user_id', 'workout_date'
+    ).distinct()
+    for user_id, day in days.iterator():
+        last = islands[-1] if islands else None
+        if last and last.user_id == user_id and last.end_date + timedelta(days=1) == day:
+            last.end_date = day
+            last.length += 1
+        else:
+            islands.append(WorkoutStreak(user_id=user_id, start_date=day, end_date=day, length=1))
+
+    WorkoutStreak.objects.bulk_create(islands, batch_size=1000)
+
+    # Same rule as streaks.get_streaks: the current streak is the island
+    # containing today or yesterday, counted up to today
+    today = timezone.now().date()
+    streaks = {}
+    for island in islands:
+        current, longest, last_date = streaks.get(island.user_id, (0, 0, None))
+        if island.start_date <= today and island.end_date >= today - timedelta(days=1):
+            current = (min(island.end_date, today) - island.start_date).days + 1
+        streaks[island.user_id] = (current, max(longest, island.length), island.end_date)
+
+    for profile in UserProfile.objects.all().iterator():
+        current, longest, last_date = streaks.get(profile.user_id, (0, 0, None))
+        UserProfile.objects.filter(pk=profile.pk).update(
+            current_streak=current, longest_streak=longest, last_workout_date=last_date
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0007_personalrecord'),
+        ('accounts', '0001_initial'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutStreak',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('start_date', models.DateField()),
+                ('end_date', models.DateField()),
+                ('length', models.IntegerField(default=1, validators=[django.core.validators.MinValueValidator(1)])),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_streaks', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', '-end_date'],
+                'indexes': [models.Index(fields=['user', 'end_date'], name='workout_streak_user_end_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workoutstreak',
+            constraint=models.UniqueConstraint(fields=('user', 'start_date'), name='unique_user_streak_start'),
+        ),
+        migrations.RunPython(populate_streaks, migrations.RunPython.noop),
+    ]
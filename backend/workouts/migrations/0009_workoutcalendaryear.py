@@ -0,0 +1,52 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:15
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def populate_calendars(apps, schema_editor):
+    """Set the active-day bits of existing users' yearly calendars"""
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    WorkoutCalendarYear = apps.get_model('workouts', 'WorkoutCalendarYear')
+
+    values = {}
+    days = WorkoutHistory.objects.order_by().values_list('user_id', 'workout_date').distinct()
+    for user_id, day in days.iterator():
+        key = (user_id, day.year)
+        values[key] = values.get(key, 0) | 1 << (day.timetuple().tm_yday - 1)
+
+    WorkoutCalendarYear.objects.bulk_create(
+        [WorkoutCalendarYear(user_id=user_id, year=year, bitmap=value.to_bytes(46, 'little'))
+         for (user_id, year), value in values.items()],
+        batch_size=1000
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0008_workoutstreak'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkoutCalendarYear',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('year', models.IntegerField()),
+                ('bitmap', models.BinaryField(help_text='Little-endian bitset of active days, 46 bytes')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='workout_calendar_years', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'ordering': ['user', 'year'],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='workoutcalendaryear',
+            constraint=models.UniqueConstraint(fields=('user', 'year'), name='unique_user_calendar_year'),
+        ),
+        migrations.RunPython(populate_calendars, migrations.RunPython.noop),
+    ]
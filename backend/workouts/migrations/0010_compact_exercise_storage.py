@@ -0,0 +1,93 @@
+from django.db import migrations, models
+
+
+BATCH_SIZE = 500
+
+# Frozen copy of workouts.plan_storage at the time of this migration
+EXERCISE_KEY_ORDER = (
+    'id', 'name', 'primary_muscle', 'secondary_muscles', 'equipment', 'difficulty',
+    'sets', 'reps', 'rest_seconds', 'description', 'instructions', 'tips',
+    'image_url', 'gif_url', 'video_url',
+)
+
+
+def exercise_details(exercise):
+    return {
+        'name': exercise.name,
+        'primary_muscle': exercise.primary_muscle,
+        'secondary_muscles': exercise.secondary_muscles,
+        'equipment': exercise.equipment,
+        'difficulty': exercise.difficulty,
+        'description': exercise.description,
+        'instructions': exercise.instructions,
+        'tips': exercise.tips,
+        'image_url': exercise.image_url or '',
+        'gif_url': exercise.gif_url or '',
+        'video_url': exercise.video_url or '',
+    }
+
+
+def compact_item(item, details):
+    return {key: value for key, value in item.items() if key not in details or details[key] != value}
+
+
+def hydrate_item(item, details):
+    merged = {**details, **item}
+    ordered = {key: merged.pop(key) for key in EXERCISE_KEY_ORDER if key in merged}
+    ordered.update(merged)
+    return ordered
+
+
+def _convert(apps, convert_item):
+    Exercise = apps.get_model('exercises', 'Exercise')
+    GeneratedWorkout = apps.get_model('workouts', 'GeneratedWorkout')
+
+    details = {exercise.id: exercise_details(exercise) for exercise in Exercise.objects.all()}
+
+    def convert_plan(plan):
+        if not isinstance(plan, dict) or not isinstance(plan.get('exercises'), list):
+            return plan
+        exercises = []
+        for item in plan['exercises']:
+            known = details.get(item.get('id')) if isinstance(item, dict) else None
+            exercises.append(item if known is None else convert_item(item, known))
+        return {**plan, 'exercises': exercises}
+
+    batch = []
+    for workout in GeneratedWorkout.objects.only('id', 'workout_plan').iterator(chunk_size=BATCH_SIZE):
+        converted = convert_plan(workout.workout_plan)
+        if converted != workout.workout_plan:
+            workout.workout_plan = converted
+            batch.append(workout)
+        if len(batch) >= BATCH_SIZE:
+            GeneratedWorkout.objects.bulk_update(batch, ['workout_plan'])
+            batch = []
+    if batch:
+        GeneratedWorkout.objects.bulk_update(batch, ['workout_plan'])
+
+
+def compact_rows(apps, schema_editor):
+    """Drop catalog details that match the exercise catalog from stored generated plans"""
+    _convert(apps, compact_item)
+
+
+def hydrate_rows(apps, schema_editor):
+    """Restore full exercise details into stored generated plans"""
+    _convert(apps, hydrate_item)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0009_workoutcalendaryear'),
+        ('exercises', '0002_exercise_gif_url_exercise_image_url_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedworkout',
+            name='workout_plan',
+            field=models.JSONField(help_text='Complete workout plan with exercises (catalog details stored by reference)'),
+        ),
+        migrations.RunPython(compact_rows, hydrate_rows),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:22
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def save_existing_user_plans(apps, schema_editor):
+    """Plans stored before is_saved existed were never offered a save: keep them"""
+    GeneratedWorkout = apps.get_model('workouts', 'GeneratedWorkout')
+    GeneratedWorkout.objects.filter(user__isnull=False).update(is_saved=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0010_compact_exercise_storage'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedworkout',
+            name='is_saved',
+            field=models.BooleanField(default=False, help_text='Saved plans are kept; unsaved ones are purged after the retention period'),
+        ),
+        migrations.RunPython(save_existing_user_plans, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='generatedworkout',
+            index=models.Index(fields=['user', 'created_at'], name='workouts_ge_user_id_a56a39_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='generatedworkout',
+            index=models.Index(fields=['is_saved', 'created_at'], name='workouts_ge_is_save_add533_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:23
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0011_generatedworkout_retention'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EnrollmentDayPlan',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workout_plan', models.JSONField(help_text='Generated workout plan (catalog details stored by reference)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('enrollment', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='day_plans', to='workouts.userprogramenrollment')),
+                ('program_day', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='enrollment_plans', to='workouts.programday')),
+            ],
+            options={
+                'ordering': ['enrollment', 'program_day'],
+                'unique_together': {('enrollment', 'program_day')},
+            },
+        ),
+    ]
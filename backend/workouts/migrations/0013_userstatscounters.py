@@ -0,0 +1,80 @@
+# Generated by Django 5.0.1 on 2026-10-17 06:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Case, Count, FloatField, Q, Sum, Value, When
+
+
+INTENSITY_SCORES = {'light': 1.0, 'moderate': 1.5, 'intense': 2.0}
+
+
+def populate_counters(apps, schema_editor):
+    """Aggregate the lifetime counters of existing users with one grouped query"""
+    WorkoutHistory = apps.get_model('workouts', 'WorkoutHistory')
+    UserStatsCounters = apps.get_model('workouts', 'UserStatsCounters')
+
+    aggregates = {
+        'workout_count': Count('id'),
+        'total_duration': Sum('duration'),
+        'total_points': Sum('points_earned'),
+        'intensity_score_sum': Sum(Case(
+            *[When(intensity=key, then=Value(score)) for key, score in INTENSITY_SCORES.items()],
+            default=Value(1.0),
+            output_field=FloatField()
+        )),
+        'active_days': Count('workout_date', distinct=True),
+    }
+    for column, values in (
+        ('intensity', ('light', 'moderate', 'intense')),
+        ('goal', ('strength', 'hypertrophy', 'endurance')),
+        ('equipment', ('bodyweight', 'home', 'gym')),
+    ):
+        for value in values:
+            aggregates[f'{value}_count'] = Count('id', filter=Q(**{column: value}))
+
+    grouped = WorkoutHistory.objects.order_by().values('user_id').annotate(**aggregates)
+    UserStatsCounters.objects.bulk_create([
+        UserStatsCounters(
+            user_id=row.pop('user_id'),
+            **{field: value or 0 for field, value in row.items()}
+        )
+        for row in grouped.iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('workouts', '0012_enrollmentdayplan'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserStatsCounters',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('workout_count', models.IntegerField(default=0)),
+                ('total_duration', models.IntegerField(default=0, help_text='Total workout minutes')),
+                ('total_points', models.IntegerField(default=0)),
+                ('intensity_score_sum', models.FloatField(default=0)),
+                ('active_days', models.IntegerField(default=0, help_text='Distinct days with at least one workout')),
+                ('light_count', models.IntegerField(default=0)),
+                ('moderate_count', models.IntegerField(default=0)),
+                ('intense_count', models.IntegerField(default=0)),
+                ('strength_count', models.IntegerField(default=0)),
+                ('hypertrophy_count', models.IntegerField(default=0)),
+                ('endurance_count', models.IntegerField(default=0)),
+                ('bodyweight_count', models.IntegerField(default=0)),
+                ('home_count', models.IntegerField(default=0)),
+                ('gym_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='stats_counters', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'user stats counters',
+            },
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
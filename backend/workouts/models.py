@@ -206,6 +206,32 @@ class ProgramDayCompletion(models.Model):
         return f"{self.enrollment.user.username} completed {self.program_day}"
 
 
+class EnrollmentDayPlan(models.Model):
+    """Workout plan pre-generated for a program day without an exercise template"""
+
+    enrollment = models.ForeignKey(
+        UserProgramEnrollment,
+        on_delete=models.CASCADE,
+        related_name='day_plans'
+    )
+    program_day = models.ForeignKey(
+        ProgramDay,
+        on_delete=models.CASCADE,
+        related_name='enrollment_plans'
+    )
+    workout_plan = models.JSONField(
+        help_text="Generated workout plan (catalog details stored by reference)"
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ['enrollment', 'program_day']
+        unique_together = ['enrollment', 'program_day']
+
+    def __str__(self):
+        return f"{self.enrollment.user.username} plan for {self.program_day}"
+
+
 class WorkoutHistory(models.Model):
     """Log of completed workouts"""
 
@@ -309,14 +335,200 @@ class GeneratedWorkout(models.Model):
 
     # Generated exercises
     workout_plan = models.JSONField(
-        help_text="Complete workout plan with exercises"
+        help_text="Complete workout plan with exercises (catalog details stored by reference)"
+    )
+
+    is_saved = models.BooleanField(
+        default=False,
+        help_text="Saved plans are kept; unsaved ones are purged after the retention period"
     )
 
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
         ordering = ['-created_at']
+        indexes = [
+            # Retention purges: anonymous plans (user IS NULL) and unsaved plans by age
+            models.Index(fields=['user', 'created_at']),
+            models.Index(fields=['is_saved', 'created_at']),
+        ]
 
     def __str__(self):
         user_str = self.user.username if self.user else 'Anonymous'
         return f"{user_str} - {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class WorkoutDailyRollup(models.Model):
+    """Per-user, per-day aggregate of WorkoutHistory rows used by analytics"""
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_rollups')
+    date = models.DateField()
+
+    workout_count = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0)
+    total_points = models.IntegerField(default=0)
+    intensity_score_sum = models.FloatField(default=0)
+
+    # Intensity counts
+    light_count = models.IntegerField(default=0)
+    moderate_count = models.IntegerField(default=0)
+    intense_count = models.IntegerField(default=0)
+
+    # Goal counts
+    strength_count = models.IntegerField(default=0)
+    hypertrophy_count = models.IntegerField(default=0)
+    endurance_count = models.IntegerField(default=0)
+
+    # Equipment counts
+    bodyweight_count = models.IntegerField(default=0)
+    home_count = models.IntegerField(default=0)
+    gym_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['user', 'date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'date'], name='unique_user_daily_rollup')
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.date} ({self.workout_count} workouts)"
+
+
+class WorkoutMuscle(models.Model):
+    """Normalized (workout, muscle) index used by muscle analytics"""
+
+    workout = models.ForeignKey(WorkoutHistory, on_delete=models.CASCADE, related_name='muscle_index')
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_muscles')
+    workout_date = models.DateField()
+    muscle = models.CharField(max_length=30, help_text="Canonical muscle name")
+    duration = models.IntegerField(help_text="Duration of the workout in minutes")
+
+    class Meta:
+        ordering = ['-workout_date', 'muscle']
+        constraints = [
+            models.UniqueConstraint(fields=['workout', 'muscle'], name='unique_workout_muscle')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'workout_date', 'muscle'], name='workout_muscle_user_date_idx')
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.workout_date}: {self.muscle}"
+
+
+class MuscleCoOccurrence(models.Model):
+    """
+    Per-user muscle co-occurrence counts over Exercise.MUSCLE_GROUP_CHOICES.
+
+    pair_counts is the upper triangle (i < j) of the symmetric matrix,
+    flattened row by row into a list of integers.
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='muscle_cooccurrence')
+    pair_counts = models.JSONField(default=list, help_text="Flattened upper-triangular pair counts")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'Muscle co-occurrences'
+
+    def __str__(self):
+        return f"{self.user.username}'s muscle pairs"
+
+
+class PersonalRecord(models.Model):
+    """Current holder of each personal record type for a user"""
+
+    RECORD_TYPE_CHOICES = [
+        ('longest_workout', 'Longest Workout'),
+        ('highest_points', 'Highest Points'),
+        ('most_exercises', 'Most Exercises'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='personal_records')
+    record_type = models.CharField(max_length=30, choices=RECORD_TYPE_CHOICES)
+    value = models.IntegerField()
+    workout = models.ForeignKey(WorkoutHistory, on_delete=models.CASCADE, related_name='personal_records')
+    workout_date = models.DateField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['user', 'record_type']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'record_type'], name='unique_user_record_type')
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.record_type}: {self.value}"
+
+
+class WorkoutStreak(models.Model):
+    """A maximal run of consecutive active days (an 'island') for a user"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_streaks')
+    start_date = models.DateField()
+    end_date = models.DateField()
+    length = models.IntegerField(default=1, validators=[MinValueValidator(1)])
+
+    class Meta:
+        ordering = ['user', '-end_date']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'start_date'], name='unique_user_streak_start')
+        ]
+        indexes = [
+            models.Index(fields=['user', 'end_date'], name='workout_streak_user_end_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.start_date} to {self.end_date} ({self.length} days)"
+
+
+class WorkoutCalendarYear(models.Model):
+    """Bitset of a user's active days in one calendar year (bit n = day n + 1 of the year)"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='workout_calendar_years')
+    year = models.IntegerField()
+    bitmap = models.BinaryField(help_text="Little-endian bitset of active days, 46 bytes")
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['user', 'year']
+        constraints = [
+            models.UniqueConstraint(fields=['user', 'year'], name='unique_user_calendar_year')
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} - {self.year}"
+
+
+class UserStatsCounters(models.Model):
+    """Lifetime workout counters of a user, maintained incrementally on every workout write"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='stats_counters')
+
+    workout_count = models.IntegerField(default=0)
+    total_duration = models.IntegerField(default=0, help_text="Total workout minutes")
+    total_points = models.IntegerField(default=0)
+    intensity_score_sum = models.FloatField(default=0)
+    active_days = models.IntegerField(default=0, help_text="Distinct days with at least one workout")
+
+    # Intensity counts
+    light_count = models.IntegerField(default=0)
+    moderate_count = models.IntegerField(default=0)
+    intense_count = models.IntegerField(default=0)
+
+    # Goal counts
+    strength_count = models.IntegerField(default=0)
+    hypertrophy_count = models.IntegerField(default=0)
+    endurance_count = models.IntegerField(default=0)
+
+    # Equipment counts
+    bodyweight_count = models.IntegerField(default=0)
+    home_count = models.IntegerField(default=0)
+    gym_count = models.IntegerField(default=0)
+
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name_plural = 'user stats counters'
+
+    def __str__(self):
+        return f"{self.user.username} - {self.workout_count} workouts"
@@ -0,0 +1,238 @@
+"""
+Maintenance of the normalized WorkoutMuscle index.
+
+Each workout gets one row per canonical muscle (normalized with the same
+alias map as WorkoutGenerator), so muscle analytics become an indexed
+GROUP BY instead of parsing muscles_targeted JSON in Python.
+
+Muscle pairs are kept in a per-user co-occurrence matrix over the fixed
+Exercise.MUSCLE_GROUP_CHOICES vocabulary, stored as its flattened upper
+triangle and updated on every workout write.
+"""
+from collections import defaultdict
+from itertools import combinations
+from django.db import transaction
+from exercises.models import Exercise
+from .models import WorkoutHistory, WorkoutMuscle, MuscleCoOccurrence
+from .workout_generator import normalize_muscle_name
+
+
+# muscles_targeted is free-form JSON: longer names are truncated to fit the index column
+MUSCLE_NAME_MAX_LENGTH = WorkoutMuscle._meta.get_field('muscle').max_length
+
+# Fixed vocabulary of the co-occurrence matrix
+MUSCLE_VOCABULARY = [muscle for muscle, _ in Exercise.MUSCLE_GROUP_CHOICES]
+MUSCLE_POSITIONS = {muscle: i for i, muscle in enumerate(MUSCLE_VOCABULARY)}
+
+# Pair at each upper-triangular slot, in row-major (i < j) order
+MUSCLE_PAIRS = list(combinations(MUSCLE_VOCABULARY, 2))
+PAIR_SLOTS = len(MUSCLE_PAIRS)
+
+
+def canonical_muscles(muscles):
+    """
+    Normalize a muscles_targeted list, dropping blanks and duplicates (order
+    preserved) and truncating names to MUSCLE_NAME_MAX_LENGTH
+    """
+    if not isinstance(muscles, list):
+        return []
+    seen = []
+    for muscle in muscles:
+        if not isinstance(muscle, str):
+            continue
+        name = normalize_muscle_name(muscle)[:MUSCLE_NAME_MAX_LENGTH].rstrip()
+        if name and name not in seen:
+            seen.append(name)
+    return seen
+
+
+def _index_rows(state):
+    return [
+        WorkoutMuscle(
+            workout_id=state['id'],
+            user_id=state['user_id'],
+            workout_date=state['workout_date'],
+            muscle=muscle,
+            duration=state['duration'],
+        )
+        for muscle in canonical_muscles(state['muscles_targeted'])
+    ]
+
+
+def index_workout_muscles(current, previous=None, created=False):
+    """
+    Re-index a saved workout when its muscles, date or duration changed.
+
+    Args:
+        current: workout_state() after the write
+        previous: workout_state() before the write, if known
+        created: True when the workout was just inserted (nothing to replace)
+    """
+    if previous and all(
+        previous[field] == current[field]
+        for field in ('muscles_targeted', 'workout_date', 'duration')
+    ):
+        return
+
+    with transaction.atomic():
+        if not created:
+            WorkoutMuscle.objects.filter(workout_id=current['id']).delete()
+        WorkoutMuscle.objects.bulk_create(_index_rows(current))
+
+
+def rebuild_muscle_index(user=None, batch_size=1000):
+    """
+    Rebuild the muscle index and co-occurrence matrices from WorkoutHistory.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+        batch_size: Rows per bulk_create batch
+
+    Returns:
+        int: Number of index rows written
+    """
+    history = WorkoutHistory.objects.all()
+    index = WorkoutMuscle.objects.all()
+    if user is not None:
+        history = history.filter(user=user)
+        index = index.filter(user=user)
+
+    rows = history.order_by().values_list(
+        'id', 'user_id', 'workout_date', 'duration', 'muscles_targeted'
+    )
+
+    matrices = MuscleCoOccurrence.objects.all()
+    if user is not None:
+        matrices = matrices.filter(user=user)
+
+    written = 0
+    pair_counts = defaultdict(lambda: [0] * PAIR_SLOTS)
+    with transaction.atomic():
+        index.delete()
+        batch = []
+        for workout_id, user_id, workout_date, duration, muscles in rows.iterator(chunk_size=batch_size):
+            state = {
+                'id': workout_id,
+                'user_id': user_id,
+                'workout_date': workout_date,
+                'duration': duration,
+                'muscles_targeted': muscles,
+            }
+            batch.extend(_index_rows(state))
+            for slot in muscle_pair_slots(canonical_muscles(muscles)):
+                pair_counts[user_id][slot] += 1
+
+            if len(batch) >= batch_size:
+                WorkoutMuscle.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        WorkoutMuscle.objects.bulk_create(batch)
+        written += len(batch)
+
+        # Co-occurrence matrices are rebuilt from the same pass
+        matrices.delete()
+        MuscleCoOccurrence.objects.bulk_create(
+            [MuscleCoOccurrence(user_id=user_id, pair_counts=counts)
+             for user_id, counts in pair_counts.items()],
+            batch_size=batch_size
+        )
+    return written
+
+
+def pair_slot(i, j):
+    """Flattened upper-triangular slot for vocabulary positions i < j"""
+    n = len(MUSCLE_VOCABULARY)
+    return i * (2 * n - i - 1) // 2 + (j - i - 1)
+
+
+def muscle_pair_slots(muscles):
+    """Matrix slots of every pair among canonical muscle names (unknown names ignored)"""
+    positions = sorted({MUSCLE_POSITIONS[m] for m in muscles if m in MUSCLE_POSITIONS})
+    return [pair_slot(i, j) for i, j in combinations(positions, 2)]
+
+
+def _pair_counts_from_index(muscles):
+    """Compute pair counts from a WorkoutMuscle queryset"""
+    workouts = defaultdict(list)
+    for workout_id, muscle in muscles.order_by().values_list('workout_id', 'muscle'):
+        workouts[workout_id].append(muscle)
+
+    counts = [0] * PAIR_SLOTS
+    for workout_muscles in workouts.values():
+        for slot in muscle_pair_slots(workout_muscles):
+            counts[slot] += 1
+    return counts
+
+
+def update_cooccurrence(previous, current):
+    """
+    Apply a workout change to the user's co-occurrence matrix.
+
+    Args:
+        previous: workout_state() before the write, or None on create
+        current: workout_state() after the write, or None on delete
+    """
+    removed = muscle_pair_slots(canonical_muscles(previous['muscles_targeted'])) if previous else []
+    added = muscle_pair_slots(canonical_muscles(current['muscles_targeted'])) if current else []
+    if sorted(removed) == sorted(added):
+        return
+
+    user_id = (current or previous)['user_id']
+    with transaction.atomic():
+        created = False
+        if added:
+            _, created = MuscleCoOccurrence.objects.get_or_create(
+                user_id=user_id, defaults={'pair_counts': [0] * PAIR_SLOTS}
+            )
+        matrix = MuscleCoOccurrence.objects.select_for_update().filter(user_id=user_id).first()
+        if matrix is None:
+            return
+
+        if created or len(matrix.pair_counts) != PAIR_SLOTS:
+            # New matrix, or the vocabulary changed since it was built: recompute
+            # from the index, which already reflects this write
+            matrix.pair_counts = _pair_counts_from_index(WorkoutMuscle.objects.filter(user_id=user_id))
+        else:
+            counts = list(matrix.pair_counts)
+            for slot in removed:
+                counts[slot] = max(counts[slot] - 1, 0)
+            for slot in added:
+                counts[slot] += 1
+            matrix.pair_counts = counts
+        matrix.save(update_fields=['pair_counts', 'updated_at'])
+
+
+def get_pair_counts(user, start_date=None, end_date=None):
+    """
+    Get flattened pair counts for a user.
+
+    Open-ended ranges read the maintained matrix in constant time; ranges
+    with a start date fall back to the WorkoutMuscle index for that range.
+    """
+    if start_date is None:
+        matrix = MuscleCoOccurrence.objects.filter(user=user).values_list('pair_counts', flat=True).first()
+        if matrix is not None and len(matrix) == PAIR_SLOTS:
+            return matrix
+
+    muscles = WorkoutMuscle.objects.filter(user=user)
+    if start_date:
+        muscles = muscles.filter(workout_date__gte=start_date)
+    if end_date:
+        muscles = muscles.filter(workout_date__lte=end_date)
+    return _pair_counts_from_index(muscles)
+
+
+def top_muscle_pairs(pair_counts, total_workouts, top_n):
+    """Format the top-N most frequent muscle pairs"""
+    ranked = sorted(
+        ((count, slot) for slot, count in enumerate(pair_counts) if count > 0),
+        key=lambda item: (-item[0], item[1])
+    )
+    return [
+        {
+            'muscles': [MUSCLE_PAIRS[slot][0].capitalize(), MUSCLE_PAIRS[slot][1].capitalize()],
+            'count': count,
+            'percentage': round(count / total_workouts * 100, 1) if total_workouts > 0 else 0
+        }
+        for count, slot in ranked[:top_n]
+    ]
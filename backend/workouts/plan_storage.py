@@ -0,0 +1,102 @@
+"""
+Compact, reference-based storage of exercise lists.
+
+GeneratedWorkout.workout_plan['exercises'] stores each exercise as its
+catalog id plus the prescription (sets, reps, rest_seconds) and any
+client-specific keys. Catalog details (name, muscles, description,
+instructions, tips, media URLs, ...) are dropped on write when they match
+the catalog and hydrated back at serialization time from the in-memory
+ExerciseCatalog, so reads cost no queries.
+
+Only regenerable plans are compacted. WorkoutHistory.exercises_completed is
+a record of what was done and is stored as logged, so renaming or deleting
+an exercise never rewrites past workouts.
+"""
+
+
+# Keys copied from the Exercise row by WorkoutGenerator._build_exercise_data
+CATALOG_KEYS = (
+    'name', 'primary_muscle', 'secondary_muscles', 'equipment', 'difficulty',
+    'description', 'instructions', 'tips', 'image_url', 'gif_url', 'video_url',
+)
+
+# Key order of a hydrated exercise (the generator's output order)
+EXERCISE_KEY_ORDER = (
+    'id', 'name', 'primary_muscle', 'secondary_muscles', 'equipment', 'difficulty',
+    'sets', 'reps', 'rest_seconds', 'description', 'instructions', 'tips',
+    'image_url', 'gif_url', 'video_url',
+)
+
+
+def exercise_details(exercise):
+    """Catalog-derived details of an exercise, as the generator embeds them"""
+    return {
+        'name': exercise.name,
+        'primary_muscle': exercise.primary_muscle,
+        'secondary_muscles': exercise.secondary_muscles,
+        'equipment': exercise.equipment,
+        'difficulty': exercise.difficulty,
+        'description': exercise.description,
+        'instructions': exercise.instructions,
+        'tips': exercise.tips,
+        'image_url': exercise.image_url or '',
+        'gif_url': exercise.gif_url or '',
+        'video_url': exercise.video_url or '',
+    }
+
+
+def compact_exercises(exercises, catalog):
+    """
+    Strip catalog details from a list of exercise dicts.
+
+    A key is only dropped when its value equals the catalog's, so compaction
+    is lossless: edited values and exercises missing from the catalog are
+    kept as they are.
+    """
+    if not isinstance(exercises, list):
+        return exercises
+
+    compacted = []
+    for item in exercises:
+        exercise = catalog.by_id.get(item.get('id')) if isinstance(item, dict) else None
+        if exercise is None:
+            compacted.append(item)
+            continue
+        details = exercise_details(exercise)
+        compacted.append({
+            key: value for key, value in item.items()
+            if key not in details or details[key] != value
+        })
+    return compacted
+
+
+def hydrate_exercises(exercises, catalog):
+    """Restore catalog details into a compact list of exercise dicts"""
+    if not isinstance(exercises, list):
+        return exercises
+
+    hydrated = []
+    for item in exercises:
+        exercise = catalog.by_id.get(item.get('id')) if isinstance(item, dict) else None
+        if exercise is None:
+            hydrated.append(item)
+            continue
+        merged = {**exercise_details(exercise), **item}
+        ordered = {key: merged.pop(key) for key in EXERCISE_KEY_ORDER if key in merged}
+        ordered.update(merged)
+        hydrated.append(ordered)
+    return hydrated
+
+
+def compact_plan(workout_plan, catalog):
+    """Compact the exercises of a generated workout plan (returns a new dict)"""
+    if not isinstance(workout_plan, dict) or 'exercises' not in workout_plan:
+        return workout_plan
+    return {**workout_plan, 'exercises': compact_exercises(workout_plan['exercises'], catalog)}
+
+
+def hydrate_plan(workout_plan, catalog):
+    """Hydrate the exercises of a stored workout plan (returns a new dict)"""
+    if not isinstance(workout_plan, dict) or 'exercises' not in workout_plan:
+        return workout_plan
+    return {**workout_plan, 'exercises': hydrate_exercises(workout_plan['exercises'], catalog)}
@@ -0,0 +1,57 @@
+"""
+Atomic profile updates for newly logged workouts.
+
+Logging a workout changes the profile's workout count, streaks, last
+workout date, points and level, and may unlock achievements that award
+more points. All of it happens in one transaction: the profile row is
+locked (SELECT ... FOR UPDATE where the database supports it), achievements
+are evaluated against the post-workout stats, and the profile is written
+with a single UPDATE whose counters are F() increments, so concurrent
+workouts of the same user never lose an increment.
+"""
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from accounts.models import UserProfile
+from .streaks import get_streaks
+
+
+def apply_workout_to_profile(workout):
+    """
+    Fold a newly created workout into its user's profile.
+
+    Returns:
+        list: Achievements unlocked by the workout
+    """
+    from achievements.engine import evaluate_achievements
+
+    with transaction.atomic():
+        profile = UserProfile.objects.select_for_update().filter(user_id=workout.user_id).first()
+        if profile is None:
+            return []
+
+        streaks = get_streaks(workout.user_id)
+        stats = {
+            'total_workouts': profile.total_workouts + 1,
+            'current_streak': streaks['current_streak'],
+        }
+        unlocked = evaluate_achievements(workout.user, stats)
+
+        points = (workout.points_earned or 0) + sum(achievement.points for achievement in unlocked)
+        # The row is locked, so the level follows the stored points exactly
+        profile.total_points += points
+        UserProfile.objects.filter(pk=profile.pk).update(
+            total_workouts=F('total_workouts') + 1,
+            total_points=F('total_points') + points,
+            level=profile.calculate_level(),
+            current_streak=streaks['current_streak'],
+            longest_streak=streaks['longest_streak'],
+            last_workout_date=streaks['last_workout_date'],
+            updated_at=timezone.now(),
+        )
+
+    # Keep an already loaded user.profile in step with the database
+    if User.profile.is_cached(workout.user):
+        workout.user.profile.refresh_from_db()
+    return unlocked
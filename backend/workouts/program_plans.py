@@ -0,0 +1,102 @@
+"""
+Per-enrollment materialization of generated program days.
+
+Program days without an exercise_template used to be generated by the
+client on every session. On enrollment, a background job generates the
+plan of every such day once, seeded per (enrollment, day) so a rerun
+produces the same plans, and stores them with a single bulk insert in
+EnrollmentDayPlan. next_workout_day and the program schedule then return
+ready-to-run plans.
+"""
+from .exercise_catalog import get_exercise_catalog
+from .models import EnrollmentDayPlan, UserProgramEnrollment
+from .plan_storage import compact_plan, hydrate_plan
+from .workout_generator import WorkoutGenerator
+
+
+# Program goals the generator has no rep scheme for -> closest generator goal
+PROGRAM_GOAL_MAP = {
+    'weight_loss': 'endurance',
+    'general_fitness': 'hypertrophy',
+}
+
+
+def generator_goal(program_goal):
+    """Map a WorkoutProgram goal to a WorkoutGenerator goal"""
+    return PROGRAM_GOAL_MAP.get(program_goal, program_goal)
+
+
+def plan_seed(enrollment_id, program_day_id):
+    """Deterministic generation seed of an enrollment's program day"""
+    return enrollment_id * 1_000_003 + program_day_id
+
+
+def materialize_enrollment_plans(enrollment_id):
+    """
+    Generate and store the plan of every generated (template-less, non-rest)
+    day of an enrollment's program that has no plan yet.
+
+    Returns:
+        int: Number of plans stored
+    """
+    enrollment = UserProgramEnrollment.objects.select_related('program').filter(pk=enrollment_id).first()
+    if enrollment is None:
+        return 0
+
+    program = enrollment.program
+    days = program.program_days.filter(
+        exercise_template__isnull=True, is_rest_day=False
+    ).exclude(enrollment_plans__enrollment=enrollment)
+
+    generator = WorkoutGenerator()
+    catalog = get_exercise_catalog()
+    goal = generator_goal(program.goal)
+
+    plans = []
+    for day in days:
+        if not day.muscles_targeted:
+            continue
+        workout_plan = generator.generate_workout(
+            muscles_targeted=day.muscles_targeted,
+            duration=day.duration,
+            intensity=day.intensity,
+            goal=goal,
+            equipment=program.equipment_needed,
+            catalog=catalog,
+            seed=plan_seed(enrollment.pk, day.pk),
+            use_cache=False
+        )
+        plans.append(EnrollmentDayPlan(
+            enrollment=enrollment,
+            program_day=day,
+            workout_plan=compact_plan(workout_plan, catalog)
+        ))
+
+    # A concurrent run may have stored some days already
+    EnrollmentDayPlan.objects.bulk_create(plans, batch_size=500, ignore_conflicts=True)
+    return len(plans)
+
+
+def day_plans(enrollment, program_days=None):
+    """
+    Get an enrollment's stored plans, hydrated.
+
+    Args:
+        enrollment: UserProgramEnrollment (or None)
+        program_days: Optional iterable of ProgramDay to restrict to
+
+    Returns:
+        dict: program_day_id -> hydrated workout plan
+    """
+    if enrollment is None:
+        return {}
+    plans = EnrollmentDayPlan.objects.filter(enrollment=enrollment)
+    if program_days is not None:
+        plans = plans.filter(program_day__in=program_days)
+
+    catalog = None
+    hydrated = {}
+    for program_day_id, workout_plan in plans.values_list('program_day_id', 'workout_plan'):
+        catalog = catalog or get_exercise_catalog()
+        hydrated[program_day_id] = hydrate_plan(workout_plan, catalog)
+    return hydrated
@@ -0,0 +1,90 @@
+"""
+Per-user recently used exercises, for exercise rotation.
+
+Each user has a small bounded map in the cache, exercise id -> ordinal of
+the last day it was logged, updated when a workout is logged. Workout
+generation reads it with one cache lookup (never the history tables) and
+down-weights exercises used in the last EXERCISE_RECENCY_WINDOW_DAYS days,
+the most recent ones the most.
+
+The map is advisory: a cache eviction only means one plan without rotation.
+"""
+from django.conf import settings
+from django.core.cache import cache
+from django.utils import timezone
+
+
+RECENCY_KEY = 'exercise_recency:{user_id}'
+
+# Score multiplier of an exercise used today; it recovers linearly to 1 over the window
+RECENCY_MIN_WEIGHT = 0.1
+
+
+def _window_days():
+    return getattr(settings, 'EXERCISE_RECENCY_WINDOW_DAYS', 14)
+
+
+def get_recency(user_id):
+    """
+    Get a user's recency map.
+
+    Returns:
+        dict: exercise id -> ordinal of the day it was last used
+    """
+    return cache.get(RECENCY_KEY.format(user_id=user_id)) or {}
+
+
+def record_exercises(user_id, exercises, day):
+    """
+    Mark the exercises of a logged workout as used on day.
+
+    Args:
+        user_id: User primary key
+        exercises: exercises_completed list (items carry an 'id')
+        day: Date the workout was logged for
+    """
+    exercise_ids = {
+        item['id'] for item in exercises or []
+        if isinstance(item, dict) and isinstance(item.get('id'), int)
+    }
+    if not exercise_ids:
+        return
+
+    key = RECENCY_KEY.format(user_id=user_id)
+    recency = cache.get(key) or {}
+    ordinal = day.toordinal()
+    for exercise_id in exercise_ids:
+        recency[exercise_id] = max(ordinal, recency.get(exercise_id, ordinal))
+
+    # Keep the map bounded: only the most recently used exercises
+    size = getattr(settings, 'EXERCISE_RECENCY_SIZE', 64)
+    if len(recency) > size:
+        recency = dict(sorted(recency.items(), key=lambda item: item[1], reverse=True)[:size])
+    cache.set(key, recency, timeout=_window_days() * 24 * 60 * 60)
+
+
+def recency_weights(recency, today=None):
+    """
+    Score multipliers of the exercises used within the window.
+
+    Returns:
+        dict: exercise id -> weight in [RECENCY_MIN_WEIGHT, 1)
+    """
+    window = _window_days()
+    if not recency or window <= 0:
+        return {}
+    today = (today or timezone.now().date()).toordinal()
+
+    weights = {}
+    for exercise_id, ordinal in recency.items():
+        days_ago = max(0, today - ordinal)
+        if days_ago < window:
+            weights[exercise_id] = round(RECENCY_MIN_WEIGHT + (1 - RECENCY_MIN_WEIGHT) * days_ago / window, 4)
+    return weights
+
+
+def user_recency_weights(user):
+    """Recency weights of a request user ({} for anonymous users)"""
+    if user is None or not user.is_authenticated:
+        return {}
+    return recency_weights(get_recency(user.pk))
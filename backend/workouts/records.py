@@ -0,0 +1,180 @@
+"""
+Incrementally maintained personal-records index.
+
+Each record type keeps its current holder in PersonalRecord: the workout
+with the highest value, ties going to the earliest by (workout_date, id).
+A saved workout only replaces a holder when it ranks above it; the full
+history is scanned again only when the holder itself is deleted, lowered
+or moved later.
+"""
+from django.db import transaction
+from .models import WorkoutHistory, PersonalRecord
+
+
+# record_type -> how it is measured and reported.
+#   state_key: workout_state() key holding the measured value
+#   field: WorkoutHistory column to ORDER BY on recompute (None = computed in Python)
+#   response_key: name of the value in the analytics_records payload
+#   min_value: smallest value that counts as a record
+RECORD_TYPES = {
+    'longest_workout': {
+        'state_key': 'duration', 'field': 'duration', 'response_key': 'duration', 'min_value': 0,
+    },
+    'highest_points': {
+        'state_key': 'points_earned', 'field': 'points_earned', 'response_key': 'points', 'min_value': 0,
+    },
+    'most_exercises': {
+        'state_key': 'exercise_count', 'field': None, 'response_key': 'count', 'min_value': 1,
+    },
+}
+
+
+def _best_workout(user_id, record_type):
+    """
+    Find the holder of a record type by scanning history.
+
+    Ties go to the earliest workout by (workout_date, id), the same rule
+    update_records applies.
+
+    Returns:
+        tuple: (value, workout_id, workout_date) or None
+    """
+    config = RECORD_TYPES[record_type]
+    workouts = WorkoutHistory.objects.filter(user_id=user_id)
+
+    if config['field']:
+        best = workouts.order_by(f"-{config['field']}", 'workout_date', 'id').values_list(
+            config['field'], 'id', 'workout_date'
+        ).first()
+    else:
+        best = None
+        rows = workouts.order_by('workout_date', 'id').values_list(
+            'exercises_completed', 'id', 'workout_date'
+        )
+        for exercises, workout_id, workout_date in rows.iterator():
+            count = len(exercises) if isinstance(exercises, list) else 0
+            if best is None or count > best[0]:
+                best = (count, workout_id, workout_date)
+
+    if best is None or best[0] < config['min_value']:
+        return None
+    return best
+
+
+def recompute_record(user_id, record_type):
+    """Recompute one record type for a user from history"""
+    best = _best_workout(user_id, record_type)
+    if best is None:
+        PersonalRecord.objects.filter(user_id=user_id, record_type=record_type).delete()
+        return
+    value, workout_id, workout_date = best
+    PersonalRecord.objects.update_or_create(
+        user_id=user_id,
+        record_type=record_type,
+        defaults={'value': value, 'workout_id': workout_id, 'workout_date': workout_date}
+    )
+
+
+def _outranks(value, workout_date, workout_id, record):
+    """Whether a workout ranks above a record's holder (higher value, then earlier)"""
+    if value != record.value:
+        return value > record.value
+    return (workout_date, workout_id) < (record.workout_date, record.workout_id)
+
+
+def update_records(current):
+    """
+    Fold a saved workout into the user's personal records.
+
+    Args:
+        current: workout_state() of the saved workout
+    """
+    user_id = current['user_id']
+    with transaction.atomic():
+        records = {
+            record.record_type: record
+            for record in PersonalRecord.objects.select_for_update().filter(user_id=user_id)
+        }
+        for record_type, config in RECORD_TYPES.items():
+            value = current[config['state_key']]
+            record = records.get(record_type)
+
+            if record is not None and record.workout_id == current['id']:
+                if value < record.value or (
+                    value == record.value and current['workout_date'] > record.workout_date
+                ):
+                    # The holder got worse or later: someone else may hold it now
+                    recompute_record(user_id, record_type)
+                else:
+                    record.value = value
+                    record.workout_date = current['workout_date']
+                    record.save(update_fields=['value', 'workout_date', 'updated_at'])
+            elif value >= config['min_value'] and (
+                record is None or _outranks(value, current['workout_date'], current['id'], record)
+            ):
+                PersonalRecord.objects.update_or_create(
+                    user_id=user_id,
+                    record_type=record_type,
+                    defaults={
+                        'value': value,
+                        'workout_id': current['id'],
+                        'workout_date': current['workout_date'],
+                    }
+                )
+
+
+def held_record_types(workout):
+    """Record types currently held by a workout"""
+    return list(
+        PersonalRecord.objects.filter(workout=workout).values_list('record_type', flat=True)
+    )
+
+
+def rebuild_records(user=None):
+    """
+    Recompute every record type from history.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+
+    Returns:
+        int: Number of users processed
+    """
+    if user is not None:
+        user_ids = [user.pk]
+    else:
+        user_ids = WorkoutHistory.objects.order_by().values_list('user_id', flat=True).distinct()
+
+    count = 0
+    with transaction.atomic():
+        if user is None:
+            PersonalRecord.objects.all().delete()
+        for user_id in user_ids:
+            for record_type in RECORD_TYPES:
+                recompute_record(user_id, record_type)
+            count += 1
+    return count
+
+
+def get_user_records(user):
+    """
+    Get the analytics_records payload for a user with a single indexed lookup.
+
+    Returns:
+        dict: record_type -> {value key, date, workout_id}
+    """
+    rows = PersonalRecord.objects.filter(user=user).values_list(
+        'record_type', 'value', 'workout_date', 'workout_id'
+    )
+    by_type = {record_type: (value, day, workout_id) for record_type, value, day, workout_id in rows}
+
+    records = {}
+    for record_type, config in RECORD_TYPES.items():
+        if record_type in by_type:
+            value, day, workout_id = by_type[record_type]
+            records[record_type] = {
+                config['response_key']: value,
+                'date': day.strftime('%Y-%m-%d'),
+                'workout_id': workout_id
+            }
+    return records
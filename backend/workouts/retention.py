@@ -0,0 +1,95 @@
+"""
+Retention policies for generated workout plans.
+
+Every call to the generate endpoints stores a GeneratedWorkout, including
+anonymous ones. Plans are purged once they outlive their policy:
+
+- anonymous: plans without a user, after GENERATED_WORKOUT_ANONYMOUS_RETENTION_HOURS
+- unsaved: user plans not marked is_saved (see the save_plan action), after
+  GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS
+
+A retention of 0 disables the policy; the unsaved policy is disabled by default. Deletes run in small primary-key
+batches, each in its own short transaction, using the (user, created_at)
+and (is_saved, created_at) indexes to find expired rows.
+"""
+import time
+from datetime import timedelta
+from django.conf import settings
+from django.utils import timezone
+from .models import GeneratedWorkout
+
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def retention_cutoffs(now=None):
+    """
+    Get the creation-time cutoff of every enabled policy.
+
+    Returns:
+        dict: policy name -> datetime; plans created before it are expired
+    """
+    now = now or timezone.now()
+    cutoffs = {}
+
+    hours = getattr(settings, 'GENERATED_WORKOUT_ANONYMOUS_RETENTION_HOURS', 24)
+    if hours:
+        cutoffs['anonymous'] = now - timedelta(hours=hours)
+
+    days = getattr(settings, 'GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS', 0)
+    if days:
+        cutoffs['unsaved'] = now - timedelta(days=days)
+
+    return cutoffs
+
+
+def expired_generated_workouts(now=None):
+    """
+    Get the expired plans of every enabled policy.
+
+    Returns:
+        dict: policy name -> GeneratedWorkout queryset
+    """
+    querysets = {}
+    for policy, cutoff in retention_cutoffs(now).items():
+        if policy == 'anonymous':
+            querysets[policy] = GeneratedWorkout.objects.filter(
+                user__isnull=True, created_at__lt=cutoff
+            )
+        else:
+            querysets[policy] = GeneratedWorkout.objects.filter(
+                user__isnull=False, is_saved=False, created_at__lt=cutoff
+            )
+    return querysets
+
+
+def purge_generated_workouts(batch_size=DEFAULT_BATCH_SIZE, dry_run=False, pause=0, now=None):
+    """
+    Delete expired generated plans in primary-key batches.
+
+    Args:
+        batch_size: Rows deleted per statement
+        dry_run: Only count the expired plans
+        pause: Seconds to sleep between batches
+        now: Reference time (defaults to now)
+
+    Returns:
+        dict: policy name -> number of plans deleted (or expired, for a dry run)
+    """
+    counts = {}
+    for policy, queryset in expired_generated_workouts(now).items():
+        if dry_run:
+            counts[policy] = queryset.count()
+            continue
+
+        deleted = 0
+        ids = queryset.order_by().values_list('id', flat=True)
+        while True:
+            batch = list(ids[:batch_size])
+            if not batch:
+                break
+            deleted += GeneratedWorkout.objects.filter(id__in=batch).delete()[0]
+            if pause:
+                time.sleep(pause)
+        counts[policy] = deleted
+    return counts
@@ -0,0 +1,191 @@
+"""
+Incremental maintenance of the per-user daily workout rollup table.
+
+Every WorkoutHistory write is folded into the matching WorkoutDailyRollup row
+with F() expressions, so analytics can aggregate one row per active day
+instead of re-scanning the raw history.
+"""
+from django.db import transaction
+from django.db.models import Count, Sum, Q, F, Case, When, Value, FloatField
+from .models import WorkoutHistory, WorkoutDailyRollup
+
+
+INTENSITY_SCORES = {'light': 1.0, 'moderate': 1.5, 'intense': 2.0}
+
+# Choice value -> rollup counter column
+INTENSITY_FIELDS = {
+    'light': 'light_count',
+    'moderate': 'moderate_count',
+    'intense': 'intense_count',
+}
+GOAL_FIELDS = {
+    'strength': 'strength_count',
+    'hypertrophy': 'hypertrophy_count',
+    'endurance': 'endurance_count',
+}
+EQUIPMENT_FIELDS = {
+    'bodyweight': 'bodyweight_count',
+    'home': 'home_count',
+    'gym': 'gym_count',
+}
+
+COUNTER_FIELDS = [
+    'workout_count', 'total_duration', 'total_points', 'intensity_score_sum',
+    *INTENSITY_FIELDS.values(), *GOAL_FIELDS.values(), *EQUIPMENT_FIELDS.values(),
+]
+
+
+def workout_state(workout):
+    """Snapshot the WorkoutHistory fields that derived analytics tables depend on"""
+    exercises = workout.exercises_completed
+    return {
+        'id': workout.pk,
+        'user_id': workout.user_id,
+        'workout_date': workout.workout_date,
+        'duration': workout.duration or 0,
+        'points_earned': workout.points_earned or 0,
+        'intensity': workout.intensity,
+        'goal': workout.goal,
+        'equipment': workout.equipment,
+        'muscles_targeted': workout.muscles_targeted if isinstance(workout.muscles_targeted, list) else [],
+        'exercise_count': len(exercises) if isinstance(exercises, list) else 0,
+    }
+
+
+def state_deltas(state, sign):
+    """Counter deltas a workout state adds (sign=1) or removes (sign=-1); shared with counters"""
+    deltas = {
+        'workout_count': sign,
+        'total_duration': sign * state['duration'],
+        'total_points': sign * state['points_earned'],
+        'intensity_score_sum': sign * INTENSITY_SCORES.get(state['intensity'], 1.0),
+    }
+    for value, mapping in (
+        (state['intensity'], INTENSITY_FIELDS),
+        (state['goal'], GOAL_FIELDS),
+        (state['equipment'], EQUIPMENT_FIELDS),
+    ):
+        field = mapping.get(value)
+        if field:
+            deltas[field] = deltas.get(field, 0) + sign
+    return deltas
+
+
+def _apply_deltas(user_id, day, deltas):
+    """
+    Apply counter deltas to one rollup row.
+
+    Returns:
+        str: 'activated' if the row was created, 'deactivated' if it was
+        emptied and removed, otherwise None
+    """
+    deltas = {field: delta for field, delta in deltas.items() if delta}
+    if not deltas:
+        return None
+
+    updates = {field: F(field) + delta for field, delta in deltas.items()}
+    rows = WorkoutDailyRollup.objects.filter(user_id=user_id, date=day)
+
+    if deltas.get('workout_count', 0) < 0:
+        # Removals never create rows (e.g. while a user is being cascade-deleted)
+        if not rows.update(**updates):
+            return None
+        deleted, _ = rows.filter(workout_count__lte=0).delete()
+        return 'deactivated' if deleted else None
+
+    rollup, created = WorkoutDailyRollup.objects.get_or_create(user_id=user_id, date=day)
+    WorkoutDailyRollup.objects.filter(pk=rollup.pk).update(**updates)
+    return 'activated' if created else None
+
+
+def update_rollups(previous=None, current=None):
+    """
+    Fold a workout change into the daily rollups.
+
+    Args:
+        previous: workout_state() of the stored row before the write, or None on create
+        current: workout_state() after the write, or None on delete
+
+    Returns:
+        tuple: (activated_dates, deactivated_dates) - days that gained their
+        first workout or lost their last one
+    """
+    changes = {}
+    if previous and current and previous['workout_date'] == current['workout_date']:
+        deltas = state_deltas(current, 1)
+        for field, delta in state_deltas(previous, -1).items():
+            deltas[field] = deltas.get(field, 0) + delta
+        changes[current['workout_date']] = (current['user_id'], deltas)
+    else:
+        if previous:
+            changes[previous['workout_date']] = (previous['user_id'], state_deltas(previous, -1))
+        if current:
+            changes[current['workout_date']] = (current['user_id'], state_deltas(current, 1))
+
+    activated, deactivated = [], []
+    with transaction.atomic():
+        for day, (user_id, deltas) in changes.items():
+            result = _apply_deltas(user_id, day, deltas)
+            if result == 'activated':
+                activated.append(day)
+            elif result == 'deactivated':
+                deactivated.append(day)
+    return activated, deactivated
+
+
+def counter_aggregates():
+    """Aggregate expressions of every counter column over a WorkoutHistory queryset"""
+    aggregates = {
+        'workout_count': Count('id'),
+        'total_duration': Sum('duration'),
+        'total_points': Sum('points_earned'),
+        'intensity_score_sum': Sum(
+            Case(
+                *[When(intensity=key, then=Value(score)) for key, score in INTENSITY_SCORES.items()],
+                default=Value(1.0),
+                output_field=FloatField()
+            )
+        ),
+    }
+    for column, mapping in (
+        ('intensity', INTENSITY_FIELDS),
+        ('goal', GOAL_FIELDS),
+        ('equipment', EQUIPMENT_FIELDS),
+    ):
+        for value, field in mapping.items():
+            aggregates[field] = Count('id', filter=Q(**{column: value}))
+    return aggregates
+
+
+def rebuild_rollups(user=None, batch_size=1000):
+    """
+    Rebuild daily rollups from scratch with a single grouped aggregate.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+        batch_size: Rows per bulk_create batch
+
+    Returns:
+        int: Number of rollup rows written
+    """
+    history = WorkoutHistory.objects.all()
+    rollups = WorkoutDailyRollup.objects.all()
+    if user is not None:
+        history = history.filter(user=user)
+        rollups = rollups.filter(user=user)
+
+    aggregates = counter_aggregates()
+    grouped = history.order_by().values('user_id', 'workout_date').annotate(**aggregates)
+
+    with transaction.atomic():
+        rollups.delete()
+        objs = [
+            WorkoutDailyRollup(
+                user_id=row['user_id'],
+                date=row['workout_date'],
+                **{field: row[field] or 0 for field in COUNTER_FIELDS}
+            )
+            for row in grouped
+        ]
+        WorkoutDailyRollup.objects.bulk_create(objs, batch_size=batch_size)
+    return len(objs)
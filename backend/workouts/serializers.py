@@ -4,21 +4,29 @@ from .models import (
     WorkoutProgram, ProgramDay, 
     UserProgramEnrollment, ProgramDayCompletion
 )
+from .exercise_catalog import get_exercise_catalog
+from .plan_storage import compact_plan, hydrate_plan
+from .program_plans import day_plans
 
 
 # ============== Program Serializers ==============
 
 class ProgramDaySerializer(serializers.ModelSerializer):
     """Serializer for ProgramDay model"""
+    generated_plan = serializers.SerializerMethodField()
     
     class Meta:
         model = ProgramDay
         fields = [
             'id', 'week_number', 'day_number', 'name', 'description',
             'muscles_targeted', 'duration', 'intensity', 
-            'exercise_template', 'is_rest_day'
+            'exercise_template', 'is_rest_day', 'generated_plan'
         ]
 
+    def get_generated_plan(self, obj):
+        # Enrollment plans for template-less days, passed in as context['day_plans']
+        return self.context.get('day_plans', {}).get(obj.id)
+
 
 class WorkoutProgramListSerializer(serializers.ModelSerializer):
     """Serializer for listing WorkoutPrograms (lightweight)"""
@@ -106,7 +114,10 @@ class UserProgramEnrollmentSerializer(serializers.ModelSerializer):
     def get_next_workout_day(self, obj):
         next_day = obj.next_workout_day
         if next_day:
-            return ProgramDaySerializer(next_day).data
+            plans = {}
+            if next_day.exercise_template is None and not next_day.is_rest_day:
+                plans = day_plans(obj, [next_day])
+            return ProgramDaySerializer(next_day, context={'day_plans': plans}).data
         return None
     
     def get_completed_days_count(self, obj):
@@ -139,6 +150,21 @@ class CompleteProgramDaySerializer(serializers.Serializer):
 
 # ============== Existing Serializers ==============
 
+def hydration_enabled(context):
+    """Exercise details are hydrated unless the request passes ?hydrate=false"""
+    request = context.get('request')
+    if request is None:
+        return True
+    return request.query_params.get('hydrate', 'true').lower() not in ('false', '0', 'no')
+
+
+def context_catalog(context):
+    """Exercise catalog snapshot shared by every object a serializer renders"""
+    if 'exercise_catalog' not in context:
+        context['exercise_catalog'] = get_exercise_catalog()
+    return context['exercise_catalog']
+
+
 class WorkoutHistorySerializer(serializers.ModelSerializer):
     """Serializer for WorkoutHistory model"""
     user_username = serializers.CharField(source='user.username', read_only=True)
@@ -159,10 +185,20 @@ class GeneratedWorkoutSerializer(serializers.ModelSerializer):
         model = GeneratedWorkout
         fields = [
             'id', 'user', 'muscles_targeted', 'duration', 'intensity',
-            'goal', 'equipment', 'workout_plan', 'created_at'
+            'goal', 'equipment', 'workout_plan', 'is_saved', 'created_at'
         ]
         read_only_fields = ['id', 'user', 'created_at']
 
+    def validate_workout_plan(self, value):
+        # Stored compact: catalog details are hydrated again on read
+        return compact_plan(value, context_catalog(self.context))
+
+    def to_representation(self, instance):
+        data = super().to_representation(instance)
+        if hydration_enabled(self.context):
+            data['workout_plan'] = hydrate_plan(data['workout_plan'], context_catalog(self.context))
+        return data
+
 
 class WorkoutGenerationRequestSerializer(serializers.Serializer):
     """Serializer for workout generation request"""
@@ -174,13 +210,28 @@ class WorkoutGenerationRequestSerializer(serializers.Serializer):
     intensity = serializers.ChoiceField(choices=['light', 'moderate', 'intense'])
     goal = serializers.ChoiceField(choices=['strength', 'hypertrophy', 'endurance'])
     equipment = serializers.ChoiceField(choices=['bodyweight', 'home', 'gym'])
+    seed = serializers.IntegerField(
+        required=False,
+        allow_null=True,
+        min_value=0,
+        help_text="Optional seed for a reproducible plan"
+    )
+
+
+class WorkoutBatchGenerationRequestSerializer(serializers.Serializer):
+    """Serializer for a batch of workout generation requests (items are validated one by one)"""
+    workouts = serializers.ListField(
+        child=serializers.JSONField(),
+        allow_empty=False,
+        max_length=50
+    )
 
 
 # Analytics Serializers
 
 class AnalyticsSummarySerializer(serializers.Serializer):
     """Serializer for analytics summary response"""
-    period = serializers.DictField(child=serializers.CharField())
+    period = serializers.DictField(child=serializers.CharField(), required=False)
     metrics = serializers.DictField()
     intensity_breakdown = serializers.DictField()
     goal_breakdown = serializers.DictField()
@@ -210,10 +261,17 @@ class MuscleFrequencySerializer(serializers.Serializer):
     percentage = serializers.FloatField()
 
 
+class MusclePairSerializer(serializers.Serializer):
+    """Serializer for a frequently combined muscle pair"""
+    muscles = serializers.ListField(child=serializers.CharField())
+    count = serializers.IntegerField()
+    percentage = serializers.FloatField()
+
+
 class MuscleAnalyticsSerializer(serializers.Serializer):
     """Serializer for muscle analytics response"""
     muscle_frequency = MuscleFrequencySerializer(many=True)
-    muscle_pairs = serializers.ListField()
+    muscle_pairs = MusclePairSerializer(many=True)
 
 
 class WorkoutCalendarDaySerializer(serializers.Serializer):
@@ -224,11 +282,22 @@ class WorkoutCalendarDaySerializer(serializers.Serializer):
     total_points = serializers.IntegerField()
 
 
+class CompactCalendarSerializer(serializers.Serializer):
+    """Serializer for a bitmap-encoded calendar range"""
+    start = serializers.DateField()
+    days = serializers.IntegerField()
+    bitmap = serializers.CharField(help_text="Base64 bitset, bit n (LSB first) = start + n days active")
+    workout_counts = serializers.ListField(child=serializers.IntegerField())
+    total_points = serializers.ListField(child=serializers.IntegerField())
+
+
 class ConsistencyDataSerializer(serializers.Serializer):
     """Serializer for consistency data response"""
     current_streak = serializers.IntegerField()
     longest_streak = serializers.IntegerField()
-    workout_calendar = WorkoutCalendarDaySerializer(many=True)
+    workout_calendar = WorkoutCalendarDaySerializer(many=True, required=False)
+    # Only present in compact-format responses
+    compact_calendar = CompactCalendarSerializer(required=False)
     weekly_consistency = serializers.DictField()
     day_of_week_breakdown = serializers.DictField()
 
@@ -253,3 +322,13 @@ class PersonalRecordsSerializer(serializers.Serializer):
     """Serializer for personal records response"""
     records = serializers.DictField()
     recent_milestones = MilestoneSerializer(many=True)
+
+
+class AnalyticsDashboardSerializer(serializers.Serializer):
+    """Serializer for combined analytics dashboard response (sections are optional)"""
+    period = serializers.DictField(child=serializers.CharField())
+    summary = AnalyticsSummarySerializer(required=False)
+    trends = TrendsDataSerializer(required=False)
+    muscles = MuscleAnalyticsSerializer(required=False)
+    consistency = ConsistencyDataSerializer(required=False)
+    records = PersonalRecordsSerializer(required=False)
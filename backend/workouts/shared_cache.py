@@ -0,0 +1,124 @@
+"""
+Cross-process invalidation through a shared cache.
+
+Process-wide snapshots (the exercise catalog, the achievement index) are
+invalidated by bumping a version stamp. Other worker processes only see the bump when the
+stamp lives in a cache they all read: SHARED_CACHE_ALIAS must name a Redis,
+Memcached or database backend (file-based caches are shared by processes on
+one host only).
+
+LocMemCache and DummyCache keep their data per process. They are fine for
+development and tests, but with them a bump only reaches the process that
+made it, so snapshots are reloaded after SHARED_CACHE_LOCAL_TIMEOUT seconds
+instead, and a system check warns outside DEBUG.
+"""
+import threading
+import time
+from django.conf import settings
+from django.core.cache import caches
+from django.core.checks import Warning, register
+
+
+# Backends whose data every process keeps separately
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def shared_cache_alias():
+    """Alias of the cache holding cross-process version stamps"""
+    return getattr(settings, 'SHARED_CACHE_ALIAS', 'default')
+
+
+def is_shared_cache(alias=None):
+    """True when every worker process sees the same data through the cache alias"""
+    alias = alias or shared_cache_alias()
+    backend = settings.CACHES.get(alias, {}).get('BACKEND')
+    return backend not in PROCESS_LOCAL_BACKENDS
+
+
+def local_timeout():
+    """Seconds a process may serve state another worker invalidated, without a shared cache"""
+    return getattr(settings, 'SHARED_CACHE_LOCAL_TIMEOUT', 30)
+
+
+def shared_version(key):
+    """Get a version stamp from the shared cache, initializing it if missing"""
+    cache = caches[shared_cache_alias()]
+    version = cache.get(key)
+    if version is None:
+        version = time.time_ns()
+        if not cache.add(key, version, timeout=None):
+            version = cache.get(key, version)
+    return version
+
+
+def bump_shared_version(key):
+    """Mark everything loaded under the current stamp as stale"""
+    caches[shared_cache_alias()].set(key, time.time_ns(), timeout=None)
+
+
+class SharedSnapshot:
+    """
+    Process-wide object reloaded whenever its shared version stamp changes.
+
+    Example:
+        _catalog = SharedSnapshot('exercise_catalog:version', load_catalog)
+        catalog = _catalog.get()
+    """
+
+    def __init__(self, version_key, load):
+        """
+        Args:
+            version_key: Shared cache key of the version stamp
+            load: Callable building the object from a version; the version is
+                unique per load, so it can key caches derived from the object
+        """
+        self.version_key = version_key
+        self._load = load
+        self._entry = None  # (object, stamp, loaded_at)
+        self._lock = threading.Lock()
+
+    def _is_current(self, entry, stamp):
+        if entry is None or entry[1] != stamp:
+            return False
+        # A per-process cache never sees other workers' bumps: expire instead
+        return is_shared_cache() or time.monotonic() - entry[2] < local_timeout()
+
+    def get(self):
+        """Get the current object, loading it if the stamp moved or it expired"""
+        stamp = shared_version(self.version_key)
+        entry = self._entry
+        if self._is_current(entry, stamp):
+            return entry[0]
+
+        with self._lock:
+            entry = self._entry
+            if not self._is_current(entry, stamp):
+                version = stamp if is_shared_cache() else (stamp, time.time_ns())
+                entry = (self._load(version), stamp, time.monotonic())
+                self._entry = entry
+            return entry[0]
+
+    def invalidate(self):
+        """Drop the object in this process and mark it stale for all others"""
+        bump_shared_version(self.version_key)
+        with self._lock:
+            self._entry = None
+
+
+@register()
+def check_shared_cache(app_configs, **kwargs):
+    """Warn when invalidations cannot reach other worker processes"""
+    if settings.DEBUG or is_shared_cache():
+        return []
+    alias = shared_cache_alias()
+    return [Warning(
+        f"SHARED_CACHE_ALIAS '{alias}' uses a per-process cache backend.",
+        hint=(
+            'Point it at a Redis, Memcached or database cache shared by every worker. Until then '
+            'invalidations reach other workers only after SHARED_CACHE_LOCAL_TIMEOUT seconds.'
+        ),
+        id='workouts.W001',
+    )]
@@ -1,44 +1,142 @@
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete
 from django.dispatch import receiver
-from datetime import date, timedelta
+from exercises.models import Exercise
 from .models import WorkoutHistory
+from .rollups import workout_state, update_rollups
+from .analytics_cache import AnalyticsCache
+from .calendar_bitmap import update_calendar_bitmaps
+from .counters import update_counters
+from .exercise_catalog import invalidate_exercise_catalog
+from .muscle_index import index_workout_muscles, update_cooccurrence
+from .profile_stats import apply_workout_to_profile
+from .recency import record_exercises
+from .records import update_records, held_record_types, recompute_record
+from .streaks import update_streaks
+from .tasks import schedule_prewarm
+
+
+@receiver(pre_save, sender=WorkoutHistory)
+def capture_previous_state(sender, instance, raw=False, **kwargs):
+    """Remember the stored version of an updated workout for incremental maintenance"""
+    instance._previous_state = None
+    if instance.pk and not raw:
+        previous = WorkoutHistory.objects.filter(pk=instance.pk).first()
+        if previous:
+            instance._previous_state = workout_state(previous)
+
+
+@receiver(post_save, sender=WorkoutHistory)
+def update_daily_rollup(sender, instance, created, raw=False, **kwargs):
+    """Fold the created or updated workout into the daily rollups and lifetime counters"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    current = workout_state(instance)
+    activated, deactivated = update_rollups(previous, current)
+    update_counters(previous, current, activated, deactivated)
+    # Only days that gained their first or lost their last workout move
+    # streaks and calendar bits; new workouts sync profile streaks in update_user_stats
+    update_streaks(instance.user_id, activated, deactivated, sync_profile=not created)
+    update_calendar_bitmaps(instance.user_id, activated, deactivated)
+
+
+@receiver(post_save, sender=WorkoutHistory)
+def update_muscle_index(sender, instance, created, raw=False, **kwargs):
+    """Keep the normalized muscle index and co-occurrence matrix in sync"""
+    if raw:
+        return
+    previous = None if created else getattr(instance, '_previous_state', None)
+    current = workout_state(instance)
+    index_workout_muscles(current, previous, created)
+    update_cooccurrence(previous, current)
+
+
+@receiver(post_delete, sender=WorkoutHistory)
+def remove_from_muscle_pairs(sender, instance, **kwargs):
+    """Subtract a deleted workout's muscle pairs (index rows are removed by cascade)"""
+    update_cooccurrence(workout_state(instance), None)
+
+
+@receiver(post_delete, sender=WorkoutHistory)
+def remove_from_daily_rollup(sender, instance, **kwargs):
+    """Subtract a deleted workout from the daily rollups and lifetime counters"""
+    previous = workout_state(instance)
+    activated, deactivated = update_rollups(previous, None)
+    update_counters(previous, None, activated, deactivated)
+    update_streaks(instance.user_id, activated, deactivated)
+    update_calendar_bitmaps(instance.user_id, activated, deactivated)
+
+
+@receiver(post_save, sender=WorkoutHistory)
+def update_personal_records(sender, instance, raw=False, **kwargs):
+    """Replace any personal record the saved workout beats"""
+    if raw:
+        return
+    update_records(workout_state(instance))
+
+
+@receiver(pre_delete, sender=WorkoutHistory)
+def capture_held_records(sender, instance, **kwargs):
+    """Remember which records the workout holds before they cascade away"""
+    instance._held_records = held_record_types(instance)
+
+
+@receiver(post_delete, sender=WorkoutHistory)
+def recompute_personal_records(sender, instance, **kwargs):
+    """Recompute only the record types the deleted workout held"""
+    for record_type in getattr(instance, '_held_records', []):
+        recompute_record(instance.user_id, record_type)
 
 
 @receiver(post_save, sender=WorkoutHistory)
-def update_user_stats(sender, instance, created, **kwargs):
-    """Update user profile stats when a workout is completed"""
-    if created:
-        profile = instance.user.profile
-
-        # Update total workouts
-        profile.total_workouts += 1
-
-        # Update streaks
-        today = date.today()
-        if profile.last_workout_date:
-            days_diff = (today - profile.last_workout_date).days
-
-            if days_diff == 1:
-                # Consecutive day - increment streak
-                profile.current_streak += 1
-            elif days_diff == 0:
-                # Same day - don't change streak
-                pass
-            else:
-                # Streak broken - reset to 1
-                profile.current_streak = 1
-        else:
-            # First workout
-            profile.current_streak = 1
-
-        # Update longest streak if current is higher
-        if profile.current_streak > profile.longest_streak:
-            profile.longest_streak = profile.current_streak
-
-        # Update last workout date
-        profile.last_workout_date = today
-
-        # Add points
-        profile.add_points(instance.points_earned)
-
-        profile.save()
+@receiver(post_delete, sender=WorkoutHistory)
+def invalidate_analytics_cache(sender, instance, raw=False, **kwargs):
+    """Bump the user's analytics data version so cached results are no longer addressed"""
+    if raw:
+        return
+    user_id = instance.user_id
+    AnalyticsCache.bump_version(user_id)
+    # Bump again once committed, so results computed from pre-commit data
+    # during the transaction are never served
+    transaction.on_commit(lambda: AnalyticsCache.bump_version(user_id))
+
+
+@receiver(post_save, sender=WorkoutHistory)
+@receiver(post_delete, sender=WorkoutHistory)
+def prewarm_analytics_cache(sender, instance, raw=False, **kwargs):
+    """Recompute the user's common analytics views in the background once committed"""
+    if raw:
+        return
+    user_id = instance.user_id
+    # Registered after the version bump above, so the new version is warmed
+    transaction.on_commit(lambda: schedule_prewarm(user_id))
+
+
+@receiver(post_save, sender=WorkoutHistory)
+def update_exercise_recency(sender, instance, created, raw=False, **kwargs):
+    """Mark the logged exercises as recently used, for exercise rotation"""
+    if raw or not created:
+        return
+    user_id, exercises, day = instance.user_id, instance.exercises_completed, instance.workout_date
+    transaction.on_commit(lambda: record_exercises(user_id, exercises, day))
+
+
+@receiver(post_save, sender=WorkoutHistory)
+def update_user_stats(sender, instance, created, raw=False, **kwargs):
+    """
+    Apply a new workout to the user's profile: count, streaks, points, level
+    and achievements, in one transaction with a single profile UPDATE
+    """
+    if raw or not created:
+        return
+    apply_workout_to_profile(instance)
+
+
+@receiver(post_save, sender=Exercise)
+@receiver(post_delete, sender=Exercise)
+def invalidate_exercise_catalog_snapshot(sender, **kwargs):
+    """Drop the in-memory exercise catalog when an exercise changes"""
+    invalidate_exercise_catalog()
+    # Again once committed, so a snapshot loaded mid-transaction is not kept
+    transaction.on_commit(invalidate_exercise_catalog)
@@ -0,0 +1,229 @@
+"""
+Gaps-and-islands streak engine.
+
+A user's streaks are stored as islands: maximal runs of consecutive active
+days in WorkoutStreak. Full rebuilds find the islands with a single SQL
+query (consecutive dates minus their ROW_NUMBER() share a constant), and
+every workout write only merges or splits the island around the day that
+gained its first workout or lost its last one.
+
+The current streak is derived at read time, so it also ends when days pass
+without a workout.
+"""
+from datetime import timedelta
+from django.db import connection, transaction
+from django.db.models import Max, Q
+from django.db.models.fields import DateField
+from django.utils import timezone
+from accounts.models import UserProfile
+from .models import WorkoutHistory, WorkoutStreak
+
+
+# Integer day number of a date column per database vendor: consecutive
+# dates map to consecutive integers
+DAY_NUMBER_SQL = {
+    'sqlite': 'CAST(julianday({column}) AS INTEGER)',
+    'postgresql': "({column} - DATE '1970-01-01')",
+    'mysql': 'TO_DAYS({column})',
+}
+
+ISLANDS_SQL = """
+    SELECT user_id, MIN(day), MAX(day), COUNT(*)
+    FROM (
+        SELECT user_id, day,
+               {day_number} - ROW_NUMBER() OVER (PARTITION BY user_id ORDER BY day) AS island
+        FROM (SELECT DISTINCT user_id, workout_date AS day FROM {table} {where}) active_days
+    ) numbered
+    GROUP BY user_id, island
+"""
+
+
+def _islands_sql(user_id=None):
+    """Yield (user_id, start_date, end_date, length) islands with one gaps-and-islands query"""
+    where, params = '', []
+    if user_id is not None:
+        where, params = 'WHERE user_id = %s', [user_id]
+
+    sql = ISLANDS_SQL.format(
+        day_number=DAY_NUMBER_SQL[connection.vendor].format(column='day'),
+        table=connection.ops.quote_name(WorkoutHistory._meta.db_table),
+        where=where,
+    )
+    to_date = DateField().to_python
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        for row_user_id, start, end, length in cursor.fetchall():
+            yield row_user_id, to_date(start), to_date(end), length
+
+
+def _islands_python(user_id=None):
+    """Yield islands by walking distinct dates (for vendors without DAY_NUMBER_SQL)"""
+    days = WorkoutHistory.objects.all()
+    if user_id is not None:
+        days = days.filter(user_id=user_id)
+    days = days.order_by('user_id', 'workout_date').values_list('user_id', 'workout_date').distinct()
+
+    island = None
+    for row_user_id, day in days.iterator():
+        if island and island[0] == row_user_id and island[2] + timedelta(days=1) == day:
+            island = (row_user_id, island[1], day, island[3] + 1)
+            continue
+        if island:
+            yield island
+        island = (row_user_id, day, day, 1)
+    if island:
+        yield island
+
+
+def rebuild_streaks(user=None):
+    """
+    Rebuild streak islands from WorkoutHistory and sync profile streak fields.
+
+    Args:
+        user: Optional User to restrict the rebuild to
+
+    Returns:
+        int: Number of islands written
+    """
+    user_id = user.pk if user is not None else None
+    find_islands = _islands_sql if connection.vendor in DAY_NUMBER_SQL else _islands_python
+
+    streaks = WorkoutStreak.objects.all()
+    profiles = UserProfile.objects.all()
+    if user is not None:
+        streaks = streaks.filter(user=user)
+        profiles = profiles.filter(user=user)
+
+    with transaction.atomic():
+        streaks.delete()
+        islands = [
+            WorkoutStreak(user_id=row_user_id, start_date=start, end_date=end, length=length)
+            for row_user_id, start, end, length in find_islands(user_id)
+        ]
+        WorkoutStreak.objects.bulk_create(islands, batch_size=1000)
+
+        for profile_user_id in profiles.values_list('user_id', flat=True):
+            sync_profile_streaks(profile_user_id)
+    return len(islands)
+
+
+def _save_island(island):
+    island.length = (island.end_date - island.start_date).days + 1
+    island.save()
+
+
+def add_streak_day(user_id, day):
+    """Add a newly active day, extending or merging the neighbouring islands"""
+    one_day = timedelta(days=1)
+    with transaction.atomic():
+        islands = list(WorkoutStreak.objects.select_for_update().filter(
+            user_id=user_id, start_date__lte=day + one_day, end_date__gte=day - one_day
+        ))
+        if any(island.start_date <= day <= island.end_date for island in islands):
+            return
+
+        before = next((island for island in islands if island.end_date == day - one_day), None)
+        after = next((island for island in islands if island.start_date == day + one_day), None)
+
+        if before and after:
+            # The day bridges two islands
+            before.end_date = after.end_date
+            after.delete()
+            _save_island(before)
+        elif before:
+            before.end_date = day
+            _save_island(before)
+        elif after:
+            after.start_date = day
+            _save_island(after)
+        else:
+            WorkoutStreak.objects.create(user_id=user_id, start_date=day, end_date=day, length=1)
+
+
+def remove_streak_day(user_id, day):
+    """Remove a day that lost its last workout, shrinking or splitting its island"""
+    one_day = timedelta(days=1)
+    with transaction.atomic():
+        island = WorkoutStreak.objects.select_for_update().filter(
+            user_id=user_id, start_date__lte=day, end_date__gte=day
+        ).first()
+        if island is None:
+            return
+
+        if island.start_date == island.end_date:
+            island.delete()
+        elif day == island.start_date:
+            island.start_date = day + one_day
+            _save_island(island)
+        elif day == island.end_date:
+            island.end_date = day - one_day
+            _save_island(island)
+        else:
+            # Split around the removed day
+            tail = WorkoutStreak(user_id=user_id, start_date=day + one_day, end_date=island.end_date)
+            island.end_date = day - one_day
+            _save_island(island)
+            _save_island(tail)
+
+
+def update_streaks(user_id, activated=(), deactivated=(), sync_profile=True):
+    """
+    Apply day activations/deactivations from update_rollups() to the islands.
+
+    Args:
+        user_id: User primary key
+        activated: Days that gained their first workout
+        deactivated: Days that lost their last workout
+        sync_profile: False when the caller writes the profile streaks itself
+            (workout creation, see profile_stats)
+    """
+    if not activated and not deactivated:
+        return
+    with transaction.atomic():
+        for day in deactivated:
+            remove_streak_day(user_id, day)
+        for day in activated:
+            add_streak_day(user_id, day)
+        if sync_profile:
+            sync_profile_streaks(user_id)
+
+
+def get_streaks(user_id, today=None):
+    """
+    Get current and longest streaks with a single aggregate query.
+
+    The current streak is the island containing today or yesterday, counted
+    up to today; it is 0 once a full day passes without a workout.
+
+    Returns:
+        dict: current_streak, longest_streak and last_workout_date
+    """
+    today = today or timezone.now().date()
+    alive = Q(start_date__lte=today, end_date__gte=today - timedelta(days=1))
+
+    stats = WorkoutStreak.objects.filter(user_id=user_id).aggregate(
+        longest=Max('length'),
+        last_date=Max('end_date'),
+        current_start=Max('start_date', filter=alive),
+        current_end=Max('end_date', filter=alive),
+    )
+
+    current = 0
+    if stats['current_start']:
+        current = (min(stats['current_end'], today) - stats['current_start']).days + 1
+
+    return {
+        'current_streak': current,
+        'longest_streak': stats['longest'] or 0,
+        'last_workout_date': stats['last_date'],
+    }
+
+
+def sync_profile_streaks(user_id):
+    """Store the derived streak values on the user's profile"""
+    streaks = get_streaks(user_id)
+    UserProfile.objects.filter(user_id=user_id).update(
+        current_streak=streaks['current_streak'],
+        longest_streak=streaks['longest_streak'],
+        last_workout_date=streaks['last_workout_date'],
+    )
@@ -0,0 +1,119 @@
+"""
+Background jobs for the workouts app, run on a small bounded thread pool.
+
+Analytics pre-warming: after a workout write commits, the user's common
+analytics views are recomputed and stored through AnalyticsCache, so the
+first dashboard load after logging a workout is served warm. A user is
+queued at most once at a time; writes arriving while a recompute runs queue
+one more pass against the newer data version.
+
+Program plans: after an enrollment commits, the plans of its generated
+program days are materialized (see program_plans).
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connections
+from .analytics import WorkoutAnalyticsService, get_analytics_service
+from .analytics_cache import AnalyticsCache
+from .program_plans import materialize_enrollment_plans
+
+
+# Periods warmed for each view, matching the analytics action query params
+PREWARM_PERIODS = ('7d', '30d', '90d')
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=getattr(settings, 'ANALYTICS_PREWARM_WORKERS', 2),
+                thread_name_prefix='workouts-tasks'
+            )
+        return _executor
+
+
+def prewarm_user_analytics(user_id):
+    """
+    Compute and cache the user's summary, trends and consistency for each
+    period in PREWARM_PERIODS.
+
+    The cached call arguments mirror the analytics actions' defaults, so the
+    warmed entries are exactly the ones those requests look up.
+
+    Returns:
+        int: Number of views warmed
+    """
+    user = User.objects.filter(pk=user_id).first()
+    if user is None:
+        return 0
+
+    service = get_analytics_service()
+    warmed = 0
+    for period in PREWARM_PERIODS:
+        start_date, end_date, _ = WorkoutAnalyticsService.parse_period(period)
+        AnalyticsCache.call(service.get_summary, user, start_date, end_date)
+        AnalyticsCache.call(service.get_trends, user, start_date, end_date, 'daily')
+        AnalyticsCache.call(service.get_consistency, user, start_date, end_date, 'full')
+        warmed += 3
+    return warmed
+
+
+def _run_prewarm(user_id):
+    # Leave the pending set first: a write during the recompute queues a new pass
+    with _pending_lock:
+        _pending.discard(user_id)
+    try:
+        prewarm_user_analytics(user_id)
+    finally:
+        # Worker threads get their own connections; never leak them
+        connections.close_all()
+
+
+def schedule_prewarm(user_id):
+    """
+    Queue a background pre-warm for a user unless one is already queued.
+
+    Returns:
+        bool: True if a pre-warm was queued
+    """
+    if not getattr(settings, 'ANALYTICS_PREWARM_ENABLED', True):
+        return False
+
+    with _pending_lock:
+        if user_id in _pending:
+            return False
+        if len(_pending) >= getattr(settings, 'ANALYTICS_PREWARM_MAX_PENDING', 1000):
+            # Under a write burst, skip warming rather than queue without bound
+            return False
+        _pending.add(user_id)
+
+    _get_executor().submit(_run_prewarm, user_id)
+    return True
+
+
+def _run_materialize(enrollment_id):
+    try:
+        materialize_enrollment_plans(enrollment_id)
+    finally:
+        connections.close_all()
+
+
+def schedule_enrollment_plans(enrollment_id):
+    """
+    Queue background materialization of an enrollment's generated day plans.
+
+    Returns:
+        bool: True if the job was queued
+    """
+    if not getattr(settings, 'PROGRAM_PLAN_MATERIALIZE_ENABLED', True):
+        return False
+    _get_executor().submit(_run_materialize, enrollment_id)
+    return True
@@ -0,0 +1,1364 @@
+import base64
+import json
+import random
+import tempfile
+import threading
+from io import StringIO
+from datetime import date, timedelta
+from unittest import mock, skipIf, skipUnless
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+from accounts.models import UserProfile
+from ai_coach.serializers import UserContextSerializer
+from achievements.engine import invalidate_achievement_index
+from achievements.models import Achievement, UserAchievement
+from exercises.models import Exercise
+from .analytics import WorkoutAnalyticsService
+from .analytics_cache import AnalyticsCache
+from .columnar import ColumnarAnalyticsService, np
+from .counters import COUNTER_FIELDS, get_counters, rebuild_counters
+from .exercise_catalog import CATALOG_VERSION_KEY, ExerciseCatalog, get_exercise_catalog
+from .models import (
+    EnrollmentDayPlan, GeneratedWorkout, MuscleCoOccurrence, ProgramDay, WorkoutDailyRollup, UserProgramEnrollment,
+    UserStatsCounters, WorkoutHistory, WorkoutMuscle, WorkoutProgram, WorkoutStreak
+)
+from .muscle_index import MUSCLE_NAME_MAX_LENGTH, MUSCLE_PAIRS, get_pair_counts, rebuild_muscle_index
+from .program_plans import materialize_enrollment_plans
+from .records import get_user_records, rebuild_records
+from .retention import purge_generated_workouts
+from .shared_cache import bump_shared_version, check_shared_cache
+from .rollups import COUNTER_FIELDS as ROLLUP_FIELDS, rebuild_rollups
+from .streaks import get_streaks, rebuild_streaks
+from .workout_generator import PlanCache, WorkoutGenerator
+from . import exercise_selection, profile_stats, recency, tasks
+
+
+def create_exercise(name, primary_muscle, equipment='bodyweight', **overrides):
+    data = {
+        'name': name,
+        'primary_muscle': primary_muscle,
+        'equipment': equipment,
+        'description': name,
+        'instructions': [],
+    }
+    data.update(overrides)
+    return Exercise.objects.create(**data)
+
+
+def log_workout(user, **overrides):
+    data = {
+        'user': user,
+        'muscles_targeted': ['chest'],
+        'duration': 30,
+        'intensity': 'moderate',
+        'goal': 'strength',
+        'equipment': 'gym',
+        'exercises_completed': [],
+    }
+    data.update(overrides)
+    return WorkoutHistory.objects.create(**data)
+
+
+class AnalyticsDashboardTests(TestCase):
+    """Tests for the combined analytics_dashboard action"""
+
+    # Upper bound on queries for a full dashboard, independent of history size
+    QUERY_BUDGET = 8
+
+    # Rollups, muscle index, muscle pairs, streaks, records and milestones
+    SERVICE_QUERIES = 6
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/workouts/history/analytics_dashboard/'
+        cache.clear()
+
+    def _log_workouts(self, count):
+        today = timezone.now().date()
+        intensities = ['light', 'moderate', 'intense']
+        for i in range(count):
+            workout = log_workout(
+                self.user,
+                muscles_targeted=['chest', 'triceps'] if i % 2 else ['quads'],
+                duration=20 + i % 40,
+                intensity=intensities[i % 3],
+                exercises_completed=[{'id': 1}] * (i % 5),
+            )
+            WorkoutHistory.objects.filter(pk=workout.pk).update(
+                workout_date=today - timedelta(days=i % 60)
+            )
+        # Backdating with update() bypasses signals, so rebuild derived tables
+        rebuild_rollups(user=self.user)
+        rebuild_muscle_index(user=self.user)
+
+    def _count_queries(self, params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def test_query_count_is_constant(self):
+        self._log_workouts(5)
+        small = self._count_queries({'period': '90d'})
+        self._log_workouts(60)
+        large = self._count_queries({'period': '90d'})
+
+        self.assertEqual(small, large)
+        self.assertLessEqual(large, self.QUERY_BUDGET)
+
+    def test_service_query_count_is_flat(self):
+        today = timezone.now().date()
+        args = (self.user, None, today, 'weekly', 10)
+        self._log_workouts(5)
+        with self.assertNumQueries(self.SERVICE_QUERIES):
+            WorkoutAnalyticsService.get_dashboard(*args)
+        self._log_workouts(120)
+        with self.assertNumQueries(self.SERVICE_QUERIES):
+            WorkoutAnalyticsService.get_dashboard(*args)
+        with self.assertNumQueries(self.SERVICE_QUERIES):
+            WorkoutAnalyticsService.get_dashboard(self.user, today - timedelta(days=30), today)
+
+    def test_single_section_uses_single_scan(self):
+        self._log_workouts(10)
+        self.assertEqual(self._count_queries({'sections': 'summary,trends'}), 1)
+        # Consistency adds one aggregate over the streak islands
+        self.assertEqual(self._count_queries({'sections': 'summary,trends,consistency'}), 2)
+
+    def test_sections_match_individual_endpoints(self):
+        self._log_workouts(30)
+        params = {'period': '90d', 'granularity': 'weekly'}
+        dashboard = self.client.get(self.url, params).data
+
+        base = '/api/workouts/history/'
+        expected = {
+            'summary': self.client.get(base + 'analytics_summary/', params).data,
+            'trends': self.client.get(base + 'analytics_trends/', params).data,
+            'muscles': self.client.get(base + 'analytics_muscles/', params).data,
+            'consistency': self.client.get(base + 'analytics_consistency/', params).data,
+            'records': self.client.get(base + 'analytics_records/').data,
+        }
+        expected['summary'].pop('period')
+
+        for section, data in expected.items():
+            self.assertEqual(dashboard[section], data, section)
+
+    def test_section_toggles(self):
+        response = self.client.get(self.url, {'sections': 'summary,records'})
+        self.assertEqual(set(response.data), {'period', 'summary', 'records'})
+
+        response = self.client.get(self.url, {'sections': 'summary,bogus'})
+        self.assertEqual(response.status_code, 400)
+
+
+class RollupMaintenanceTests(TestCase):
+    """Incremental rollup deltas must match a full rebuild"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='rolled', password='pass')
+
+    def _rollups(self):
+        return list(WorkoutDailyRollup.objects.filter(user=self.user).order_by('date').values_list(
+            'date', *ROLLUP_FIELDS
+        ))
+
+    def _assert_matches_rebuild(self):
+        live = self._rollups()
+        rebuild_rollups(user=self.user)
+        self.assertEqual(live, self._rollups())
+        return live
+
+    def test_create_move_edit_delete_match_rebuild(self):
+        today = timezone.now().date()
+        first = log_workout(self.user, duration=30, intensity='light', goal='strength', equipment='gym')
+        second = log_workout(self.user, duration=45, intensity='intense', goal='endurance', equipment='home')
+        third = log_workout(self.user, duration=20, intensity='moderate', goal='hypertrophy', equipment='bodyweight')
+        rollups = self._assert_matches_rebuild()
+        self.assertEqual(len(rollups), 1)
+
+        # Move one workout to another day
+        second.workout_date = today - timedelta(days=2)
+        second.save()
+        rollups = self._assert_matches_rebuild()
+        self.assertEqual([row[0] for row in rollups], [today - timedelta(days=2), today])
+
+        # Edit counted fields in place
+        first.duration = 60
+        first.intensity = 'intense'
+        first.goal = 'hypertrophy'
+        first.equipment = 'home'
+        first.save()
+        self._assert_matches_rebuild()
+
+        # Deleting a day's only workout removes its row
+        second.delete()
+        rollups = self._assert_matches_rebuild()
+        self.assertEqual([row[0] for row in rollups], [today])
+
+        third.delete()
+        first.delete()
+        self.assertEqual(self._assert_matches_rebuild(), [])
+
+
+class TrendBucketTests(TestCase):
+    """Weekly and monthly trends are bucketed on calendar boundaries and zero-filled"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='trending', password='pass')
+
+    def _log_on(self, day, duration=30):
+        workout = log_workout(self.user, duration=duration)
+        workout.workout_date = day
+        workout.save()
+
+    def _series(self, start, end, granularity):
+        trends = WorkoutAnalyticsService.get_trends(self.user, start, end, granularity)
+        self.assertEqual(trends['granularity'], granularity)
+        return [(point['date'], point['workouts'], point['duration']) for point in trends['data']]
+
+    def test_weekly_buckets_start_on_monday(self):
+        # Sunday and the following Monday fall in different weeks
+        self._log_on(date(2025, 3, 2), 20)
+        self._log_on(date(2025, 3, 3), 40)
+        self._log_on(date(2025, 3, 17), 50)
+        self.assertEqual(self._series(date(2025, 2, 26), date(2025, 3, 18), 'weekly'), [
+            ('2025-02-24', 1, 20),
+            ('2025-03-03', 1, 40),
+            ('2025-03-10', 0, 0),
+            ('2025-03-17', 1, 50),
+        ])
+
+    def test_monthly_buckets_start_on_the_first(self):
+        self._log_on(date(2025, 1, 31), 20)
+        self._log_on(date(2025, 2, 1), 40)
+        self._log_on(date(2025, 2, 28), 10)
+        self._log_on(date(2025, 4, 1), 50)
+        self.assertEqual(self._series(date(2025, 1, 15), date(2025, 4, 10), 'monthly'), [
+            ('2025-01-01', 1, 20),
+            ('2025-02-01', 2, 50),
+            ('2025-03-01', 0, 0),
+            ('2025-04-01', 1, 50),
+        ])
+        # All-time ranges start at the first active bucket
+        self.assertEqual(self._series(None, date(2025, 2, 10), 'monthly')[0], ('2025-01-01', 1, 20))
+
+    def test_empty_range_is_zero_filled(self):
+        self.assertEqual(self._series(date(2025, 3, 5), date(2025, 3, 20), 'weekly'), [
+            ('2025-03-03', 0, 0), ('2025-03-10', 0, 0), ('2025-03-17', 0, 0),
+        ])
+        self.assertEqual(self._series(None, date(2025, 3, 20), 'weekly'), [])
+
+
+class MilestoneTests(TestCase):
+    """Milestones are dated by the workout whose running total crosses the threshold"""
+
+    def test_milestone_dates(self):
+        user = User.objects.create_user(username='milestoned', password='pass')
+        start = date(2025, 1, 1)
+        points = [100] * 12
+        points[4] = 600    # 1000 cumulative points on the fifth workout
+        points[11] = 3500  # 2500 and 5000 crossed by the same workout
+        # Inserted latest day first, so date order and id order disagree.
+        # Signals are not needed: milestones read the history directly
+        created = WorkoutHistory.objects.bulk_create([
+            WorkoutHistory(
+                user=user, muscles_targeted=['chest'], duration=30, intensity='moderate',
+                goal='strength', equipment='gym', exercises_completed=[], points_earned=value,
+            )
+            for value in reversed(points)
+        ])
+        for days, workout in enumerate(reversed(created)):
+            # workout_date is auto_now_add, so it is set after the insert
+            WorkoutHistory.objects.filter(pk=workout.pk).update(workout_date=start + timedelta(days=days))
+
+        self.assertEqual(WorkoutAnalyticsService.get_milestones(user), [
+            {'type': 'total_points', 'value': 5000, 'achieved_date': '2025-01-12'},
+            {'type': 'total_points', 'value': 2500, 'achieved_date': '2025-01-12'},
+            {'type': 'total_workouts', 'value': 10, 'achieved_date': '2025-01-10'},
+            {'type': 'total_points', 'value': 1000, 'achieved_date': '2025-01-05'},
+        ])
+        self.assertEqual(WorkoutAnalyticsService.get_milestones(User.objects.create_user('idle')), [])
+
+
+class AnalyticsCacheTests(TestCase):
+    """Tests for the versioned per-user analytics cache"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        cache.clear()
+        AnalyticsCache.reset_stats()
+
+    def _summary(self):
+        return AnalyticsCache.call(WorkoutAnalyticsService.get_summary, self.user, None, None)
+
+    def test_hit_until_workout_write(self):
+        log_workout(self.user)
+        self.assertEqual(self._summary()['metrics']['total_workouts'], 1)
+        with self.assertNumQueries(0):
+            self._summary()
+
+        workout = log_workout(self.user)
+        self.assertEqual(self._summary()['metrics']['total_workouts'], 2)
+        workout.delete()
+        self.assertEqual(self._summary()['metrics']['total_workouts'], 1)
+        self.assertEqual(AnalyticsCache.stats()['hits'], 1)
+        self.assertEqual(AnalyticsCache.stats()['misses'], 3)
+
+    def test_evicted_version_is_never_reused(self):
+        self._summary()
+        old_version = AnalyticsCache.get_version(self.user.pk)
+        cache.delete(AnalyticsCache._version_key(self.user.pk))
+        self.assertGreater(AnalyticsCache.get_version(self.user.pk), old_version)
+
+    def test_file_based_backend(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                self._summary()
+                with self.assertNumQueries(0):
+                    self._summary()
+                log_workout(self.user)
+                self.assertEqual(self._summary()['metrics']['total_workouts'], 1)
+                self.assertEqual(AnalyticsCache._timeout(), settings.ANALYTICS_CACHE_TIMEOUT)
+
+    @override_settings(SHARED_CACHE_LOCAL_TIMEOUT=0)
+    def test_per_process_backend_bounds_staleness(self):
+        # Another worker's write never bumps this process's locmem version
+        self.assertFalse(AnalyticsCache.is_shared())
+        self._summary()
+        WorkoutHistory.objects.bulk_create([WorkoutHistory(
+            user=self.user, muscles_targeted=['chest'], duration=30, intensity='moderate',
+            goal='strength', equipment='gym', exercises_completed=[]
+        )])
+        rebuild_rollups(user=self.user)
+        self.assertEqual(self._summary()['metrics']['total_workouts'], 1)
+        self.assertEqual(AnalyticsCache.stats()['hits'], 0)
+
+
+class ConditionalAnalyticsTests(TestCase):
+    """Tests for ETag handling on analytics actions"""
+
+    def setUp(self):
+        # Validators are only sent when every worker shares the analytics version
+        location = tempfile.TemporaryDirectory()
+        self.addCleanup(location.cleanup)
+        shared = override_settings(CACHES={'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': location.name,
+        }})
+        shared.enable()
+        self.addCleanup(shared.disable)
+
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/workouts/history/analytics_summary/'
+        cache.clear()
+        log_workout(self.user)
+
+    def test_matching_etag_skips_aggregation(self):
+        response = self.client.get(self.url, {'period': '7d'})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('private', response['Cache-Control'])
+        etag = response['ETag']
+
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, {'period': '7d'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        # Different params or another action never share a validator
+        self.assertEqual(self.client.get(self.url, {'period': '30d'}, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+        records = '/api/workouts/history/analytics_records/'
+        self.assertEqual(self.client.get(records, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_workout_write_changes_validators(self):
+        response = self.client.get(self.url)
+        etag = response['ETag']
+        # If-Modified-Since alone cannot tell periods apart, so it never answers 304
+        self.assertNotIn('Last-Modified', response)
+        self.assertEqual(
+            self.client.get(self.url, {'period': '7d'}, HTTP_IF_MODIFIED_SINCE=http_date()).status_code, 200
+        )
+
+        log_workout(self.user)
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+        self.assertEqual(response.data['metrics']['total_workouts'], 2)
+
+    def test_per_process_cache_sends_no_validators(self):
+        etag = self.client.get(self.url)['ETag']
+        with override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+
+class AnalyticsPrewarmTests(TestCase):
+    """Tests for the background analytics pre-warmer"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        cache.clear()
+        AnalyticsCache.reset_stats()
+
+    def test_prewarmed_views_are_cache_hits(self):
+        log_workout(self.user)
+        tasks.prewarm_user_analytics(self.user.pk)
+        AnalyticsCache.reset_stats()
+
+        base = '/api/workouts/history/'
+        for period in tasks.PREWARM_PERIODS:
+            for action in ('analytics_summary', 'analytics_trends', 'analytics_consistency'):
+                self.assertEqual(self.client.get(base + action + '/', {'period': period}).status_code, 200)
+        self.assertEqual(AnalyticsCache.stats()['misses'], 0)
+
+    def test_commit_queues_one_prewarm_per_user(self):
+        executor = mock.Mock()
+        with mock.patch.object(tasks, '_get_executor', return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                log_workout(self.user)
+                log_workout(self.user)
+            self.assertEqual(executor.submit.call_count, 1)
+
+            # Once the queued pass starts, the next write queues another
+            with mock.patch.object(tasks, 'prewarm_user_analytics'), \
+                    mock.patch.object(tasks.connections, 'close_all'):
+                tasks._run_prewarm(self.user.pk)
+            with self.captureOnCommitCallbacks(execute=True):
+                log_workout(self.user)
+            self.assertEqual(executor.submit.call_count, 2)
+        tasks._pending.clear()
+
+
+class ExerciseCatalogTests(TestCase):
+    """Tests for the in-memory exercise catalog used by WorkoutGenerator"""
+
+    def setUp(self):
+        cache.clear()
+        create_exercise('Push Up', 'chest', secondary_muscles=['triceps'])
+        create_exercise('Bench Press', 'chest', equipment='barbell')
+        create_exercise('Goblet Squat', 'quads', equipment='kettlebell', secondary_muscles=['glutes'])
+        self.generator = WorkoutGenerator()
+
+    def _names(self, plan):
+        return {exercise['name'] for exercise in plan['exercises']}
+
+    def test_generation_runs_no_queries_once_loaded(self):
+        with self.assertNumQueries(1):
+            get_exercise_catalog()
+        with self.assertNumQueries(0):
+            plan = self.generator.generate_workout(['Chest', 'quadriceps'], 30, 'moderate', 'strength', 'gym')
+        self.assertEqual(self._names(plan), {'Push Up', 'Bench Press', 'Goblet Squat'})
+
+    def test_equipment_tiers_and_compound_fallback(self):
+        plan = self.generator.generate_workout(['chest'], 30, 'light', 'endurance', 'bodyweight')
+        self.assertEqual(self._names(plan), {'Push Up'})
+
+        # Too few muscle matches: top up with compound exercises for the tier
+        plan = self.generator.generate_workout(['calves'], 30, 'light', 'endurance', 'home')
+        self.assertEqual(self._names(plan), {'Push Up', 'Goblet Squat'})
+
+    def test_exercise_writes_invalidate_snapshot(self):
+        catalog = get_exercise_catalog()
+        exercise = create_exercise('Calf Raise', 'calves')
+        self.assertIsNot(get_exercise_catalog(), catalog)
+        self.assertEqual(len(get_exercise_catalog().for_muscle('bodyweight', 'calves')), 1)
+
+        exercise.delete()
+        self.assertEqual(get_exercise_catalog().for_muscle('bodyweight', 'calves'), ())
+
+    @override_settings(SHARED_CACHE_LOCAL_TIMEOUT=0)
+    def test_per_process_cache_expires_snapshot(self):
+        # Another worker's edit: no signal and no version bump reach this process
+        catalog = get_exercise_catalog()
+        Exercise.objects.filter(name='Push Up').update(name='Knee Push Up')
+        reloaded = get_exercise_catalog()
+        self.assertNotEqual(reloaded.version, catalog.version)
+        self.assertIn('Knee Push Up', {exercise.name for exercise in reloaded.exercises})
+
+    @override_settings(SHARED_CACHE_LOCAL_TIMEOUT=0)
+    def test_shared_cache_keeps_snapshot_until_bumped(self):
+        with tempfile.TemporaryDirectory() as location:
+            caches = {'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': location,
+            }}
+            with override_settings(CACHES=caches):
+                catalog = get_exercise_catalog()
+                with self.assertNumQueries(0):
+                    self.assertIs(get_exercise_catalog(), catalog)
+                self.assertEqual(check_shared_cache(None), [])
+
+                # A bump from any process reaches this one through the shared cache
+                bump_shared_version(CATALOG_VERSION_KEY)
+                self.assertIsNot(get_exercise_catalog(), catalog)
+
+    @override_settings(DEBUG=False)
+    def test_per_process_cache_is_flagged(self):
+        self.assertEqual([warning.id for warning in check_shared_cache(None)], ['workouts.W001'])
+
+
+class SeededGenerationTests(TestCase):
+    """Tests for seeded generation and the plan cache"""
+
+    def setUp(self):
+        cache.clear()
+        PlanCache.clear()
+        for i in range(6):
+            create_exercise(f'Chest {i}', 'chest')
+        self.generator = WorkoutGenerator()
+        self.args = (['chest'], 30, 'moderate', 'hypertrophy', 'gym')
+
+    def _ids(self, plan):
+        return [exercise['id'] for exercise in plan['exercises']]
+
+    def test_seed_reproduces_plan_from_cache(self):
+        first = self.generator.generate_workout(*self.args, seed=7)
+        first['exercises'].clear()
+        with self.assertNumQueries(0):
+            again = self.generator.generate_workout(['Chest'], *self.args[1:], seed=7)
+
+        PlanCache.clear()
+        fresh = self.generator.generate_workout(*self.args, seed=7)
+        self.assertEqual(self._ids(again), self._ids(fresh))
+        self.assertEqual(again['muscles_targeted'], ['Chest'])
+        self.assertEqual(PlanCache.stats()['misses'], 1)
+
+    @override_settings(WORKOUT_PLAN_CACHE_SIZE=1)
+    def test_lru_eviction_and_catalog_version(self):
+        self.generator.generate_workout(*self.args, seed=1)
+        self.generator.generate_workout(*self.args, seed=2)
+        self.generator.generate_workout(*self.args, seed=1)
+        self.assertEqual(PlanCache.stats()['hits'], 0)
+        self.assertEqual(PlanCache.stats()['size'], 1)
+
+        # A catalog change makes previously cached plans unreachable
+        create_exercise('Chest 6', 'chest')
+        self.generator.generate_workout(*self.args, seed=1)
+        self.assertEqual(PlanCache.stats()['hits'], 0)
+
+        # Unseeded generations are never cached
+        self.generator.generate_workout(*self.args)
+        self.assertEqual(PlanCache.stats()['misses'], 4)
+
+
+class ExerciseSelectionTests(TestCase):
+    """Tests for duration-fitting exercise selection"""
+
+    def setUp(self):
+        self.exercises = [
+            Exercise(id=i, name=f'Exercise {i}', primary_muscle=muscle, equipment='bodyweight',
+                     secondary_muscles=['abs'] if i % 4 == 0 else [],
+                     sets_min=2 + i % 3, sets_max=5, rest_seconds=30 + 15 * (i % 4))
+            for i, muscle in enumerate(['chest', 'back', 'quads'] * 20)
+        ]
+        self.prescription = (1.0, 1.0, 10)
+
+    def _select(self, budget, muscles=('chest', 'back'), seed=0):
+        catalog = ExerciseCatalog(self.exercises, version=1)
+        return exercise_selection.select_exercises(
+            catalog, list(muscles), 'gym', budget, self.prescription, random.Random(seed)
+        )
+
+    def _check_fits(self, selected, budget, muscles=('chest', 'back')):
+        self.assertLessEqual(sum(cost for _, _, cost in selected), budget)
+        self.assertTrue(set(muscles) <= {exercise.primary_muscle for exercise, _, _ in selected})
+        for exercise, sets, cost in selected:
+            self.assertLessEqual(sets, max(exercise.sets_min, exercise.sets_max))
+            self.assertEqual(cost, sets * (10 * exercise_selection.SECONDS_PER_REP + exercise.rest_seconds))
+
+    def test_plan_fits_budget_and_covers_muscles(self):
+        selected = self._select(1800)
+        self._check_fits(selected, 1800)
+        self.assertGreater(sum(cost for _, _, cost in selected), 1800 * 0.8)
+        self.assertEqual(self._select(1800), selected)
+
+        # A budget below every exercise still yields the best single exercise
+        self.assertEqual(len(self._select(10)), 1)
+
+    def test_pure_python_fallback(self):
+        with mock.patch.object(exercise_selection, 'np', None):
+            self._check_fits(self._select(1800, seed=3), 1800)
+
+
+class ExerciseRecencyTests(TestCase):
+    """Tests for history-aware exercise rotation"""
+
+    def setUp(self):
+        cache.clear()
+        PlanCache.clear()
+        self.user = User.objects.create_user(username='rotation', password='pass')
+        self.chest = [create_exercise(f'Chest {i}', 'chest') for i in range(6)]
+
+    def test_logged_exercises_are_down_weighted(self):
+        recent = self.chest[:3]
+        with self.captureOnCommitCallbacks(execute=True):
+            log_workout(self.user, exercises_completed=[{'id': exercise.id} for exercise in recent])
+
+        weights = recency.recency_weights(recency.get_recency(self.user.pk))
+        self.assertEqual(weights, {exercise.id: recency.RECENCY_MIN_WEIGHT for exercise in recent})
+        later = timezone.now().date() + timedelta(days=7)
+        self.assertEqual(set(recency.recency_weights(recency.get_recency(self.user.pk), later).values()), {0.55})
+
+        plan = WorkoutGenerator().generate_workout(
+            ['chest'], 30, 'moderate', 'hypertrophy', 'bodyweight', recent_exercises=weights
+        )
+        self.assertFalse({exercise['id'] for exercise in plan['exercises']} & {e.id for e in recent})
+
+        # Recency is part of the plan cache key
+        args = (['chest'], 30, 'moderate', 'hypertrophy', 'bodyweight')
+        WorkoutGenerator().generate_workout(*args, seed=1)
+        WorkoutGenerator().generate_workout(*args, seed=1, recent_exercises=weights)
+        self.assertEqual(PlanCache.stats()['hits'], 0)
+
+    @override_settings(EXERCISE_RECENCY_SIZE=2)
+    def test_map_is_bounded_to_most_recent(self):
+        today = timezone.now().date()
+        recency.record_exercises(self.user.pk, [{'id': self.chest[0].id}], today - timedelta(days=2))
+        recency.record_exercises(self.user.pk, [{'id': self.chest[1].id}, {'id': self.chest[2].id}], today)
+        recency.record_exercises(self.user.pk, [{'id': self.chest[0].id}, {'name': 'custom'}], today - timedelta(days=1))
+        self.assertEqual(set(recency.get_recency(self.user.pk)), {self.chest[1].id, self.chest[2].id})
+
+
+class GeneratorBenchmarkTests(TestCase):
+    """Tests for the benchmark_generator command"""
+
+    def test_reports_and_enforces_thresholds(self):
+        create_exercise('Push Up', 'chest')
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as location:
+            path = f'{location}/results.json'
+            call_command('benchmark_generator', '--sizes', '20', '--repeat', '2', '--save', path, stdout=out)
+            with open(path) as results_file:
+                results = json.load(results_file)
+        self.assertIn('within thresholds', out.getvalue())
+        # The synthetic catalog is rolled back
+        self.assertEqual(list(Exercise.objects.values_list('name', flat=True)), ['Push Up'])
+        self.assertEqual(len(results), 27)
+        self.assertEqual({result['queries'] for result in results.values()}, {0})
+
+        with self.assertRaisesMessage(CommandError, 'threshold(s) exceeded'):
+            call_command('benchmark_generator', '--sizes', '20', '--repeat', '2',
+                         '--max-p95-ms', '0', stdout=StringIO(), stderr=StringIO())
+
+
+class BatchGenerationTests(TestCase):
+    """Tests for the generate_batch action"""
+
+    def setUp(self):
+        cache.clear()
+        create_exercise('Push Up', 'chest', secondary_muscles=['triceps'])
+        create_exercise('Squat', 'quads')
+        self.client = APIClient()
+        self.url = '/api/workouts/generated/generate_batch/'
+        self.spec = {
+            'muscles_targeted': ['chest'], 'duration': 30, 'intensity': 'moderate',
+            'goal': 'strength', 'equipment': 'bodyweight',
+        }
+
+    def test_results_in_order_with_item_errors(self):
+        specs = [self.spec, {**self.spec, 'duration': 0}, {**self.spec, 'muscles_targeted': ['quads']}]
+        # One catalog load and one bulk insert for the whole batch
+        with self.assertNumQueries(2):
+            response = self.client.post(self.url, {'workouts': specs}, format='json')
+
+        self.assertEqual(response.status_code, 207)
+        results = response.data['results']
+        self.assertEqual([result['index'] for result in results], [0, 1, 2])
+        self.assertIn('duration', results[1]['errors'])
+        self.assertEqual(results[2]['workout']['workout_plan']['exercises'][0]['name'], 'Squat')
+        self.assertEqual(GeneratedWorkout.objects.count(), 2)
+        self.assertEqual(
+            sorted(GeneratedWorkout.objects.values_list('id', flat=True)),
+            sorted([results[0]['workout']['id'], results[2]['workout']['id']])
+        )
+
+    def test_all_valid_and_envelope_errors(self):
+        response = self.client.post(self.url, {'workouts': [self.spec] * 3}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data['results']), 3)
+
+        self.assertEqual(self.client.post(self.url, {'workouts': []}, format='json').status_code, 400)
+        self.assertEqual(self.client.post(self.url, {'workouts': [self.spec] * 51}, format='json').status_code, 400)
+
+
+class CompactPlanStorageTests(TestCase):
+    """Tests for reference-based plan storage and read-time hydration"""
+
+    def setUp(self):
+        cache.clear()
+        self.push_up = create_exercise('Push Up', 'chest', tips=['Brace'], image_url='https://img/push.png')
+        self.user = User.objects.create_user(username='compact', password='pass')
+        self.client = APIClient()
+
+    def test_generated_plan_stored_compact_and_hydrated(self):
+        spec = {
+            'muscles_targeted': ['chest'], 'duration': 30, 'intensity': 'moderate',
+            'goal': 'strength', 'equipment': 'bodyweight',
+        }
+        response = self.client.post('/api/workouts/generated/generate/', spec, format='json')
+        self.assertEqual(response.status_code, 201)
+        exercise = response.data['workout_plan']['exercises'][0]
+        self.assertEqual(exercise['name'], 'Push Up')
+        self.assertEqual(exercise['image_url'], 'https://img/push.png')
+
+        stored = GeneratedWorkout.objects.get().workout_plan['exercises'][0]
+        self.assertEqual(set(stored), {'id', 'sets', 'reps', 'rest_seconds'})
+
+        url = f"/api/workouts/generated/{response.data['id']}/"
+        self.assertEqual(self.client.get(url).data['workout_plan'], response.data['workout_plan'])
+        compact = self.client.get(url, {'hydrate': 'false'}).data['workout_plan']['exercises'][0]
+        self.assertEqual(compact, stored)
+
+    def test_logged_exercises_are_stored_as_submitted(self):
+        self.client.force_authenticate(self.user)
+        exercises = [
+            {'id': self.push_up.id, 'name': 'Push Up', 'tips': ['Go slow'], 'sets': 3, 'completed': True},
+            {'id': 9999, 'name': 'Custom', 'sets': 1},
+        ]
+        response = self.client.post('/api/workouts/history/', {
+            'muscles_targeted': ['chest'], 'duration': 30, 'intensity': 'moderate',
+            'goal': 'strength', 'equipment': 'bodyweight', 'exercises_completed': exercises,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(WorkoutHistory.objects.get().exercises_completed, exercises)
+
+        # History is a record: catalog renames and deletions never rewrite it
+        self.push_up.name = 'Knee Push Up'
+        self.push_up.save()
+        url = f"/api/workouts/history/{response.data['id']}/"
+        self.assertEqual(self.client.get(url).data['exercises_completed'], exercises)
+        self.push_up.delete()
+        self.assertEqual(self.client.get(url).data['exercises_completed'], exercises)
+
+
+@override_settings(GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS=30)
+class GeneratedWorkoutRetentionTests(TestCase):
+    """Tests for generated plan retention and purging"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='retention', password='pass')
+        now = timezone.now()
+        self.plans = {
+            'old_anonymous': self._plan(None, now - timedelta(hours=25)),
+            'new_anonymous': self._plan(None, now - timedelta(hours=1)),
+            'old_unsaved': self._plan(self.user, now - timedelta(days=31)),
+            'old_saved': self._plan(self.user, now - timedelta(days=31), is_saved=True),
+            'new_unsaved': self._plan(self.user, now - timedelta(days=2)),
+        }
+
+    def _plan(self, user, created_at, **fields):
+        plan = GeneratedWorkout.objects.create(
+            user=user, muscles_targeted=['chest'], duration=30, intensity='moderate',
+            goal='strength', equipment='gym', workout_plan={'exercises': []}, **fields
+        )
+        GeneratedWorkout.objects.filter(pk=plan.pk).update(created_at=created_at)
+        return plan.pk
+
+    def test_purge_applies_each_policy_in_batches(self):
+        self.assertEqual(purge_generated_workouts(dry_run=True), {'anonymous': 1, 'unsaved': 1})
+        self.assertEqual(GeneratedWorkout.objects.count(), 5)
+
+        self._plan(None, timezone.now() - timedelta(days=3))
+        self.assertEqual(purge_generated_workouts(batch_size=1), {'anonymous': 2, 'unsaved': 1})
+        self.assertEqual(
+            set(GeneratedWorkout.objects.values_list('pk', flat=True)),
+            {self.plans['new_anonymous'], self.plans['old_saved'], self.plans['new_unsaved']}
+        )
+
+    @override_settings(GENERATED_WORKOUT_ANONYMOUS_RETENTION_HOURS=0)
+    def test_disabled_policy_and_command(self):
+        out = StringIO()
+        call_command('purge_generated_workouts', '--batch-size', '2', stdout=out)
+        self.assertIn('Deleted 1 unsaved plans', out.getvalue())
+        self.assertNotIn('anonymous', out.getvalue())
+        self.assertTrue(GeneratedWorkout.objects.filter(pk=self.plans['old_anonymous']).exists())
+
+    @override_settings(GENERATED_WORKOUT_UNSAVED_RETENTION_DAYS=0)
+    def test_unsaved_policy_can_be_disabled(self):
+        self.assertEqual(purge_generated_workouts(dry_run=True), {'anonymous': 1})
+
+    def test_save_plan_action(self):
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f"/api/workouts/generated/{self.plans['old_unsaved']}/"
+
+        response = client.post(url + 'save_plan/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_saved'])
+        self.assertEqual(purge_generated_workouts(dry_run=True), {'anonymous': 1, 'unsaved': 0})
+
+        self.assertFalse(client.post(url + 'unsave_plan/').data['is_saved'])
+        self.assertEqual(purge_generated_workouts(dry_run=True), {'anonymous': 1, 'unsaved': 1})
+
+        anonymous_url = f"/api/workouts/generated/{self.plans['old_anonymous']}/save_plan/"
+        self.assertEqual(APIClient().post(anonymous_url).status_code, 400)
+
+    @override_settings(GENERATED_WORKOUT_PERSIST_ANONYMOUS=False)
+    def test_anonymous_plans_returned_inline(self):
+        cache.clear()
+        create_exercise('Push Up', 'chest')
+        spec = {
+            'muscles_targeted': ['chest'], 'duration': 30, 'intensity': 'moderate',
+            'goal': 'strength', 'equipment': 'bodyweight',
+        }
+        client = APIClient()
+        response = client.post('/api/workouts/generated/generate/', spec, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.data['id'])
+        self.assertEqual(response.data['workout_plan']['exercises'][0]['name'], 'Push Up')
+        self.assertEqual(GeneratedWorkout.objects.count(), 5)
+
+        client.force_authenticate(self.user)
+        response = client.post('/api/workouts/generated/generate/', spec, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(GeneratedWorkout.objects.count(), 6)
+
+
+class EnrollmentDayPlanTests(TestCase):
+    """Tests for pre-generated program day plans"""
+
+    def setUp(self):
+        cache.clear()
+        create_exercise('Push Up', 'chest')
+        self.user = User.objects.create_user(username='enrolled', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.program = WorkoutProgram.objects.create(
+            name='Cut', description='', weeks=1, days_per_week=3,
+            difficulty='beginner', goal='weight_loss', equipment_needed='bodyweight'
+        )
+        day = {'program': self.program, 'muscles_targeted': ['chest'], 'duration': 30, 'intensity': 'moderate'}
+        self.generated = ProgramDay.objects.create(week_number=1, day_number=1, name='Push', **day)
+        ProgramDay.objects.create(week_number=1, day_number=2, name='Fixed', exercise_template=[], **day)
+        ProgramDay.objects.create(week_number=1, day_number=3, name='Rest', is_rest_day=True, **day)
+
+    def test_enroll_queues_materialization(self):
+        executor = mock.Mock()
+        with mock.patch.object(tasks, '_get_executor', return_value=executor):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post('/api/workouts/enrollments/enroll/', {'program_id': self.program.id})
+        self.assertEqual(response.status_code, 201)
+        executor.submit.assert_called_once_with(tasks._run_materialize, response.data['id'])
+
+    def test_plans_materialized_once_and_served(self):
+        enrollment = UserProgramEnrollment.objects.create(user=self.user, program=self.program)
+        self.assertEqual(materialize_enrollment_plans(enrollment.pk), 1)
+        self.assertEqual(materialize_enrollment_plans(enrollment.pk), 0)
+
+        plan = EnrollmentDayPlan.objects.get(enrollment=enrollment)
+        self.assertEqual(plan.program_day, self.generated)
+        # weight_loss programs use the endurance rep scheme
+        self.assertEqual(plan.workout_plan['goal'], 'endurance')
+
+        response = self.client.get('/api/workouts/enrollments/active/')
+        generated_plan = response.data['next_workout_day']['generated_plan']
+        self.assertEqual(generated_plan['exercises'][0]['name'], 'Push Up')
+
+        response = self.client.get(f'/api/workouts/programs/{self.program.id}/schedule/')
+        days = response.data['schedule'][0]['days']
+        self.assertEqual(days[0]['generated_plan'], generated_plan)
+        self.assertEqual([day['generated_plan'] for day in days[1:]], [None, None])
+
+
+class ProfileStatsTests(TestCase):
+    """Tests for the single-UPDATE profile mutation on workout creation"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='profiled', password='pass')
+        # The rule index is process-wide: do not let it outlive the rolled-back test data
+        self.addCleanup(invalidate_achievement_index)
+        Achievement.objects.create(
+            name='Two Down', description='', category='consistency', tier='bronze', icon='*',
+            color='blue', requirement_type='total_workouts', requirement_value=2, points=60
+        )
+
+    def test_sequential_workouts_update_profile_once_each(self):
+        for _ in range(3):
+            with CaptureQueriesContext(connection) as captured:
+                workout = log_workout(self.user)
+            profile_updates = [
+                query for query in captured.captured_queries
+                if query['sql'].startswith('UPDATE') and UserProfile._meta.db_table in query['sql']
+            ]
+            self.assertEqual(len(profile_updates), 1)
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.total_workouts, 3)
+        self.assertEqual(profile.total_points, 3 * workout.points_earned + 60)
+        self.assertEqual(profile.level, profile.calculate_level())
+        self.assertEqual((profile.current_streak, profile.longest_streak), (1, 1))
+        self.assertEqual(profile.last_workout_date, workout.workout_date)
+        self.assertEqual(UserAchievement.objects.filter(user=self.user).count(), 1)
+        # A loaded user.profile is refreshed
+        self.assertEqual(workout.user.profile.total_workouts, 3)
+
+    def test_updates_through_stale_instances_both_land(self):
+        # Two request-local copies of the user, both with the profile loaded before any workout
+        first_user = User.objects.get(pk=self.user.pk)
+        second_user = User.objects.get(pk=self.user.pk)
+        self.assertEqual((first_user.profile.total_workouts, second_user.profile.total_workouts), (0, 0))
+
+        first = log_workout(first_user)
+        second = log_workout(second_user)
+
+        profile = UserProfile.objects.get(user=self.user)
+        self.assertEqual(profile.total_workouts, 2)
+        self.assertEqual(profile.total_points, first.points_earned + second.points_earned + 60)
+        self.assertEqual(second_user.profile.total_workouts, 2)
+
+
+class ProfileStatsConcurrencyTests(TransactionTestCase):
+    """Concurrent workout logging must not lose profile increments"""
+
+    THREADS = 8
+    WORKOUTS_PER_THREAD = 5
+
+    def setUp(self):
+        # Rows are flushed between tests: never evaluate against a stale rule index
+        invalidate_achievement_index()
+        self.addCleanup(invalidate_achievement_index)
+
+    @staticmethod
+    def _profile_updates(captured):
+        return [
+            query['sql'] for query in captured.captured_queries
+            if query['sql'].startswith('UPDATE') and UserProfile._meta.db_table in query['sql']
+        ]
+
+    def test_interleaved_update_keeps_both_increments(self):
+        user = User.objects.create_user(username='interleaved', password='pass')
+        get_streaks = profile_stats.get_streaks
+        interleaved = []
+
+        def apply_another_workout(user_id):
+            # Runs after the outer update read the profile and before it writes it
+            if not interleaved:
+                interleaved.append(None)
+                interleaved[0] = log_workout(User.objects.get(pk=user_id))
+            return get_streaks(user_id)
+
+        with CaptureQueriesContext(connection) as captured:
+            with mock.patch.object(profile_stats, 'get_streaks', side_effect=apply_another_workout):
+                workout = log_workout(user)
+
+        # One UPDATE per workout, incrementing the stored counters rather than
+        # writing back the values read before the other workout landed
+        updates = self._profile_updates(captured)
+        self.assertEqual(len(updates), 2)
+        for sql in updates:
+            self.assertRegex(sql, r'"total_workouts" = \("[a-z_]+"\."total_workouts" \+ ')
+            self.assertRegex(sql, r'"total_points" = \("[a-z_]+"\."total_points" \+ ')
+
+        profile = UserProfile.objects.get(user=user)
+        self.assertEqual(profile.total_workouts, 2)
+        self.assertEqual(profile.total_points, workout.points_earned + interleaved[0].points_earned)
+        self.assertEqual(profile.level, profile.calculate_level())
+
+    @skipUnless(connection.features.has_select_for_update, 'needs SELECT ... FOR UPDATE')
+    def test_concurrent_workouts_lose_no_updates(self):
+        user = User.objects.create_user(username='stressed', password='pass')
+        barrier = threading.Barrier(self.THREADS)
+        errors = []
+
+        def log_many():
+            try:
+                barrier.wait()
+                for _ in range(self.WORKOUTS_PER_THREAD):
+                    with transaction.atomic():
+                        log_workout(User.objects.get(pk=user.pk))
+            except Exception as error:  # surfaced by the assertion below
+                errors.append(error)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=log_many) for _ in range(self.THREADS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        total = self.THREADS * self.WORKOUTS_PER_THREAD
+        profile = UserProfile.objects.get(user=user)
+        points = sum(WorkoutHistory.objects.filter(user=user).values_list('points_earned', flat=True))
+        self.assertEqual(profile.total_workouts, total)
+        self.assertEqual(profile.total_points, points)
+        self.assertEqual(profile.level, profile.calculate_level())
+
+
+class UserStatsCountersTests(TestCase):
+    """Tests for the incrementally maintained per-user lifetime counters"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='counted', password='pass')
+
+    def _assert_matches_rebuild(self):
+        counters = get_counters(self.user)
+        live = {field: getattr(counters, field) for field in COUNTER_FIELDS}
+        rebuild_counters(user=self.user)
+        rebuilt = get_counters(self.user)
+        self.assertEqual(live, {field: getattr(rebuilt, field) for field in COUNTER_FIELDS})
+        return rebuilt
+
+    def test_writes_keep_counters_in_sync(self):
+        today = timezone.now().date()
+        first = log_workout(self.user, duration=30, intensity='intense')
+        second = log_workout(self.user, duration=45, goal='endurance')
+        log_workout(self.user, duration=20, intensity='light')
+        # workout_date is set on creation; backdate through a signalled update
+        second.workout_date = today - timedelta(days=1)
+        second.save()
+        counters = self._assert_matches_rebuild()
+        self.assertEqual((counters.workout_count, counters.total_duration), (3, 95))
+        self.assertEqual((counters.intense_count, counters.endurance_count, counters.active_days), (1, 1, 2))
+
+        # Moving a day's only workout onto an active day deactivates it
+        second.workout_date = today
+        second.intensity = 'intense'
+        second.save()
+        counters = self._assert_matches_rebuild()
+        self.assertEqual((counters.intense_count, counters.active_days), (2, 1))
+
+        first.delete()
+        counters = self._assert_matches_rebuild()
+        self.assertEqual((counters.workout_count, counters.total_duration, counters.intense_count), (2, 65, 1))
+
+        # Deleting the user cascades without recreating a counters row
+        self.user.delete()
+        self.assertFalse(UserStatsCounters.objects.exists())
+
+    def test_leaderboard_and_coach_read_counters(self):
+        other = User.objects.create_user(username='rival', password='pass')
+        log_workout(other)
+        for _ in range(12):
+            log_workout(self.user, duration=10, intensity='intense')
+
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        with CaptureQueriesContext(connection) as captured:
+            response = client.get('/api/accounts/leaderboard/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(captured), 1)
+        entry = next(item for item in response.data if item['username'] == 'counted')
+        self.assertEqual((entry['total_duration'], entry['intense_workouts'], entry['active_days']), (120, 12, 1))
+
+        # Lifetime total, not the number of recent workouts listed
+        context = UserContextSerializer.get_user_context(self.user)
+        self.assertEqual(context['total_workouts'], 12)
+        self.assertEqual(context['workout_stats']['intensity']['intense'], 12)
+
+
+class MuscleIndexTests(TestCase):
+    """Tests for incremental maintenance of the normalized muscle index"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='indexed', password='pass')
+
+    def _index(self):
+        return sorted(WorkoutMuscle.objects.filter(user=self.user).values_list(
+            'workout_id', 'workout_date', 'muscle', 'duration'
+        ))
+
+    def _assert_matches_rebuild(self):
+        live = self._index()
+        rebuild_muscle_index(user=self.user)
+        self.assertEqual(live, self._index())
+        return live
+
+    def test_writes_keep_index_in_sync(self):
+        first = log_workout(self.user, muscles_targeted=['Chest', 'quadriceps', 'chest'])
+        second = log_workout(self.user, muscles_targeted=['back', 'core'])
+        index = self._assert_matches_rebuild()
+        self.assertEqual(
+            [(workout_id, muscle) for workout_id, _, muscle, _ in index],
+            [(first.pk, 'chest'), (first.pk, 'quads'), (second.pk, 'abs'), (second.pk, 'back')]
+        )
+
+        first.muscles_targeted = ['shoulders']
+        first.save()
+        second.workout_date = second.workout_date - timedelta(days=3)
+        second.duration = 50
+        second.save()
+        index = self._assert_matches_rebuild()
+        self.assertIn((first.pk, first.workout_date, 'shoulders', 30), index)
+        self.assertIn((second.pk, second.workout_date, 'back', 50), index)
+
+        second.delete()
+        self.assertEqual(self._assert_matches_rebuild(), [(first.pk, first.workout_date, 'shoulders', 30)])
+
+    def test_long_muscle_names_are_truncated(self):
+        name = 'a' * 40
+        workout = log_workout(self.user, muscles_targeted=[name, name + 'b'])
+        self.assertEqual(
+            list(WorkoutMuscle.objects.filter(workout=workout).values_list('muscle', flat=True)),
+            ['a' * MUSCLE_NAME_MAX_LENGTH]
+        )
+
+
+class MuscleCoOccurrenceTests(TestCase):
+    """Tests for incremental maintenance of the muscle-pair matrix"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='paired', password='pass')
+
+    def _pairs(self):
+        counts = get_pair_counts(self.user)
+        return {MUSCLE_PAIRS[slot]: count for slot, count in enumerate(counts) if count}
+
+    def _assert_matches_rebuild(self):
+        live = self._pairs()
+        rebuild_muscle_index(user=self.user)
+        self.assertEqual(live, self._pairs())
+        return live
+
+    def test_writes_keep_matrix_in_sync(self):
+        first = log_workout(self.user, muscles_targeted=['chest', 'triceps', 'shoulders'])
+        second = log_workout(self.user, muscles_targeted=['Chest', 'triceps'])
+        log_workout(self.user, muscles_targeted=['quads'])
+        self.assertEqual(self._assert_matches_rebuild(), {
+            ('chest', 'shoulders'): 1, ('chest', 'triceps'): 2, ('shoulders', 'triceps'): 1,
+        })
+
+        first.muscles_targeted = ['back', 'biceps']
+        first.save()
+        self.assertEqual(self._assert_matches_rebuild(), {('chest', 'triceps'): 1, ('back', 'biceps'): 1})
+
+        second.delete()
+        self.assertEqual(self._assert_matches_rebuild(), {('back', 'biceps'): 1})
+
+    def test_missing_matrix_is_built_from_existing_history(self):
+        log_workout(self.user, muscles_targeted=['chest', 'triceps'])
+        # e.g. history imported before matrices were maintained
+        MuscleCoOccurrence.objects.filter(user=self.user).delete()
+
+        log_workout(self.user, muscles_targeted=['chest', 'triceps'])
+        matrix = MuscleCoOccurrence.objects.get(user=self.user)
+        self.assertEqual(
+            {MUSCLE_PAIRS[slot]: count for slot, count in enumerate(matrix.pair_counts) if count},
+            {('chest', 'triceps'): 2}
+        )
+
+
+class PersonalRecordTests(TestCase):
+    """Incremental personal records must match a rebuild from history"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='recorded', password='pass')
+
+    def _assert_matches_rebuild(self):
+        live = get_user_records(self.user)
+        rebuild_records(user=self.user)
+        self.assertEqual(live, get_user_records(self.user))
+        return live
+
+    def test_deleted_or_lowered_holder_is_recomputed(self):
+        short = log_workout(self.user, duration=30)
+        long = log_workout(self.user, duration=60)
+        self.assertEqual(self._assert_matches_rebuild()['longest_workout']['workout_id'], long.pk)
+
+        long.delete()
+        self.assertEqual(self._assert_matches_rebuild()['longest_workout']['workout_id'], short.pk)
+
+        longer = log_workout(self.user, duration=90)
+        longer.duration = 20
+        longer.save()
+        records = self._assert_matches_rebuild()
+        self.assertEqual(records['longest_workout'], {
+            'duration': 30, 'date': short.workout_date.isoformat(), 'workout_id': short.pk,
+        })
+
+    def test_ties_go_to_the_earliest_workout(self):
+        today = timezone.now().date()
+        first = log_workout(self.user, exercises_completed=[{'id': 1}, {'id': 2}])
+        second = log_workout(self.user, exercises_completed=[{'id': 3}, {'id': 4}])
+        self.assertEqual(self._assert_matches_rebuild()['most_exercises']['workout_id'], first.pk)
+
+        # A tying workout moved earlier takes the record
+        second.workout_date = today - timedelta(days=1)
+        second.save()
+        self.assertEqual(self._assert_matches_rebuild()['most_exercises']['workout_id'], second.pk)
+
+        # The holder moved later hands it back to the now earliest tie
+        second.workout_date = today + timedelta(days=1)
+        second.save()
+        self.assertEqual(self._assert_matches_rebuild()['most_exercises']['workout_id'], first.pk)
+
+    def test_random_edits_match_rebuild(self):
+        rng = random.Random(7)
+        today = timezone.now().date()
+        workouts = [
+            log_workout(self.user, duration=rng.choice((20, 30, 45)),
+                        exercises_completed=[{'id': 1}] * rng.randint(0, 3))
+            for _ in range(12)
+        ]
+        for _ in range(40):
+            workout = rng.choice(workouts)
+            if rng.random() < 0.15 and len(workouts) > 2:
+                workouts.remove(workout)
+                workout.delete()
+            else:
+                workout.duration = rng.choice((20, 30, 45))
+                workout.exercises_completed = [{'id': 1}] * rng.randint(0, 3)
+                workout.workout_date = today - timedelta(days=rng.randint(0, 4))
+                workout.save()
+            self._assert_matches_rebuild()
+
+
+class StreakTests(TestCase):
+    """Tests for the incrementally maintained streak islands"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        self.today = timezone.now().date()
+
+    def _log_on(self, days_ago):
+        workout = log_workout(self.user)
+        workout.workout_date = self.today - timedelta(days=days_ago)
+        workout.save()
+        return workout
+
+    def _islands(self):
+        return list(WorkoutStreak.objects.filter(user=self.user).order_by('start_date').values_list(
+            'start_date', 'end_date', 'length'
+        ))
+
+    def test_backdated_day_merges_and_delete_splits(self):
+        workouts = {days_ago: self._log_on(days_ago) for days_ago in (0, 1, 3, 4)}
+        self.assertEqual(get_streaks(self.user.pk)['current_streak'], 2)
+
+        bridge = self._log_on(2)
+        self.assertEqual(len(self._islands()), 1)
+        self.user.profile.refresh_from_db()
+        self.assertEqual((self.user.profile.current_streak, self.user.profile.longest_streak), (5, 5))
+
+        bridge.delete()
+        workouts[0].delete()
+        self.assertEqual(get_streaks(self.user.pk)['current_streak'], 1)
+        self.assertEqual(get_streaks(self.user.pk)['longest_streak'], 2)
+
+        incremental = self._islands()
+        rebuild_streaks(user=self.user)
+        self.assertEqual(self._islands(), incremental)
+
+    def test_current_streak_expires_without_writes(self):
+        self._log_on(0)
+        self._log_on(1)
+        tomorrow = self.today + timedelta(days=1)
+        self.assertEqual(get_streaks(self.user.pk, today=tomorrow)['current_streak'], 2)
+        later = self.today + timedelta(days=2)
+        self.assertEqual(get_streaks(self.user.pk, today=later)['current_streak'], 0)
+        self.assertEqual(get_streaks(self.user.pk, today=later)['longest_streak'], 2)
+
+
+class CompactCalendarTests(TestCase):
+    """The compact calendar must decode to the full per-day calendar"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = '/api/workouts/history/analytics_consistency/'
+        cache.clear()
+
+    def _decode(self, compact):
+        bits = int.from_bytes(base64.b64decode(compact['bitmap']), 'little')
+        start = date.fromisoformat(compact['start'])
+        active = iter(zip(compact['workout_counts'], compact['total_points']))
+        calendar = []
+        for n in range(compact['days']):
+            workout_count, total_points = next(active) if bits >> n & 1 else (0, 0)
+            calendar.append({
+                'date': (start + timedelta(days=n)).isoformat(),
+                'has_workout': workout_count > 0,
+                'workout_count': workout_count,
+                'total_points': total_points,
+            })
+        return calendar
+
+    def test_compact_matches_full_across_years(self):
+        end = date(2025, 1, 10)
+        for days_ago in (0, 3, 3, 9, 15, 40):
+            workout = log_workout(self.user, points_earned=days_ago + 5)
+            workout.workout_date = end - timedelta(days=days_ago)
+            workout.save()
+        log_workout(self.user).delete()
+
+        params = {'start_date': '2024-11-20', 'end_date': end.isoformat()}
+        full = self.client.get(self.url, params).data
+        compact = self.client.get(self.url, {**params, 'calendar_format': 'compact'}).data
+
+        self.assertNotIn('workout_calendar', compact)
+        self.assertNotIn('compact_calendar', full)
+        self.assertEqual(self._decode(compact['compact_calendar']), full['workout_calendar'])
+        self.assertEqual(compact['day_of_week_breakdown'], full['day_of_week_breakdown'])
+        self.assertEqual(self.client.get(self.url, {'calendar_format': 'svg'}).status_code, 400)
+
+    def test_reversed_range_is_empty(self):
+        log_workout(self.user)
+        today = timezone.now().date()
+        params = {
+            'start_date': today.isoformat(),
+            'end_date': (today - timedelta(days=5)).isoformat(),
+            'calendar_format': 'compact',
+        }
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['compact_calendar']['days'], 0)
+        self.assertEqual(self._decode(response.data['compact_calendar']), [])
+
+
+@skipIf(np is None, 'NumPy is not installed')
+class ColumnarEngineTests(TestCase):
+    """The NumPy columnar engine must match the ORM engine exactly"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='athlete', password='password123')
+        today = timezone.now().date()
+        for i in range(40):
+            workout = log_workout(
+                self.user,
+                muscles_targeted=[['Chest', 'triceps'], ['quadriceps', 'core'], ['neck'], []][i % 4],
+                duration=10 + i,
+                intensity=['light', 'moderate', 'intense'][i % 3],
+                goal=[None, 'strength', 'endurance'][i % 3],
+                points_earned=i * 7,
+            )
+            WorkoutHistory.objects.filter(pk=workout.pk).update(workout_date=today - timedelta(days=i * 5))
+        rebuild_rollups(user=self.user)
+        rebuild_muscle_index(user=self.user)
+
+    def test_results_match_orm_engine(self):
+        today = timezone.now().date()
+        for start_date in (None, today - timedelta(days=30), today - timedelta(days=90)):
+            for granularity in ('daily', 'weekly', 'monthly'):
+                args = (self.user, start_date, today, granularity, 5)
+                self.assertEqual(
+                    ColumnarAnalyticsService.get_dashboard(*args),
+                    WorkoutAnalyticsService.get_dashboard(*args)
+                )
+            for method, extra in (('get_summary', ()), ('get_consistency', ()),
+                                  ('get_muscle_analytics', (5,)), ('get_trends', ('weekly',))):
+                args = (self.user, start_date, today, *extra)
+                self.assertEqual(
+                    getattr(ColumnarAnalyticsService, method)(*args),
+                    getattr(WorkoutAnalyticsService, method)(*args),
+                    method
+                )
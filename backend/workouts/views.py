@@ -3,6 +3,8 @@ from rest_framework.decorators import action
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+from django.conf import settings
+from django.db import transaction
 from django.utils import timezone
 from .models import (
     WorkoutHistory, GeneratedWorkout,
@@ -13,11 +15,13 @@ from .serializers import (
     WorkoutHistorySerializer,
     GeneratedWorkoutSerializer,
     WorkoutGenerationRequestSerializer,
+    WorkoutBatchGenerationRequestSerializer,
     AnalyticsSummarySerializer,
     TrendsDataSerializer,
     MuscleAnalyticsSerializer,
     ConsistencyDataSerializer,
     PersonalRecordsSerializer,
+    AnalyticsDashboardSerializer,
     WorkoutProgramListSerializer,
     WorkoutProgramDetailSerializer,
     ProgramDaySerializer,
@@ -28,7 +32,16 @@ from .serializers import (
     ProgramDayCompletionSerializer,
 )
 from .workout_generator import WorkoutGenerator
-from .analytics import WorkoutAnalyticsService
+from .exercise_catalog import get_exercise_catalog
+from .plan_storage import compact_plan
+from .analytics import (
+    WorkoutAnalyticsService, DASHBOARD_SECTIONS, CALENDAR_FORMATS, get_analytics_service
+)
+from .analytics_cache import AnalyticsCache
+from .conditional import conditional_analytics
+from .program_plans import day_plans
+from .recency import user_recency_weights
+from .tasks import schedule_enrollment_plans
 
 
 # ============== Program ViewSets ==============
@@ -60,6 +73,12 @@ class WorkoutProgramViewSet(viewsets.ReadOnlyModelViewSet):
         """Get full schedule/calendar for a program"""
         program = self.get_object()
         days = program.program_days.all()
+
+        # Pre-generated plans of the user's active enrollment, if any
+        enrollment = None
+        if request.user.is_authenticated:
+            enrollment = program.enrollments.filter(user=request.user, status='active').first()
+        context = {'day_plans': day_plans(enrollment)}
         
         # Organize by week
         schedule = {}
@@ -70,7 +89,7 @@ class WorkoutProgramViewSet(viewsets.ReadOnlyModelViewSet):
                     'week_number': day.week_number,
                     'days': []
                 }
-            schedule[week_key]['days'].append(ProgramDaySerializer(day).data)
+            schedule[week_key]['days'].append(ProgramDaySerializer(day, context=context).data)
         
         return Response({
             'program_id': program.id,
@@ -135,6 +154,9 @@ class UserProgramEnrollmentViewSet(viewsets.ModelViewSet):
             current_week=1,
             current_day=1
         )
+
+        # Pre-generate the plans of generated program days once the enrollment is committed
+        transaction.on_commit(lambda: schedule_enrollment_plans(enrollment.pk))
         
         return Response(
             UserProgramEnrollmentSerializer(enrollment).data,
@@ -363,6 +385,7 @@ class WorkoutHistoryViewSet(viewsets.ModelViewSet):
         return response
 
     @action(detail=False, methods=['get'])
+    @conditional_analytics
     def analytics_summary(self, request):
         """Get analytics summary for user's workouts"""
         # Parse query parameters
@@ -376,8 +399,8 @@ class WorkoutHistoryViewSet(viewsets.ModelViewSet):
         )
 
         # Get summary data
-        summary_data = WorkoutAnalyticsService.get_summary(
-            request.user, start_date, end_date
+        summary_data = AnalyticsCache.call(
+            get_analytics_service().get_summary, request.user, start_date, end_date
         )
 
         # Add period info
@@ -394,6 +417,7 @@ class WorkoutHistoryViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_analytics
     def analytics_trends(self, request):
         """Get workout trends over time"""
         # Parse query parameters
@@ -408,14 +432,15 @@ class WorkoutHistoryViewSet(viewsets.ModelViewSet):
         )
 
         # Get trends data
-        trends_data = WorkoutAnalyticsService.get_trends(
-            request.user, start_date, end_date, granularity
+        trends_data = AnalyticsCache.call(
+            get_analytics_service().get_trends, request.user, start_date, end_date, granularity
         )
 
         serializer = TrendsDataSerializer(trends_data)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_analytics
     def analytics_muscles(self, request):
         """Get muscle group analytics"""
         # Parse query parameters
@@ -430,43 +455,100 @@ class WorkoutHistoryViewSet(viewsets.ModelViewSet):
         )
 
         # Get muscle analytics
-        muscle_data = WorkoutAnalyticsService.get_muscle_analytics(
-            request.user, start_date, end_date, top_n
+        muscle_data = AnalyticsCache.call(
+            get_analytics_service().get_muscle_analytics, request.user, start_date, end_date, top_n
         )
 
         serializer = MuscleAnalyticsSerializer(muscle_data)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_analytics
     def analytics_consistency(self, request):
         """Get consistency and calendar data"""
         # Parse query parameters
         period = request.query_params.get('period', '90d')
+        calendar_format = request.query_params.get('calendar_format', 'full')
         start_date_str = request.query_params.get('start_date')
         end_date_str = request.query_params.get('end_date')
 
+        if calendar_format not in CALENDAR_FORMATS:
+            return Response(
+                {'error': f"calendar_format must be one of: {', '.join(CALENDAR_FORMATS)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
         # Parse dates
         start_date, end_date, _ = WorkoutAnalyticsService.parse_period(
             period, start_date_str, end_date_str
         )
 
         # Get consistency data
-        consistency_data = WorkoutAnalyticsService.get_consistency(
-            request.user, start_date, end_date
+        consistency_data = AnalyticsCache.call(
+            get_analytics_service().get_consistency, request.user, start_date, end_date, calendar_format
         )
 
         serializer = ConsistencyDataSerializer(consistency_data)
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @conditional_analytics
     def analytics_records(self, request):
         """Get personal records and milestones"""
         # Get records data
-        records_data = WorkoutAnalyticsService.get_records(request.user)
+        records_data = AnalyticsCache.call(get_analytics_service().get_records, request.user)
 
         serializer = PersonalRecordsSerializer(records_data)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'])
+    @conditional_analytics
+    def analytics_dashboard(self, request):
+        """Get summary, trends, muscles, consistency and records in one response"""
+        # Parse query parameters
+        period = request.query_params.get('period', '30d')
+        granularity = request.query_params.get('granularity', 'daily')
+        top_n = int(request.query_params.get('top_n', 10))
+        start_date_str = request.query_params.get('start_date')
+        end_date_str = request.query_params.get('end_date')
+
+        # Per-section toggles, e.g. ?sections=summary,trends
+        sections_param = request.query_params.get('sections')
+        if sections_param:
+            requested = {section.strip() for section in sections_param.split(',') if section.strip()}
+            unknown = sorted(requested - set(DASHBOARD_SECTIONS))
+            if unknown:
+                return Response(
+                    {'error': f"Unknown sections: {', '.join(unknown)}"},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            sections = tuple(section for section in DASHBOARD_SECTIONS if section in requested)
+        else:
+            sections = DASHBOARD_SECTIONS
+
+        # Parse dates
+        start_date, end_date, label = WorkoutAnalyticsService.parse_period(
+            period, start_date_str, end_date_str
+        )
+
+        # Get all requested sections with a fixed number of queries over the derived tables
+        dashboard_data = AnalyticsCache.call(
+            get_analytics_service().get_dashboard,
+            request.user, start_date, end_date, granularity, top_n, sections
+        )
+
+        response_data = {
+            'period': {
+                'start': start_date.strftime('%Y-%m-%d') if start_date else None,
+                'end': end_date.strftime('%Y-%m-%d'),
+                'label': label
+            },
+            **dashboard_data
+        }
+
+        serializer = AnalyticsDashboardSerializer(response_data)
+        return Response(serializer.data)
+
 
 class GeneratedWorkoutViewSet(viewsets.ModelViewSet):
     """ViewSet for GeneratedWorkout model"""
@@ -485,33 +567,135 @@ class GeneratedWorkoutViewSet(viewsets.ModelViewSet):
         else:
             serializer.save()
 
+    @action(detail=True, methods=['post'])
+    def save_plan(self, request, pk=None):
+        """Keep a generated plan past the unsaved retention period"""
+        return self._set_saved(True)
+
+    @action(detail=True, methods=['post'])
+    def unsave_plan(self, request, pk=None):
+        """Let a generated plan expire with the unsaved retention policy again"""
+        return self._set_saved(False)
+
+    def _set_saved(self, is_saved):
+        generated_workout = self.get_object()
+        if generated_workout.user_id is None:
+            return Response(
+                {'error': 'Only plans owned by a user can be saved'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        generated_workout.is_saved = is_saved
+        generated_workout.save(update_fields=['is_saved'])
+
+        return Response(self.get_serializer(generated_workout).data)
+
     @action(detail=False, methods=['post'])
     def generate(self, request):
         """Generate a new workout plan"""
         serializer = WorkoutGenerationRequestSerializer(data=request.data)
         if serializer.is_valid():
             generator = WorkoutGenerator()
+            catalog = get_exercise_catalog()
             workout_plan = generator.generate_workout(
                 muscles_targeted=serializer.validated_data['muscles_targeted'],
                 duration=serializer.validated_data['duration'],
                 intensity=serializer.validated_data['intensity'],
                 goal=serializer.validated_data['goal'],
-                equipment=serializer.validated_data['equipment']
+                equipment=serializer.validated_data['equipment'],
+                catalog=catalog,
+                seed=serializer.validated_data.get('seed'),
+                recent_exercises=user_recency_weights(request.user)
             )
 
-            # Save the generated workout
-            generated_workout = GeneratedWorkout.objects.create(
+            generated_workout = GeneratedWorkout(
                 user=request.user if request.user.is_authenticated else None,
                 muscles_targeted=serializer.validated_data['muscles_targeted'],
                 duration=serializer.validated_data['duration'],
                 intensity=serializer.validated_data['intensity'],
                 goal=serializer.validated_data['goal'],
                 equipment=serializer.validated_data['equipment'],
-                workout_plan=workout_plan
+                workout_plan=compact_plan(workout_plan, catalog)
             )
 
+            # Save the generated workout (anonymous plans may be returned inline only)
+            persist = self._persist_plans(request)
+            if persist:
+                generated_workout.save()
+
+            context = {'request': request, 'exercise_catalog': catalog}
             return Response(
-                GeneratedWorkoutSerializer(generated_workout).data,
-                status=status.HTTP_201_CREATED
+                GeneratedWorkoutSerializer(generated_workout, context=context).data,
+                status=status.HTTP_201_CREATED if persist else status.HTTP_200_OK
             )
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=['post'])
+    def generate_batch(self, request):
+        """
+        Generate several workout plans in one request.
+
+        Body: {"workouts": [<generate request>, ...]}. Every plan is built
+        against one catalog snapshot and valid plans are saved with a single
+        bulk insert. Results are returned in request order; invalid items
+        carry their validation errors instead of a workout.
+        """
+        batch_serializer = WorkoutBatchGenerationRequestSerializer(data=request.data)
+        if not batch_serializer.is_valid():
+            return Response(batch_serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        user = request.user if request.user.is_authenticated else None
+        generator = WorkoutGenerator()
+        catalog = get_exercise_catalog()
+        recent_exercises = user_recency_weights(request.user)
+
+        results = []
+        to_create = []
+        for index, spec in enumerate(batch_serializer.validated_data['workouts']):
+            serializer = WorkoutGenerationRequestSerializer(data=spec)
+            if not serializer.is_valid():
+                results.append({'index': index, 'errors': serializer.errors})
+                continue
+
+            data = serializer.validated_data
+            workout_plan = generator.generate_workout(
+                muscles_targeted=data['muscles_targeted'],
+                duration=data['duration'],
+                intensity=data['intensity'],
+                goal=data['goal'],
+                equipment=data['equipment'],
+                catalog=catalog,
+                seed=data.get('seed'),
+                recent_exercises=recent_exercises
+            )
+            result = {'index': index}
+            results.append(result)
+            to_create.append((result, GeneratedWorkout(
+                user=user,
+                muscles_targeted=data['muscles_targeted'],
+                duration=data['duration'],
+                intensity=data['intensity'],
+                goal=data['goal'],
+                equipment=data['equipment'],
+                workout_plan=compact_plan(workout_plan, catalog)
+            )))
+
+        # Save every valid plan with one insert
+        workouts = [workout for _, workout in to_create]
+        persist = self._persist_plans(request)
+        if persist:
+            workouts = GeneratedWorkout.objects.bulk_create(workouts)
+        context = {'request': request, 'exercise_catalog': catalog}
+        for (result, _), workout in zip(to_create, workouts):
+            result['workout'] = GeneratedWorkoutSerializer(workout, context=context).data
+
+        if len(workouts) != len(results):
+            response_status = status.HTTP_207_MULTI_STATUS
+        else:
+            response_status = status.HTTP_201_CREATED if persist else status.HTTP_200_OK
+        return Response({'results': results}, status=response_status)
+
+    @staticmethod
+    def _persist_plans(request):
+        """Anonymous plans are only stored when GENERATED_WORKOUT_PERSIST_ANONYMOUS is on"""
+        return request.user.is_authenticated or getattr(settings, 'GENERATED_WORKOUT_PERSIST_ANONYMOUS', True)
@@ -1,8 +1,99 @@
 """
 Workout Generation Algorithm
 """
+import copy
 import random
+import threading
+from collections import OrderedDict
+from django.conf import settings
 from exercises.models import Exercise
+from .exercise_catalog import EQUIPMENT_TIERS, equipment_tier, get_exercise_catalog
+from .exercise_selection import select_exercises
+
+
+# Map alternative muscle names to database names
+MUSCLE_NAME_MAP = {
+    'quadriceps': 'quads',
+    'core': 'abs',
+    'abdominals': 'abs',
+    'traps': 'back',
+    'trapezius': 'back',
+    'forearms': 'biceps',
+    'lats': 'back',
+    'lower back': 'back',
+    'lower_back': 'back',
+}
+
+
+def normalize_muscle_name(muscle):
+    """Normalize muscle name to match database entries"""
+    muscle_lower = muscle.lower().strip()
+    return MUSCLE_NAME_MAP.get(muscle_lower, muscle_lower)
+
+
+class PlanCache:
+    """
+    Process-wide LRU cache of seeded workout plans.
+
+    Only seeded generations are cached: with the same inputs, seed and
+    catalog version they always produce the same plan. Plans are deep-copied
+    in and out, so callers may mutate what they get back.
+    """
+
+    _lock = threading.Lock()
+    _plans = OrderedDict()
+    _stats = {'hits': 0, 'misses': 0}
+
+    @staticmethod
+    def maxsize():
+        return getattr(settings, 'WORKOUT_PLAN_CACHE_SIZE', 256)
+
+    @classmethod
+    def get(cls, key):
+        """Return a copy of the cached plan for key, or None"""
+        with cls._lock:
+            plan = cls._plans.get(key)
+            if plan is None:
+                cls._stats['misses'] += 1
+                return None
+            cls._plans.move_to_end(key)
+            cls._stats['hits'] += 1
+        return copy.deepcopy(plan)
+
+    @classmethod
+    def put(cls, key, plan):
+        """Store a copy of a plan, evicting the least recently used ones"""
+        maxsize = cls.maxsize()
+        if maxsize <= 0:
+            return
+        plan = copy.deepcopy(plan)
+        with cls._lock:
+            cls._plans[key] = plan
+            cls._plans.move_to_end(key)
+            while len(cls._plans) > maxsize:
+                cls._plans.popitem(last=False)
+
+    @classmethod
+    def stats(cls):
+        """Get process-wide hit/miss counters and occupancy"""
+        with cls._lock:
+            hits, misses = cls._stats['hits'], cls._stats['misses']
+            size = len(cls._plans)
+        total = hits + misses
+        return {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / total, 4) if total else 0.0,
+            'size': size,
+            'maxsize': cls.maxsize(),
+        }
+
+    @classmethod
+    def clear(cls):
+        """Drop every cached plan and reset the counters"""
+        with cls._lock:
+            cls._plans.clear()
+            cls._stats = {'hits': 0, 'misses': 0}
 
 
 class WorkoutGenerator:
@@ -22,24 +113,14 @@ class WorkoutGenerator:
         }
         
         # Map alternative muscle names to database names
-        self.muscle_name_map = {
-            'quadriceps': 'quads',
-            'core': 'abs',
-            'abdominals': 'abs',
-            'traps': 'back',
-            'trapezius': 'back',
-            'forearms': 'biceps',
-            'lats': 'back',
-            'lower back': 'back',
-            'lower_back': 'back',
-        }
+        self.muscle_name_map = MUSCLE_NAME_MAP
 
     def _normalize_muscle_name(self, muscle):
         """Normalize muscle name to match database entries"""
-        muscle_lower = muscle.lower().strip()
-        return self.muscle_name_map.get(muscle_lower, muscle_lower)
+        return normalize_muscle_name(muscle)
 
-    def generate_workout(self, muscles_targeted, duration, intensity, goal, equipment):
+    def generate_workout(self, muscles_targeted, duration, intensity, goal, equipment,
+                         catalog=None, seed=None, use_cache=True, recent_exercises=None):
         """
         Generate a complete workout plan
 
@@ -49,52 +130,63 @@ class WorkoutGenerator:
             intensity: 'light', 'moderate', or 'intense'
             goal: 'strength', 'hypertrophy', or 'endurance'
             equipment: 'bodyweight', 'home', or 'gym'
+            catalog: Optional ExerciseCatalog snapshot to generate against
+                (batches pass one snapshot for every plan)
+            seed: Optional integer seed; seeded plans are reproducible and
+                served from the PlanCache when repeated
+            use_cache: False skips the PlanCache for one-off seeds
+            recent_exercises: Optional exercise id -> score multiplier
+                (see recency.recency_weights) to rotate away from recently
+                used exercises
 
         Returns:
             dict: Complete workout plan with exercises
         """
-        # Filter exercises based on equipment
-        available_exercises = self._filter_by_equipment(equipment)
-
-        # Get exercises for each muscle group
-        selected_exercises = []
-        for muscle in muscles_targeted:
-            # Normalize muscle name to match database
-            normalized_muscle = self._normalize_muscle_name(muscle)
-            muscle_exercises = available_exercises.filter(primary_muscle=normalized_muscle)
-            if muscle_exercises.exists():
-                # Select 2-3 exercises per muscle group
-                count = min(3, muscle_exercises.count())
-                exercises = random.sample(list(muscle_exercises), count)
-                selected_exercises.extend(exercises)
-
-        # If we don't have enough exercises, add some compound movements
-        if len(selected_exercises) < 3:
-            compound_exercises = available_exercises.filter(
-                secondary_muscles__len__gt=0
+        # In-memory catalog indexed by equipment tier and muscle (no queries)
+        if catalog is None:
+            catalog = get_exercise_catalog()
+
+        cache_key = None
+        if seed is not None and use_cache:
+            cache_key = (
+                tuple(self._normalize_muscle_name(muscle) for muscle in muscles_targeted),
+                duration, intensity, goal, equipment, seed, catalog.version,
+                tuple(sorted((recent_exercises or {}).items()))
             )
-            if compound_exercises.exists():
-                additional = random.sample(
-                    list(compound_exercises),
-                    min(3 - len(selected_exercises), compound_exercises.count())
-                )
-                selected_exercises.extend(additional)
+            cached_plan = PlanCache.get(cache_key)
+            if cached_plan is not None:
+                cached_plan['muscles_targeted'] = muscles_targeted
+                return cached_plan
 
-        # Calculate time per exercise
-        time_per_exercise = duration / len(selected_exercises) if selected_exercises else 0
+        # Dedicated generator: never touches (or depends on) the global random state
+        rng = random.Random(seed)
+
+        # Pick exercises whose sets x (reps + rest) time fits the requested duration
+        multiplier = self.intensity_multipliers[intensity]
+        reps = (self.goal_reps[goal]['min'] + self.goal_reps[goal]['max']) / 2
+        selected = select_exercises(
+            catalog,
+            [self._normalize_muscle_name(muscle) for muscle in muscles_targeted],
+            equipment,
+            budget_seconds=duration * 60,
+            prescription=(multiplier['sets'], multiplier['rest'], reps),
+            rng=rng,
+            recent=recent_exercises
+        )
 
         # Build workout plan
         workout_exercises = []
-        for exercise in selected_exercises:
+        for exercise, sets, cost_seconds in selected:
             exercise_data = self._build_exercise_data(
-                exercise, intensity, goal, time_per_exercise
+                exercise, intensity, goal, cost_seconds / 60, fitted_sets=sets
             )
             workout_exercises.append(exercise_data)
 
-        return {
+        workout_plan = {
             'exercises': workout_exercises,
             'total_exercises': len(workout_exercises),
             'estimated_duration': duration,
+            'planned_duration': round(sum(cost for _, _, cost in selected) / 60),
             'muscles_targeted': muscles_targeted,
             'intensity': intensity,
             'goal': goal,
@@ -103,19 +195,19 @@ class WorkoutGenerator:
             'cooldown_recommendation': self._get_cooldown_recommendation()
         }
 
+        if cache_key is not None:
+            PlanCache.put(cache_key, workout_plan)
+        return workout_plan
+
     def _filter_by_equipment(self, equipment):
         """Filter exercises by available equipment"""
-        if equipment == 'bodyweight':
-            return Exercise.objects.filter(equipment='bodyweight')
-        elif equipment == 'home':
-            return Exercise.objects.filter(
-                equipment__in=['bodyweight', 'dumbbells', 'resistance_band', 'kettlebell']
-            )
-        else:  # gym
+        allowed = EQUIPMENT_TIERS[equipment_tier(equipment)]
+        if allowed is None:  # gym
             return Exercise.objects.all()
+        return Exercise.objects.filter(equipment__in=allowed)
 
-    def _build_exercise_data(self, exercise, intensity, goal, time_per_exercise):
-        """Build detailed exercise data with sets, reps, rest"""
+    def _build_exercise_data(self, exercise, intensity, goal, time_per_exercise, fitted_sets=None):
+        """Build detailed exercise data with sets, reps, rest (sets may be fitted by the selector)"""
         # Get base values
         sets = exercise.sets_min
         reps_min = self.goal_reps[goal]['min']
@@ -126,6 +218,8 @@ class WorkoutGenerator:
         multiplier = self.intensity_multipliers[intensity]
         sets = max(1, int(sets * multiplier['sets']))
         rest = int(rest * multiplier['rest'])
+        if fitted_sets is not None:
+            sets = fitted_sets
 
         return {
             'id': exercise.id,
@@ -234,7 +234,7 @@ export default function AnalyticsPage() {
       </div>
 
       {/* Consistency Heatmap */}
-      {consistency && consistency.workout_calendar.length > 0 && (
+      {consistency?.workout_calendar && consistency.workout_calendar.length > 0 && (
         <ConsistencyHeatmap data={consistency.workout_calendar} />
       )}
 
@@ -291,6 +291,17 @@ export const workoutAPI = {
         return response.data;
     },
 
+    // Keep a generated plan (unsaved plans may be purged after the retention period)
+    saveGeneratedWorkout: async (id: number) => {
+        const response = await apiClient.post(`/workouts/generated/${id}/save_plan/`);
+        return response.data;
+    },
+
+    unsaveGeneratedWorkout: async (id: number) => {
+        const response = await apiClient.post(`/workouts/generated/${id}/unsave_plan/`);
+        return response.data;
+    },
+
     // Fetch workout history
     getHistory: async (params?: {
         intensity?: string;
@@ -1,5 +1,6 @@
 import { useState, useEffect, useCallback } from 'react';
 import { analyticsAPI } from '@/lib/api-client';
+import type { CompactCalendar, MusclePair } from '@/types/analytics';
 
 export type AnalyticsPeriod = '7d' | '30d' | '90d' | 'all';
 
@@ -43,18 +44,19 @@ export interface MuscleFrequency {
 
 export interface AnalyticsMuscles {
   muscle_frequency: MuscleFrequency[];
-  muscle_pairs: any[];
+  muscle_pairs: MusclePair[];
 }
 
 export interface ConsistencyData {
   current_streak: number;
   longest_streak: number;
-  workout_calendar: Array<{
+  workout_calendar?: Array<{
     date: string;
     has_workout: boolean;
     workout_count: number;
     total_points: number;
   }>;
+  compact_calendar?: CompactCalendar | null;
   weekly_consistency: {
     target_workouts_per_week: number;
     actual_avg_per_week: number;
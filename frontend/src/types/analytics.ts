@@ -82,9 +82,15 @@ export interface MuscleFrequency {
   percentage: number;
 }
 
+export interface MusclePair {
+  muscles: [string, string];
+  count: number;
+  percentage: number;
+}
+
 export interface MuscleAnalytics {
   muscle_frequency: MuscleFrequency[];
-  muscle_pairs: string[][];
+  muscle_pairs: MusclePair[];
 }
 
 // Consistency data
@@ -113,10 +119,20 @@ export interface DayOfWeekBreakdown {
   Sunday: number;
 }
 
+// Bitmap-encoded calendar (?calendar_format=compact)
+export interface CompactCalendar {
+  start: string;
+  days: number;
+  bitmap: string;
+  workout_counts: number[];
+  total_points: number[];
+}
+
 export interface ConsistencyData {
   current_streak: number;
   longest_streak: number;
-  workout_calendar: WorkoutCalendarDay[];
+  workout_calendar?: WorkoutCalendarDay[];
+  compact_calendar?: CompactCalendar | null;
   weekly_consistency: WeeklyConsistency;
   day_of_week_breakdown: DayOfWeekBreakdown;
 }